@@ -0,0 +1,92 @@
+# benchmarks/bench_instances.py - Measure player creation time and memory with shared or per-player libvlc instances.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+# Usage: python benchmarks/bench_instances.py [-p PLAYERS] [-s SHARDS,SHARDS,...] <video_file>
+# Each configuration runs in its own process, so resident memory is measured from a clean start.
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def run_configuration(players, shards, video):
+    """
+    Create players in the current process and report timings and memory as JSON.
+    """
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5 import QtWidgets
+    import modules.config as config
+    import modules.utils as utils
+    from modules.vlcpool import InstancePool
+
+    config.log_level = 100
+    config.is_mac = sys.platform == 'darwin'
+    app = QtWidgets.QApplication([])
+    pool = InstancePool(shards)
+
+    rss_before = utils.get_rss()
+    start = time.perf_counter()
+    media_players = []
+    for index in range(players):
+        instance = pool.get(index)
+        player = instance.media_player_new()
+        player.set_media(instance.media_new(video))
+        player.audio_set_mute(True)
+        player.play()
+        media_players.append(player)
+    created = time.perf_counter() - start
+
+    # Let the players open their media and start decoding
+    deadline = time.monotonic() + 3
+    while time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.05)
+    rss_after = utils.get_rss()
+
+    for player in media_players:
+        player.stop()
+        player.release()
+    pool.release()
+
+    print(json.dumps({
+        'players': players,
+        'shards': shards,
+        'instances': players if shards == 0 else min(shards, players),
+        'creation_time': round(created, 4),
+        'rss_before': rss_before,
+        'rss_after': rss_after,
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark libvlc instance sharing")
+    parser.add_argument('-p', '--players', type=int, default=16, help='Number of players to create')
+    parser.add_argument('-s', '--shards', default='0,1,4', help='Comma-separated shared instance counts to compare, 0 for one per player')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('video', help='Video file played by every player')
+    args = parser.parse_args()
+
+    shards_list = [int(shards) for shards in args.shards.split(',')]
+    if args.child:
+        run_configuration(args.players, shards_list[0], args.video)
+        return
+
+    for shards in shards_list:
+        command = [sys.executable, __file__, '--child', '-p', str(args.players), '-s', str(shards), args.video]
+        result = subprocess.run(command, capture_output=True, text=True)
+        try:
+            data = json.loads(result.stdout.strip().splitlines()[-1])
+        except (ValueError, IndexError):
+            print(f"shards={shards}: failed\n{result.stderr}")
+            continue
+        rss = (data['rss_after'] or 0) - (data['rss_before'] or 0)
+        print(f"{data['players']} players, {data['instances']} instance(s): "
+              f"created in {data['creation_time']:.3f}s, RSS +{rss / 1048576:.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_scanner.py - Compare the native scanner with the former `find` subprocess.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+# Usage: python benchmarks/bench_scanner.py [-r REPEAT] [-d DAYS] [-w WORKERS] <directory> [<directory> ...]
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import scanner
+
+def find_videos_subprocess(directories, days=None):
+    """
+    Reference implementation: one `find` subprocess per directory, filtered in Python.
+
+    Args:
+        directories (list of str): The directories to search for video files.
+        days (int, optional): The number of days to look back for videos.
+
+    Returns:
+        list of str: A sorted list of paths to found video files.
+    """
+    videos = []
+    for directory in directories:
+        command = ['find', os.path.abspath(directory), '(', '-type', 'f', '-o', '-type', 'l', ')']
+        if days:
+            command.extend(['-mtime', f'-{days}'])
+        result = subprocess.run(command, capture_output=True, text=True)
+        videos.extend(file for file in result.stdout.splitlines() if scanner.is_video_name(os.path.basename(file)))
+    videos.sort()
+    return videos
+
+def measure(function, repeat):
+    """
+    Run a function several times and return its best time and last result.
+    """
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark video discovery")
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Number of runs, the best one is reported')
+    parser.add_argument('-d', '--days', type=int, help='Number of days to look back for videos')
+    parser.add_argument('-w', '--workers', type=int, help='Number of scanner threads')
+    parser.add_argument('directories', nargs='+', help='Directories to scan')
+    args = parser.parse_args()
+
+    find_time, find_result = measure(lambda: find_videos_subprocess(args.directories, args.days), args.repeat)
+    scan_time, scan_result = measure(lambda: scanner.find_videos(args.directories, args.days, args.workers), args.repeat)
+
+    print(f"find subprocess: {find_time:.3f}s, {len(find_result)} video(s)")
+    print(f"native scanner:  {scan_time:.3f}s, {len(scan_result)} video(s), {args.workers or scanner.default_workers()} worker(s)")
+    if scan_time > 0:
+        print(f"speedup: {find_time / scan_time:.2f}x")
+    if find_result != scan_result:
+        print(f"WARNING: results differ ({len(set(find_result) ^ set(scan_result))} path(s))")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
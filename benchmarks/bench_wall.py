@@ -0,0 +1,181 @@
+# benchmarks/bench_wall.py - Run the whole wall headless and measure its performance.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+# Usage: python benchmarks/bench_wall.py [-S WxH,WxH,...] [-t SECONDS] [-o results.json] [wall options] <video_directory> [...]
+# Any option of the application (-n, -N, --compositor, --no-preroll, ...) is passed to the wall.
+# Windows are rendered with Qt's offscreen platform, videos with libvlc's dummy video output,
+# or decoded to memory with --compositor. No monitor is needed.
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import subprocess
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtWidgets, QtCore
+
+import modules.config as config
+import modules.utils as utils
+from modules.slots import get_slots
+from modules.vlcpool import InstancePool
+
+SAMPLE_INTERVAL = 1000  # Milliseconds between two CPU and memory samples
+
+def parse_screens(value):
+    """
+    Build a virtual screen set, side by side, from a comma-separated list of resolutions.
+
+    Args:
+        value (str): The resolutions, e.g. "1920x1080,1920x1080".
+
+    Returns:
+        list of tuples: The screens, as returned by get_screens(): (resolution, x, y).
+    """
+    screens = []
+    x = 0
+    for resolution in value.split(','):
+        width, _ = map(int, resolution.split('x'))
+        screens.append((resolution, x, 0))
+        x += width
+    return screens
+
+def get_version():
+    """
+    Get the version of the application, from git.
+
+    Returns:
+        str: The git description of the current commit, or None.
+    """
+    try:
+        result = subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+def summary(values):
+    """
+    Summarize a list of measures.
+
+    Returns:
+        dict: Count, min, median, mean and max, or None without values.
+    """
+    if not values:
+        return None
+    return {
+        'count': len(values),
+        'min': round(min(values), 4),
+        'median': round(statistics.median(values), 4),
+        'mean': round(statistics.mean(values), 4),
+        'max': round(max(values), 4),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the video wall headless", add_help=False)
+    parser.add_argument('-S', '--screens', default='1920x1080', help='Comma-separated virtual screen resolutions, side by side')
+    parser.add_argument('-t', '--time', type=float, default=30, help='Run duration in seconds, after the wall is built')
+    parser.add_argument('-o', '--output', help='Write the JSON results to this file instead of the standard output')
+    args, wall_args = parser.parse_known_args()
+
+    # Let the application parse its own options
+    sys.argv = [sys.argv[0]] + wall_args
+    config.setup_config()
+    config.app_name = "WallOli benchmark"
+    config.start_time = time.monotonic()
+    utils.validate_os()
+    app = QtWidgets.QApplication(sys.argv[:1])
+    utils.setup_logging()
+
+    from modules.wall import Wall
+    from modules.probe import Prober
+    from modules import compositor
+
+    screens = parse_screens(args.screens)
+    video_paths = utils.find_videos(config.directories, config.days)
+    if not video_paths:
+        utils.exit_with_error("No videos found in the specified directories")
+    slots = get_slots(video_paths, screens)
+
+    # Nothing is displayed, the dummy output still decodes every frame
+    use_compositor = config.compositor and compositor.available()
+    pool = InstancePool(config.vlc_instances, [] if use_compositor else ['--vout=dummy'])
+
+    cpu_start = time.process_time()
+    build_start = time.monotonic()
+    prober = None if config.no_probe else Prober(config.probe_workers)
+    wall = Wall(screens, slots, video_paths, prober=prober, instance_pool=pool)
+
+    # The players are created in waves from the event loop, the start-up ends with the last one
+    startup_times = []
+
+    def on_startup_finished():
+        if not startup_times:
+            startup_times.append(time.monotonic() - build_start)
+
+    if wall.startup.done:
+        on_startup_finished()
+    else:
+        wall.startup.finished.connect(on_startup_finished)
+
+    rss_samples = []
+    cpu_samples = []
+    last = [time.monotonic(), time.process_time()]
+
+    def sample():
+        now, cpu = time.monotonic(), time.process_time()
+        cpu_samples.append((cpu - last[1]) / (now - last[0]) * 100)
+        last[:] = [now, cpu]
+        rss = utils.get_rss()
+        if rss:
+            rss_samples.append(rss)
+
+    sampler = QtCore.QTimer()
+    sampler.timeout.connect(sample)
+    sampler.start(SAMPLE_INTERVAL)
+    run_start = time.monotonic()
+    QtCore.QTimer.singleShot(int(args.time * 1000), app.quit)
+    app.exec_()
+    run_time = time.monotonic() - run_start
+    cpu_time = time.process_time() - cpu_start
+
+    switch_latencies = [latency for player in wall.players for latency in player.switch_latencies]
+    results = {
+        'version': get_version(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'arguments': wall_args,
+        'screens': args.screens,
+        'videos': len(video_paths),
+        'slots': len(slots),
+        'players': len(wall.players),
+        'duration': round(run_time, 3),
+        'startup_time': round(startup_times[0], 4) if startup_times else None,
+        'time_to_first_frame': summary(list(wall.first_frame_times.values())),
+        'first_frame_per_slot': {str(slot): round(elapsed, 4) for slot, elapsed in sorted(wall.first_frame_times.items())},
+        'slots_started': len(wall.first_frame_times),
+        'switch_latency': summary(switch_latencies),
+        'cpu_percent': summary(cpu_samples),
+        'cpu_percent_overall': round(cpu_time / (time.monotonic() - build_start) * 100, 1),
+        'rss': summary(rss_samples),
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+        print(f"Results written to {args.output}")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
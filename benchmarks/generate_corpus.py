@@ -0,0 +1,184 @@
+# benchmarks/generate_corpus.py - Generate reproducible test video libraries for benchmarks, with ffmpeg.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+# Usage: python benchmarks/generate_corpus.py [-n COUNT] [-o DIR] [--seed SEED] [--resolutions MIX] [--codecs MIX]
+#                                             [--durations MIN-MAX] [--broken RATIO] [-j WORKERS]
+# Mixes are comma-separated values with optional weights, e.g. --resolutions 1920x1080:4,3840x2160:1,1080x1920:1
+# The same seed and options always produce the same library. Existing files are kept.
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# ffmpeg encoder arguments and file extension of each codec
+CODECS = {
+    'h264': (['-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p'], 'mp4'),
+    'hevc': (['-c:v', 'libx265', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p', '-tag:v', 'hvc1'], 'mp4'),
+    'vp9': (['-c:v', 'libvpx-vp9', '-deadline', 'realtime', '-cpu-used', '8', '-pix_fmt', 'yuv420p'], 'webm'),
+    'mpeg4': (['-c:v', 'mpeg4', '-q:v', '5'], 'avi'),
+}
+
+# Ways to break a file, see break_file()
+BROKEN_KINDS = ['truncated', 'corrupted', 'garbage', 'empty']
+
+def parse_mix(value):
+    """
+    Parse a weighted mix, e.g. "1920x1080:4,3840x2160:1".
+
+    Returns:
+        tuple: (values, weights).
+    """
+    values, weights = [], []
+    for item in value.split(','):
+        name, _, weight = item.partition(':')
+        values.append(name)
+        weights.append(float(weight) if weight else 1.0)
+    return values, weights
+
+def plan_corpus(count, seed, resolutions, codecs, durations, broken, fps):
+    """
+    Draw the specification of every clip, in the main process, so the library only depends on the seed.
+
+    Returns:
+        list of dict: The clip specifications.
+    """
+    rng = random.Random(seed)
+    resolution_values, resolution_weights = parse_mix(resolutions)
+    codec_values, codec_weights = parse_mix(codecs)
+    min_duration, _, max_duration = durations.partition('-')
+    min_duration = int(min_duration)
+    max_duration = int(max_duration or min_duration)
+
+    clips = []
+    for index in range(count):
+        resolution = rng.choices(resolution_values, resolution_weights)[0]
+        codec = rng.choices(codec_values, codec_weights)[0]
+        duration = rng.randint(min_duration, max_duration)
+        width, height = map(int, resolution.split('x'))
+        broken_kind = rng.choice(BROKEN_KINDS) if rng.random() < broken else None
+        name = f"clip-{index:05d}-{width}x{height}-{codec}-{duration}s"
+        if broken_kind:
+            name += f"-broken-{broken_kind}"
+        clips.append({
+            'name': f"{name}.{CODECS[codec][1]}",
+            'width': width,
+            'height': height,
+            'codec': codec,
+            'duration': duration,
+            'fps': fps,
+            'hue': rng.randrange(360),
+            'frequency': rng.randrange(200, 2000),
+            'broken': broken_kind,
+            'seed': rng.getrandbits(32),
+        })
+    return clips
+
+def break_file(path, kind, seed):
+    """
+    Damage a generated video, to test how the wall handles unplayable files.
+
+    Args:
+        path (str): The video file.
+        kind (str): truncated (second half cut), corrupted (header overwritten),
+            garbage (random bytes) or empty (zero bytes).
+        seed (int): The random seed of the clip.
+    """
+    rng = random.Random(seed)
+    size = os.path.getsize(path)
+    if kind == 'truncated':
+        os.truncate(path, size // 2)
+    elif kind == 'corrupted':
+        with open(path, 'r+b') as file:
+            file.write(rng.randbytes(min(size, 4096)))
+    elif kind == 'garbage':
+        with open(path, 'wb') as file:
+            file.write(rng.randbytes(size))
+    elif kind == 'empty':
+        os.truncate(path, 0)
+
+def generate_clip(clip, output_dir):
+    """
+    Render a clip with ffmpeg lavfi sources, in a worker process.
+
+    Args:
+        clip (dict): The clip specification.
+        output_dir (str): The output directory.
+
+    Returns:
+        tuple: (name, error), error is None on success.
+    """
+    path = os.path.join(output_dir, clip['name'])
+    if os.path.exists(path):
+        return clip['name'], None
+    temporary = os.path.join(output_dir, '.part-' + clip['name'])
+    size = f"{clip['width']}x{clip['height']}"
+    encoder, _ = CODECS[clip['codec']]
+    command = [
+        'ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error', '-y',
+        '-f', 'lavfi', '-i', f"testsrc2=size={size}:rate={clip['fps']}:duration={clip['duration']}",
+        '-f', 'lavfi', '-i', f"sine=frequency={clip['frequency']}:duration={clip['duration']}",
+        '-vf', f"hue=h={clip['hue']}",
+        *encoder,
+        '-c:a', 'libopus' if clip['codec'] == 'vp9' else 'aac', '-b:a', '64k',
+        '-threads', '1', '-fflags', '+bitexact', '-flags', '+bitexact', '-map_metadata', '-1',
+        '-shortest', temporary,
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True)
+    except OSError as e:
+        return clip['name'], str(e)
+    if result.returncode != 0:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        return clip['name'], (result.stderr.strip().splitlines() or [f"exit code {result.returncode}"])[-1]
+    if clip['broken']:
+        break_file(temporary, clip['broken'], clip['seed'])
+    os.replace(temporary, path)
+    return clip['name'], None
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a reproducible test video library")
+    parser.add_argument('-n', '--count', type=int, default=100, help='Number of clips')
+    parser.add_argument('-o', '--output', default='test_videos', help='Output directory')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed, the same seed gives the same library')
+    parser.add_argument('--resolutions', default='1280x720:4,1920x1080:3,3840x2160:1,720x1280:1,640x480:1', help='Weighted resolution mix')
+    parser.add_argument('--codecs', default='h264:4,hevc:1', help=f"Weighted codec mix, among {', '.join(CODECS)}")
+    parser.add_argument('--durations', default='5-20', help='Duration range in seconds, e.g. 5-20')
+    parser.add_argument('--fps', type=int, default=30, help='Frame rate')
+    parser.add_argument('--broken', type=float, default=0.0, help='Ratio of broken files, e.g. 0.05')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(), help='Number of parallel ffmpeg processes')
+    args = parser.parse_args()
+
+    for codec in parse_mix(args.codecs)[0]:
+        if codec not in CODECS:
+            parser.error(f"Unknown codec {codec}, use one of {', '.join(CODECS)}")
+
+    clips = plan_corpus(args.count, args.seed, args.resolutions, args.codecs, args.durations, args.broken, args.fps)
+    os.makedirs(args.output, exist_ok=True)
+    with open(os.path.join(args.output, 'corpus.json'), 'w') as file:
+        json.dump({'seed': args.seed, 'options': vars(args), 'clips': clips}, file, indent=2)
+
+    start = time.monotonic()
+    failures = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = [executor.submit(generate_clip, clip, args.output) for clip in clips]
+        for done, future in enumerate(as_completed(futures), 1):
+            name, error = future.result()
+            if error:
+                failures += 1
+                print(f"[{done}/{len(clips)}] {name}: {error}", file=sys.stderr)
+            else:
+                print(f"[{done}/{len(clips)}] {name}")
+
+    print(f"{len(clips) - failures} clip(s) in {args.output} after {time.monotonic() - start:.1f}s, {failures} failure(s)")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
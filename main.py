@@ -5,7 +5,9 @@
 
 import sys
 import os
-from PyQt5 import QtWidgets, QtGui
+import time
+import random
+from PyQt5 import QtWidgets, QtGui, QtCore
 
 import modules.config as config
 import modules.utils as utils   # all functions accessible with utils.function()
@@ -13,8 +15,19 @@ from modules.utils import *     # main functions accessible as function() for ea
 from modules.appcontroller import AppController
 from modules.settings import Settings, SettingsDialog
 from modules.wall import Wall, WallWindow
-from modules.slots import get_screens, get_slots
+from modules.slots import get_screens, get_slots, required_players
 from modules.videoplayer import VideoPlayer
+from modules import library
+from modules.watcher import VideoWatcher
+from modules.discovery import Discovery
+from modules.probe import Prober
+from modules.dedup import Deduplicator, DedupWorker
+from modules.dispatcher import LoopDispatcher
+from modules.multiwall import Supervisor
+from modules.metrics import Metrics
+from modules.governor import Governor
+from modules.screenmonitor import ScreenMonitor
+from modules import planner
 
 def main():
     """
@@ -24,8 +37,8 @@ def main():
         1. Prevents the computer from going to sleep.
         2. Initializes the QApplication.
         3. Parses command-line arguments.
-        4. Searches for video files in the specified directories.
-        5. Retrieves available screens.
+        4. Retrieves available screens.
+        5. Searches for video files in the specified directories, until there are enough to fill the screens.
         6. Calculates slots based on screens and videos.
         7. Creates windows and video players.
         8. Starts the Qt event loop.
@@ -37,6 +50,7 @@ def main():
     # settings = Settings()
     config.setup_config()
     config.app_name = "WallOli"
+    config.start_time = time.monotonic()
 
     # Check OS and die if not supported
     utils.validate_os()
@@ -60,24 +74,99 @@ def main():
     if not config.directories:
         exit_with_error("No directories specified")
 
+    screens = get_screens(config.screen)
+    if not screens:
+        exit_with_error("No screens found, that's pretty embarrassing")
+    log("Screens: " + str(screens))
+
+    wall = None
     video_paths = []
-    for directory in config.directories:
-        video_paths.extend(utils.find_videos(directory, config.days))
+    needed = required_players(screens)
+    deduplicator = None if config.no_dedup else Deduplicator()
+    if needed is None:
+        # Single-loop mode needs the whole list before building the grid.
+        # --max limits the number of videos picked randomly
+        limit = config.max
+        if config.no_index:
+            video_paths = utils.find_videos(config.directories, config.days)
+            if limit:
+                video_paths = random.sample(video_paths, min(limit, len(video_paths)))
+        else:
+            video_paths = library.find_videos(config.directories, config.days, limit, full=config.rescan)
+        if deduplicator is not None:
+            video_paths = deduplicator.filter(video_paths)
+    else:
+        # Stream discovery, the wall is built as soon as there are enough videos
+        # to fill the slots, videos found later are added to the playlists
+        waiting = QtCore.QEventLoop()
+
+        def on_videos_found(paths):
+            if wall is not None:
+                wall.add_videos(paths)
+                return
+            video_paths.extend(paths)
+            if len(video_paths) >= needed:
+                waiting.quit()
+
+        def on_duplicates_found(paths):
+            if wall is not None:
+                wall.remove_videos(paths)
+                return
+            duplicates = set(paths)
+            video_paths[:] = [path for path in video_paths if path not in duplicates]
+
+        discovery = Discovery(config.directories, config.days, use_index=not config.no_index, full=config.rescan, deduplicator=deduplicator)
+        discovery.videos_found.connect(on_videos_found)
+        discovery.duplicates_found.connect(on_duplicates_found)
+        discovery.finished.connect(waiting.quit)
+        discovery.start()
+        waiting.exec_()
+        log(f"{len(video_paths)} video(s) available after {time.monotonic() - config.start_time:.3f}s, building the wall")
 
     if not video_paths:
         exit_with_error("No videos found in the specified directories")
         return
 
-    screens = get_screens(config.screen)
-    if not screens:
-        exit_with_error("No screens found, that's pretty embarrassing")
-    log("Screens: " + str(screens))
-
     slots = get_slots(video_paths, screens)
     log("slots: " + str(slots))
 
-    wall = Wall(screens, slots, video_paths)
+    # Probe video dimensions and durations in the background
+    prober = None if config.no_probe else Prober(config.probe_workers)
+
+    # Single-loop mode plays fixed playlists, balanced so all slots complete their loop together
+    dispatcher = None
+    if needed is None:
+        durations = planner.get_durations(video_paths, prober)
+        dispatcher = LoopDispatcher(*planner.plan_single_loop(video_paths, len(slots), durations))
+
+    if config.multiprocess:
+        # One worker process per screen, the supervisor has the same interface as the wall
+        wall = Supervisor(screens, slots, video_paths, plans=dispatcher.plans if dispatcher is not None else None)
+        wall.start()
+    else:
+        wall = Wall(screens, slots, video_paths, prober=prober, dispatcher=dispatcher)
+        # Rebuild the screens plugged, unplugged or reconfigured while playing
+        screen_monitor = ScreenMonitor(wall)
+        # Playback statistics, in verbose logs, on the metrics endpoint and for the quality governor
+        if config.metrics_port or config.verbose or config.governor:
+            metrics = Metrics(wall)
+            if config.governor:
+                governor = Governor(wall, metrics)
     log("Wall: " + str(wall))
+
+    # Hot-add and remove videos while the wall is running
+    if config.watch:
+        watcher = VideoWatcher(config.directories, config.days, config.watch_interval)
+        if deduplicator is not None:
+            # Hash the new videos off the Qt thread
+            dedup_worker = DedupWorker(deduplicator)
+            watcher.videos_added.connect(dedup_worker.add)
+            watcher.videos_removed.connect(dedup_worker.remove)
+            dedup_worker.videos_added.connect(wall.add_videos)
+        else:
+            watcher.videos_added.connect(wall.add_videos)
+        watcher.videos_removed.connect(wall.remove_videos)
+        watcher.start()
     
     # Lancer la boucle principale de PyQt
     sys.exit(app.exec_())
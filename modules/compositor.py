@@ -0,0 +1,266 @@
+# modules/compositor.py - Software compositor, all the slots of a screen drawn on a single surface.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+import ctypes
+import threading
+from PyQt5 import QtWidgets, QtCore, QtGui
+import vlc
+
+import modules.config as config
+import modules.utils as utils   # all functions accessible with utils.function()
+from modules.utils import *     # main functions accessible as function() for ease of use, e.g. log(), error(), exit_with_error()
+
+# NumPy is only needed by the compositor mode
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+ALIGNMENT = 32  # Byte alignment of the picture buffers and their lines, required by libvlc
+
+# Same prototype as vlc.CallbackDecorators.VideoFormatCb, with the chroma as a
+# writable pointer instead of a read-only string
+VideoFormatCb = ctypes.CFUNCTYPE(
+    ctypes.c_uint,
+    ctypes.POINTER(ctypes.c_void_p),
+    ctypes.c_void_p,
+    ctypes.POINTER(ctypes.c_uint),
+    ctypes.POINTER(ctypes.c_uint),
+    ctypes.POINTER(ctypes.c_uint),
+    ctypes.POINTER(ctypes.c_uint),
+)
+
+def available():
+    """
+    Check if the compositor mode can be used.
+
+    Returns:
+        bool: True if NumPy is installed.
+    """
+    return numpy is not None
+
+def aligned_array(height, width):
+    """
+    Allocate a 32-bit pixel array whose data and lines are aligned for libvlc.
+
+    Args:
+        height (int): The number of lines.
+        width (int): The number of pixels per line.
+
+    Returns:
+        tuple: (array, pitch), the (height, width) uint32 array view and the line size in bytes.
+    """
+    pitch = -(-width * 4 // ALIGNMENT) * ALIGNMENT
+    lines = -(-height // ALIGNMENT) * ALIGNMENT
+    raw = numpy.zeros(pitch * lines + ALIGNMENT, dtype=numpy.uint8)
+    offset = -raw.ctypes.data % ALIGNMENT
+    data = raw[offset:offset + pitch * lines].view(numpy.uint32).reshape(lines, pitch // 4)
+    return data, pitch
+
+class FrameBuffer:
+    """
+    Receive the decoded frames of a VLC media player in memory, instead of a window.
+
+    The video is scaled by libvlc to the size it takes in the slot, based on
+    the panscan value, and stored as RV32 (the QImage RGB32 layout). The
+    compositor copies the frame to its surface when a new one was displayed.
+
+    Attributes:
+        frame (numpy.ndarray): The last frame, (height, width) uint32, or None before the first one.
+        dirty (bool): A new frame was displayed since the last copy.
+    """
+
+    def __init__(self, player, width, height):
+        """
+        Attach the buffer to a media player, before it starts playing.
+
+        Args:
+            player (vlc.MediaPlayer): The media player.
+            width (int): The slot width in pixels.
+            height (int): The slot height in pixels.
+        """
+        self.width = width
+        self.height = height
+        self.frame = None
+        self.pixels = None
+        self.pointer = None
+        self.dirty = False
+        self.lock = threading.Lock()
+
+        # Keep references to the callbacks, they must outlive the player
+        self.format_callback = VideoFormatCb(self.on_format)
+        self.cleanup_callback = vlc.CallbackDecorators.VideoCleanupCb(self.on_cleanup)
+        self.lock_callback = vlc.CallbackDecorators.VideoLockCb(self.on_lock)
+        self.unlock_callback = vlc.CallbackDecorators.VideoUnlockCb(self.on_unlock)
+        self.display_callback = vlc.CallbackDecorators.VideoDisplayCb(self.on_display)
+
+        player.video_set_format_callbacks(
+            ctypes.cast(self.format_callback, vlc.CallbackDecorators.VideoFormatCb),
+            self.cleanup_callback)
+        player.video_set_callbacks(self.lock_callback, self.unlock_callback, self.display_callback, None)
+
+    def frame_size(self, video_width, video_height):
+        """
+        Get the size of the frames libvlc scales the video to, based on the panscan value.
+
+        Args:
+            video_width (int): The decoded video width.
+            video_height (int): The decoded video height.
+
+        Returns:
+            tuple: (width, height) in pixels.
+        """
+        if not video_width or not video_height:
+            return self.width, self.height
+        panscan = max(0, min(1, getattr(config, 'panscan', 0) or 0))
+        scale_fit = min(self.width / video_width, self.height / video_height)
+        scale_fill = max(self.width / video_width, self.height / video_height)
+        scale = (scale_fill - scale_fit) * panscan + scale_fit
+        return max(2, round(video_width * scale)), max(2, round(video_height * scale))
+
+    def on_format(self, opaque, chroma, width, height, pitches, lines):
+        """
+        Choose the frame format and allocate the buffer, in a VLC thread.
+        """
+        frame_width, frame_height = self.frame_size(width[0], height[0])
+        pixels, pitch = aligned_array(frame_height, frame_width)
+        with self.lock:
+            self.pixels = pixels
+            self.pointer = pixels.ctypes.data
+            self.frame = pixels[:frame_height, :frame_width]
+            self.dirty = False
+        ctypes.memmove(chroma, b'RV32', 4)
+        width[0], height[0] = frame_width, frame_height
+        pitches[0] = pitch
+        lines[0] = pixels.shape[0]
+        return 1
+
+    def on_cleanup(self, opaque):
+        """
+        Forget the frame when the video output is closed, in a VLC thread.
+        """
+        with self.lock:
+            self.frame = None
+            self.dirty = True
+
+    def on_lock(self, opaque, planes):
+        """
+        Give the buffer to the decoder, in a VLC thread.
+        """
+        planes[0] = self.pointer
+        return None
+
+    def on_unlock(self, opaque, picture, planes):
+        """
+        Nothing to do, the frame is copied when displayed.
+        """
+
+    def on_display(self, opaque, picture):
+        """
+        Flag the new frame, in a VLC thread.
+        """
+        self.dirty = True
+
+class CompositorSurface(QtWidgets.QWidget):
+    """
+    A single surface covering a wall window, where the frames of all its slots are drawn.
+
+    Instead of one native window and one video output per slot, each player
+    decodes into a FrameBuffer and the surface copies the new frames into one
+    QImage, at a fixed refresh rate, then repaints once.
+    """
+
+    def __init__(self, parent, width, height, fps=None):
+        """
+        Initialize the surface.
+
+        Args:
+            parent (QWidget): The wall window.
+            width (int): The window width in pixels.
+            height (int): The window height in pixels.
+            fps (int, optional): The refresh rate, defaults to config.compositor_fps.
+        """
+        super(CompositorSurface, self).__init__(parent)
+        self.setGeometry(0, 0, width, height)
+        self.setAttribute(QtCore.Qt.WA_OpaquePaintEvent)
+        self.image = QtGui.QImage(width, height, QtGui.QImage.Format_RGB32)
+        self.image.fill(QtGui.QColor("black"))
+        bits = self.image.bits()
+        bits.setsize(self.image.byteCount())
+        self.pixels = numpy.frombuffer(bits, dtype=numpy.uint32).reshape(height, self.image.bytesPerLine() // 4)
+        self.players = []
+        self.frames = {}    # player => frame shown in its tile, to clear the tile when it changes
+
+        self.fps = fps or config.compositor_fps or 25
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.compose)
+        self.timer.start(int(1000 / self.fps))
+        log(f"Compositor surface {width}x{height} at {self.fps} fps")
+
+    def add_player(self, player):
+        """
+        Draw a player on the surface, in its own geometry.
+
+        Args:
+            player (VideoPlayer): The player, created with frame buffers.
+        """
+        self.players.append(player)
+
+    def compose(self):
+        """
+        Copy the new frames of every slot to the surface, and repaint it once.
+        """
+        changed = False
+        for player in self.players:
+            buffer = player.frame_buffer
+            if buffer is None:
+                continue
+            if not buffer.dirty and self.frames.get(player) is buffer.frame:
+                continue
+            with buffer.lock:
+                frame = buffer.frame
+                buffer.dirty = False
+            self.blit(player, frame)
+            changed = True
+        if changed:
+            self.update()
+
+    def blit(self, player, frame):
+        """
+        Copy a frame into a player tile, centered, cropped to the tile if larger.
+
+        Args:
+            player (VideoPlayer): The player.
+            frame (numpy.ndarray): The frame, or None to clear the tile.
+        """
+        geometry = player.geometry()
+        x, y, width, height = geometry.x(), geometry.y(), geometry.width(), geometry.height()
+        tile = self.pixels[y:y + height, x:x + width]
+        height, width = tile.shape
+        previous = self.frames.get(player)
+        if frame is None or previous is None or previous is not frame:
+            # New frame size or no frame, clear the margins
+            tile[:] = 0xff000000
+        self.frames[player] = frame
+        if frame is None:
+            return
+
+        frame_height, frame_width = frame.shape
+        copy_width, copy_height = min(width, frame_width), min(height, frame_height)
+        source_x, source_y = (frame_width - copy_width) // 2, (frame_height - copy_height) // 2
+        target_x, target_y = (width - copy_width) // 2, (height - copy_height) // 2
+        tile[target_y:target_y + copy_height, target_x:target_x + copy_width] = \
+            frame[source_y:source_y + copy_height, source_x:source_x + copy_width]
+
+    def paintEvent(self, event):
+        """
+        Draw the surface image.
+
+        Args:
+            event: The paint event.
+        """
+        painter = QtGui.QPainter(self)
+        painter.drawImage(event.rect(), self.image, event.rect())
+        painter.end()
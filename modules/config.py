@@ -18,6 +18,40 @@ config_values = {
     'max': None,
     'verbose': None,
     'quiet': None,
+    'scan_workers': None,
+    'no_index': None,
+    'rescan': None,
+    'watch': None,
+    'watch_interval': None,
+    'no_probe': None,
+    'probe_workers': None,
+    'no_dedup': None,
+    'vlc_instances': None,
+    'no_preroll': None,
+    'decoder_profile': None,
+    'decoder_threads': None,
+    'no_quarantine': None,
+    'reshow_interval': None,
+    'proxy': None,
+    'proxy_bitrate': None,
+    'proxy_height': None,
+    'proxy_cache_size': None,
+    'proxy_workers': None,
+    'compositor': None,
+    'compositor_fps': None,
+    'multiprocess': None,
+    'stats_interval': None,
+    'metrics_port': None,
+    'governor': None,
+    'no_watchdog': None,
+    'stall_timeout': None,
+    'startup_concurrency': None,
+    'startup_budget': None,
+    'aspect_window': None,
+    'mixed_tiles': None,
+    'log_file': None,
+    'log_max_size': None,
+    'log_backups': None,
 }
 _config_initialized = False  # Variable interne pour vérifier l'initialisation
 
@@ -47,16 +81,50 @@ def setup_config():
     # Étape 3 : Traitement des arguments en ligne de commande
     parser = argparse.ArgumentParser(description="Video Wall")
     parser.add_argument('-s', '--screen', type=int, help='Screen number')
-    parser.add_argument('-n', '--number', type=int, default=1, help='Number of players per screen')
+    parser.add_argument('-n', '--number', type=int, default=None, help='Number of players per screen, defaults to 1, or to all the videos in single-loop mode')
     parser.add_argument('-N', '--total-number', type=int, default=None, help='Total number of players, overrides -n')
     parser.add_argument('-b', '--bestfit', action='store_true', help='Try to fit the best number of players on the screens')
     parser.add_argument('-d', '--days', type=int, help='Number of days to look back for videos')
     parser.add_argument('-p', '--panscan', type=float, default=0, help='Panscan value')
     parser.add_argument('-V', '--volume', type=int, default=config_values['volume'], help='Volume level (0-100)')
     parser.add_argument('-v', '--verbose', action='count', default=0, help='Verbose mode (can be used multiple times)')
-    parser.add_argument('-l', '--singleloop', action='store_true', help='Single loop mode (partially implemented)')
+    parser.add_argument('-l', '--singleloop', action='store_true', help='Single loop mode, every video is shown once per loop, loops balanced by duration')
     parser.add_argument('-m', '--max', type=int, help='Maximum number of videos in single-loop mode (partially implemented)')
     parser.add_argument('-q', '--quiet', action='store_true', help='Quiet mode (suppresses all log outputs except CRITICAL)')
+    parser.add_argument('--scan-workers', type=int, help='Number of threads used to scan directories')
+    parser.add_argument('--no-index', action='store_true', help='Do not use the library index, scan directories from scratch')
+    parser.add_argument('--rescan', action='store_true', help='Rescan every directory to rebuild the library index')
+    parser.add_argument('-w', '--watch', action='store_true', help='Watch directories and update playlists while playing')
+    parser.add_argument('--watch-interval', type=int, default=config_values['watch_interval'], help='Polling interval in seconds, when inotify is not available')
+    parser.add_argument('--no-probe', action='store_true', help='Do not probe videos in the background')
+    parser.add_argument('--probe-workers', type=int, default=config_values['probe_workers'], help='Number of threads probing videos')
+    parser.add_argument('--no-dedup', action='store_true', help='Keep duplicate videos (symlinks, overlapping directories, copies)')
+    parser.add_argument('--vlc-instances', type=int, default=config_values['vlc_instances'], help='Number of shared libvlc instances, 0 for one per player')
+    parser.add_argument('--no-preroll', action='store_true', help='Do not pre-roll the next video, use a single VLC player per slot')
+    parser.add_argument('--decoder-profile', choices=['auto', 'full', 'medium', 'low'], default=config_values['decoder_profile'], help='Decoder quality, auto adapts it to the slot size')
+    parser.add_argument('--decoder-threads', type=int, help='Total decoder threads shared by all players (default: number of CPU cores)')
+    parser.add_argument('--no-quarantine', action='store_true', help='Do not remember the files that failed to play')
+    parser.add_argument('--reshow-interval', type=float, default=config_values['reshow_interval'], help='Minimum seconds before a video is shown again')
+    parser.add_argument('--proxy', action='store_true', help='Play low-resolution proxies of heavy videos, transcoded in the background with ffmpeg')
+    parser.add_argument('--proxy-bitrate', type=float, default=config_values['proxy_bitrate'], help='Bitrate in Mbit/s above which a video needs a proxy')
+    parser.add_argument('--proxy-height', type=int, default=config_values['proxy_height'], help='Height in pixels above which a video needs a proxy')
+    parser.add_argument('--proxy-cache-size', type=float, default=config_values['proxy_cache_size'], help='Maximum size of the proxy cache in GB')
+    parser.add_argument('--proxy-workers', type=int, default=config_values['proxy_workers'], help='Number of concurrent proxy transcodes')
+    parser.add_argument('--compositor', action='store_true', help='Draw all the slots of a screen on a single surface (requires NumPy)')
+    parser.add_argument('--compositor-fps', type=int, default=config_values['compositor_fps'], help='Refresh rate of the compositor surface')
+    parser.add_argument('--multiprocess', action='store_true', help='Run the players of each screen in a separate process, restarted if it crashes')
+    parser.add_argument('--stats-interval', type=float, default=config_values['stats_interval'], help='Seconds between two polls of the playback statistics')
+    parser.add_argument('--metrics-port', type=int, help='Serve the playback statistics in Prometheus format on this localhost port')
+    parser.add_argument('--governor', action='store_true', help='Lower the quality of the slots losing frames when the computer is overloaded')
+    parser.add_argument('--no-watchdog', action='store_true', help='Do not restart the slots whose playback is stalled')
+    parser.add_argument('--stall-timeout', type=float, default=config_values['stall_timeout'], help='Seconds without progress before a slot is restarted')
+    parser.add_argument('--startup-concurrency', type=int, default=config_values['startup_concurrency'], help='Maximum number of slots opening their first video at once, 0 for no limit')
+    parser.add_argument('--startup-budget', type=float, default=config_values['startup_budget'], help='Milliseconds spent creating players per event loop tick at start-up')
+    parser.add_argument('--aspect-window', type=int, default=config_values['aspect_window'], help='Number of upcoming videos compared to find the best fit for a slot shape, 1 to disable')
+    parser.add_argument('--mixed-tiles', action='store_true', help='Add portrait tiles to the grid for the share of portrait videos in the library')
+    parser.add_argument('--log-file', help='Also write the logs to this file, rotated when it gets too large')
+    parser.add_argument('--log-max-size', type=float, default=config_values['log_max_size'], help='Size in MB at which the log file is rotated')
+    parser.add_argument('--log-backups', type=int, default=config_values['log_backups'], help='Number of rotated log files kept')
     parser.add_argument('directories', nargs='*', help='Directories to search for videos')
     args = parser.parse_args()
 
@@ -74,3 +142,32 @@ def setup_config():
 
     globals()['directories'] = config_values['directories']
     _config_initialized = True  # Marquer comme initialisé
+
+# Values set at runtime, outside of config_values, needed by worker processes
+RUNTIME_KEYS = ['app_name', 'platform', 'is_mac', 'is_linux', 'is_windows', 'vlc_lib_path', 'start_time']
+
+def export_config():
+    """
+    Get the current configuration, to apply it in a worker process.
+
+    Returns:
+        dict: The configuration values, including the ones set at runtime.
+    """
+    values = {key: globals().get(key, value) for key, value in config_values.items()}
+    for key in RUNTIME_KEYS:
+        if key in globals():
+            values[key] = globals()[key]
+    return values
+
+def apply_config(values):
+    """
+    Apply a configuration exported by export_config(), instead of parsing the command line.
+
+    Args:
+        values (dict): The configuration values.
+    """
+    global _config_initialized
+    config_values.update(values)
+    for key, value in values.items():
+        globals()[key] = value
+    _config_initialized = True
@@ -0,0 +1,345 @@
+# modules/dedup.py - Collapse duplicate videos found through symlinks, overlapping directories or copies.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+import os
+import time
+import hashlib
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5 import QtCore
+from PyQt5.QtCore import pyqtSignal
+
+import modules.config as config
+import modules.utils as utils   # all functions accessible with utils.function()
+from modules.utils import *     # main functions accessible as function() for ease of use, e.g. log(), error(), exit_with_error()
+from modules import library
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    hash TEXT NOT NULL
+);
+"""
+
+HASH_CHUNK = 64 * 1024  # Bytes read at the beginning and at the end of each file
+
+def partial_hash(path, size):
+    """
+    Compute a cheap content hash from the size and the first and last chunks of a file.
+
+    Args:
+        path (str): The file path.
+        size (int): The file size.
+
+    Returns:
+        str: The hexadecimal hash.
+    """
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, 'rb') as file:
+        digest.update(file.read(HASH_CHUNK))
+        if size > 2 * HASH_CHUNK:
+            file.seek(size - HASH_CHUNK)
+            digest.update(file.read(HASH_CHUNK))
+        elif size > HASH_CHUNK:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+class HashCache:
+    """
+    A persistent cache of partial hashes, keyed by path, size and modification time.
+    """
+
+    def __init__(self, path=None):
+        """
+        Open the cache, stored in the library index database.
+
+        Args:
+            path (str, optional): The database path.
+        """
+        self.connection = library.open_database(path)
+        self.connection.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def get(self, path, stat):
+        """
+        Get the cached hash of a file, if it did not change since it was hashed.
+
+        Args:
+            path (str): The file path.
+            stat (os.stat_result): The current file stat.
+
+        Returns:
+            str: The cached hash, or None.
+        """
+        with self.lock:
+            row = self.connection.execute('SELECT hash FROM hashes WHERE path = ? AND size = ? AND mtime = ?',
+                                          (path, stat.st_size, stat.st_mtime)).fetchone()
+        return row[0] if row else None
+
+    def put(self, path, stat, value):
+        """
+        Store the hash of a file.
+
+        Args:
+            path (str): The file path.
+            stat (os.stat_result): The file stat at hashing time.
+            value (str): The hash.
+        """
+        with self.lock, self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?)',
+                                    (path, stat.st_size, stat.st_mtime, value))
+
+class Deduplicator:
+    """
+    Keep a single path for each distinct video.
+
+    Duplicates are detected in two stages:
+        1. Same device and inode: symlinks, hard links and overlapping directories.
+        2. Same size and same partial hash: copies. Hashes are only computed for
+           files sharing their size with another one, in parallel, and cached.
+
+    The deduplicator is incremental: filter() can be called with successive
+    batches and only returns the videos not seen before. The duplicates are
+    kept aside with the video they duplicate, forget() gives them back when
+    that video is deleted.
+    """
+
+    def __init__(self, workers=None):
+        """
+        Initialize the deduplicator.
+
+        Args:
+            workers (int, optional): The number of threads reading files.
+        """
+        self.workers = workers or min(16, (os.cpu_count() or 1) * 2)
+        self.cache = HashCache()
+        self.lock = threading.Lock()
+        self.accepted = {}                  # path => (identity, size)
+        self.identities = {}                # (device, inode) => accepted path
+        self.by_size = defaultdict(set)     # size => accepted paths
+        self.hashes = {}                    # accepted path => hash, when computed
+        self.contents = {}                  # (size, hash) => accepted path
+        self.rejected = defaultdict(set)    # accepted path => paths of its duplicates
+        self.owners = {}                    # duplicate path => accepted path it duplicates
+        self.duplicates = 0
+
+    def hash(self, path, stat):
+        """
+        Get the partial hash of a file, from the cache when possible.
+
+        Returns:
+            str: The hash, or None if the file cannot be read.
+        """
+        value = self.cache.get(path, stat)
+        if value is None:
+            try:
+                value = partial_hash(path, stat.st_size)
+            except OSError as e:
+                log(f"Cannot read {path}: {e}")
+                return None
+            self.cache.put(path, stat, value)
+        return value
+
+    def filter(self, paths):
+        """
+        Remove the duplicates from a batch of video paths.
+
+        Args:
+            paths (list of str): The video paths.
+
+        Returns:
+            list of str: The paths of the videos not seen before, in the original order.
+        """
+        with self.lock:
+            return self._filter(paths)
+
+    def _filter(self, paths):
+        start = time.monotonic()
+        paths = [path for path in dict.fromkeys(paths) if path not in self.accepted]
+        if not paths:
+            return []
+
+        def stat(path):
+            try:
+                return os.stat(path)
+            except OSError:
+                # Broken symlink or file deleted meanwhile
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            stats = dict(zip(paths, pool.map(stat, paths)))
+
+            # Stage 1: same file reached through different paths
+            candidates = []
+            identities = {}
+            same_file = {}  # duplicate path => candidate path, of the same file
+            for path in paths:
+                file_stat = stats[path]
+                if file_stat is None:
+                    continue
+                identity = (file_stat.st_dev, file_stat.st_ino)
+                if identity in self.identities:
+                    self.reject(path, self.identities[identity])
+                    continue
+                if identity in identities:
+                    same_file[path] = identities[identity]
+                    continue
+                identities[identity] = path
+                candidates.append(path)
+
+            # Stage 2: same content, only for sizes seen more than once
+            sizes = defaultdict(list)
+            for path in candidates:
+                sizes[stats[path].st_size].append(path)
+            to_hash = []
+            for size, group in sizes.items():
+                if len(group) > 1 or self.by_size.get(size):
+                    to_hash.extend((path, stats[path]) for path in group)
+                    # Accepted files of the same size were not hashed yet if they were alone
+                    for path in self.by_size.get(size, ()):
+                        file_stat = stat(path) if path not in self.hashes else None
+                        if file_stat is not None:
+                            to_hash.append((path, file_stat))
+            hashes = dict(zip((path for path, _ in to_hash), pool.map(lambda item: self.hash(*item), to_hash)))
+
+        for path, value in hashes.items():
+            if path in self.accepted and value is not None:
+                self.hashes[path] = value
+                self.contents[(self.accepted[path][1], value)] = path
+
+        unique = []
+        for path in candidates:
+            size = stats[path].st_size
+            value = hashes.get(path)
+            if value is not None:
+                if (size, value) in self.contents:
+                    self.reject(path, self.contents[(size, value)])
+                    continue
+                self.hashes[path] = value
+                self.contents[(size, value)] = path
+            identity = (stats[path].st_dev, stats[path].st_ino)
+            self.accepted[path] = (identity, size)
+            self.identities[identity] = path
+            self.by_size[size].add(path)
+            unique.append(path)
+
+        # A candidate of the same file may itself be a copy of an accepted video
+        for path, candidate in same_file.items():
+            self.reject(path, candidate if candidate in self.accepted else self.owners[candidate])
+
+        if len(unique) < len(paths):
+            log(f"Deduplicated {len(paths)} video(s) to {len(unique)} in {time.monotonic() - start:.3f}s, {len(hashes)} hashed")
+        return unique
+
+    def reject(self, path, owner):
+        """
+        Keep a duplicate aside with the accepted video it duplicates.
+
+        Args:
+            path (str): The duplicate path.
+            owner (str): The accepted path.
+        """
+        previous = self.owners.get(path)
+        if previous is not None:
+            self.rejected[previous].discard(path)
+        self.owners[path] = owner
+        self.rejected[owner].add(path)
+        self.duplicates += 1
+
+    def forget(self, paths):
+        """
+        Forget deleted videos. The duplicates of a deleted video are given back,
+        to be filtered again, so one of them can replace it.
+
+        Args:
+            paths (list of str): The video paths.
+
+        Returns:
+            list of str: The duplicates of the deleted videos, not deleted themselves.
+        """
+        with self.lock:
+            deleted = set(paths)
+            restored = set()
+            for path in deleted:
+                owner = self.owners.pop(path, None)
+                if owner is not None:
+                    self.rejected[owner].discard(path)
+                    continue
+                if path not in self.accepted:
+                    continue
+                identity, size = self.accepted.pop(path)
+                self.identities.pop(identity, None)
+                self.by_size[size].discard(path)
+                value = self.hashes.pop(path, None)
+                if value is not None:
+                    self.contents.pop((size, value), None)
+                for duplicate in self.rejected.pop(path, ()):
+                    del self.owners[duplicate]
+                    restored.add(duplicate)
+            return sorted(restored - deleted)
+
+class DedupWorker(QtCore.QObject):
+    """
+    Run the deduplicator in a background thread for the videos added or removed while playing.
+
+    Hashing the copies of a batch of new videos can take a while on a slow
+    drive, the Qt thread only gets the result. Batches are handled one at a
+    time, in the order they were received.
+
+    Attributes:
+        videos_added (pyqtSignal): Emitted in the main thread with the new videos that are not duplicates.
+    """
+
+    videos_added = pyqtSignal(list)
+
+    def __init__(self, deduplicator, parent=None):
+        """
+        Initialize the worker.
+
+        Args:
+            deduplicator (Deduplicator): The deduplicator used for discovery.
+            parent (QObject, optional): The parent object.
+        """
+        super(DedupWorker, self).__init__(parent)
+        self.deduplicator = deduplicator
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dedup')
+
+    def add(self, paths):
+        """
+        Deduplicate new videos, the unique ones are emitted with videos_added.
+
+        Args:
+            paths (list of str): The video paths.
+        """
+        self.executor.submit(self.run_add, paths)
+
+    def remove(self, paths):
+        """
+        Forget deleted videos, their duplicates are filtered again and the one
+        replacing each deleted video is emitted with videos_added.
+
+        Args:
+            paths (list of str): The video paths.
+        """
+        self.executor.submit(self.run_remove, paths)
+
+    def run_add(self, paths):
+        """
+        Worker thread side of add().
+        """
+        unique = self.deduplicator.filter(paths)
+        if unique:
+            self.videos_added.emit(unique)
+
+    def run_remove(self, paths):
+        """
+        Worker thread side of remove().
+        """
+        restored = self.deduplicator.forget(paths)
+        if restored:
+            self.run_add(restored)
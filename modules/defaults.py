@@ -7,6 +7,25 @@
 verbose = False     # Default value for verbose mode
 volume = 50         # Default value for the volume level
 panscan = 0         # Default value for the panscan value (crop video)
+scan_workers = None # Default number of directory scanner threads (None = automatic)
+watch_interval = 60 # Default polling interval in seconds for the directory watcher
+probe_workers = 2   # Default number of media probing threads
+vlc_instances = 1   # Default number of shared libvlc instances (0 = one per player)
+decoder_profile = 'auto'    # Default decoder profile (auto, full, medium or low)
+decoder_threads = None      # Default total decoder threads (None = number of CPU cores)
+reshow_interval = 600       # Default minimum seconds before a video is shown again
+proxy_bitrate = 20          # Default bitrate in Mbit/s above which a video needs a proxy
+proxy_height = 1080         # Default height in pixels above which a video needs a proxy
+proxy_cache_size = 10       # Default maximum proxy cache size in GB
+proxy_workers = 1           # Default number of concurrent proxy transcodes
+compositor_fps = 25         # Default refresh rate of the compositor surface
+stats_interval = 5          # Default seconds between two polls of the playback statistics
+stall_timeout = 30          # Default seconds without progress before a slot is restarted
+startup_concurrency = 4     # Default maximum number of slots opening their first video at once
+startup_budget = 20         # Default milliseconds spent creating players per event loop tick at start-up
+aspect_window = 8           # Default number of upcoming videos compared to find the best fit for a slot shape
+log_max_size = 10           # Default size in MB at which the log file is rotated
+log_backups = 3             # Default number of rotated log files kept
 
 platform = None     # Initial value for the platform name
 is_mac = False      # Initial value for macOS platform
@@ -14,3 +33,4 @@ is_linux = False    # Initial value for Linux platform
 is_windows = False  # Initial value for Windows platform
 
 vlc_lib_path = None # Initial value for the VLC library path
+start_time = None   # Application start time (time.monotonic()), set at startup
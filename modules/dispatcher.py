@@ -0,0 +1,331 @@
+# modules/dispatcher.py - Wall-wide dispatcher handing out the next video to each slot.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+import math
+import time
+import random
+from collections import deque
+
+import modules.config as config
+import modules.utils as utils   # all functions accessible with utils.function()
+from modules.utils import *     # main functions accessible as function() for ease of use, e.g. log(), error(), exit_with_error()
+
+UNKNOWN_MISMATCH = 0.4  # Mismatch of a video not probed yet, worse than 16:9 in a 4:3 slot, better than portrait in landscape
+
+def aspect_mismatch(video_aspect, slot_aspect):
+    """
+    Measure how badly a video fits a slot.
+
+    Args:
+        video_aspect (float): The video width / height ratio, None if unknown.
+        slot_aspect (float): The slot width / height ratio.
+
+    Returns:
+        float: The absolute log ratio of the aspects, 0 for a perfect fit, symmetric
+            for letterboxing and cropping, rounded so close aspects keep the shuffle order.
+    """
+    if not video_aspect or not slot_aspect:
+        return UNKNOWN_MISMATCH
+    return round(abs(math.log(video_aspect / slot_aspect)), 1)
+
+class Dispatcher:
+    """
+    Hand out videos to the slots of the wall, one at a time.
+
+    Every slot asks the dispatcher for its next video instead of looping over
+    its own slice of the library, so the whole library is shown before any
+    video comes back. Videos go through three states:
+
+        ready:   shuffled FIFO of videos that can be played now
+        playing: videos currently opened by a slot, never handed out twice
+        cooling: FIFO of released videos, back to ready after the re-show interval
+
+    When a slot gives its aspect ratio, it gets the video of the best matching
+    shape among the first videos of the ready queue (the match window), so
+    portrait clips go to portrait tiles rather than being cropped or
+    letterboxed in landscape ones. The window is short, a video that fits no
+    slot is handed out anyway once it reaches the front.
+
+    All operations are O(1) (O(window) with aspect matching), except add() which
+    is linear in the number of new videos. Removed videos are not searched for
+    in the queues, their stale entries are skipped when they reach the front
+    (lazy deletion).
+
+    Attributes:
+        interval (float): The minimum number of seconds before a video is shown again.
+        window (int): The number of ready videos compared for aspect matching, 1 to disable it.
+    """
+
+    def __init__(self, video_paths=(), interval=None, window=None):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            video_paths (list of str): The initial videos, shuffled.
+            interval (float, optional): The minimum re-show interval in seconds,
+                defaults to config.reshow_interval.
+            window (int, optional): The aspect match window, defaults to config.aspect_window.
+        """
+        if interval is None:
+            interval = getattr(config, 'reshow_interval', None) or 0
+        if window is None:
+            window = getattr(config, 'aspect_window', None) or 1
+        self.interval = interval
+        self.window = max(1, window)
+        self.aspects = {}       # path => width / height, for the probed videos
+        self.paths = {}         # path => generation, only for videos still in the library
+        self.generation = 0
+        self.ready = deque()    # (path, generation)
+        self.cooling = deque()  # (available_at, path, generation)
+        self.playing = {}       # path => slot index
+        self.short_warned = False
+        self.add(video_paths)
+
+    def __len__(self):
+        """
+        The number of videos in the library.
+        """
+        return len(self.paths)
+
+    def __contains__(self, path):
+        return path in self.paths
+
+    def is_live(self, path, generation):
+        """
+        Check if a queue entry still refers to a video of the library.
+        """
+        return self.paths.get(path) == generation
+
+    def add(self, video_paths):
+        """
+        Add videos to the library, they are handed out before the ones already waiting.
+
+        Args:
+            video_paths (list of str): The video paths, already known ones are ignored.
+
+        Returns:
+            list of str: The videos actually added.
+        """
+        new_paths = [path for path in dict.fromkeys(video_paths) if path not in self.paths]
+        random.shuffle(new_paths)
+        for path in new_paths:
+            self.generation += 1
+            self.paths[path] = self.generation
+            self.ready.appendleft((path, self.generation))
+        return new_paths
+
+    def remove(self, video_paths):
+        """
+        Remove videos from the library. A playing video is not interrupted, but
+        it is not handed out again once released.
+
+        Args:
+            video_paths (collection of str): The video paths.
+
+        Returns:
+            set of str: The videos actually removed.
+        """
+        removed = {path for path in video_paths if path in self.paths}
+        for path in removed:
+            del self.paths[path]
+            self.aspects.pop(path, None)
+        return removed
+
+    def set_aspect(self, path, width, height):
+        """
+        Record the displayed size of a probed video, for aspect matching.
+
+        Args:
+            path (str): The video path.
+            width (int): The displayed width in pixels.
+            height (int): The displayed height in pixels.
+        """
+        if path in self.paths and width and height:
+            self.aspects[path] = width / height
+
+    def acquire(self, slot_index, aspect=None):
+        """
+        Take the next video for a slot.
+
+        When every video is either playing or cooling down, the one released the
+        longest time ago is used anyway, a short repeat is better than a black slot.
+
+        Args:
+            slot_index (int): The index of the slot asking for a video.
+            aspect (float, optional): The slot width / height ratio, to pick a video of a similar shape.
+
+        Returns:
+            str: The video path, or None if no video is available.
+        """
+        now = time.monotonic()
+        while self.cooling and self.cooling[0][0] <= now:
+            _, path, generation = self.cooling.popleft()
+            self.ready.append((path, generation))
+
+        if aspect and self.window > 1:
+            path = self.acquire_matching(slot_index, aspect)
+            if path is not None:
+                return path
+
+        for queue, fallback in ((self.ready, False), (self.cooling, True)):
+            while queue:
+                entry = queue.popleft()
+                path, generation = entry[-2:]
+                if not self.is_live(path, generation) or path in self.playing:
+                    continue
+                if fallback and not self.short_warned:
+                    log(f"Not enough videos for a {self.interval}s re-show interval, some videos are shown again earlier")
+                    self.short_warned = True
+                self.playing[path] = slot_index
+                return path
+        return None
+
+    def acquire_matching(self, slot_index, aspect):
+        """
+        Take the ready video fitting a slot best, among the first ones of the queue.
+
+        Args:
+            slot_index (int): The index of the slot asking for a video.
+            aspect (float): The slot width / height ratio.
+
+        Returns:
+            str: The video path, or None if no video is ready.
+        """
+        candidates = []
+        while self.ready and len(candidates) < self.window:
+            entry = self.ready.popleft()
+            path, generation = entry
+            if not self.is_live(path, generation) or path in self.playing:
+                continue
+            candidates.append(entry)
+        if not candidates:
+            return None
+
+        # The oldest of the best fitting videos, the others go back in front in the same order
+        best = min(range(len(candidates)), key=lambda index: aspect_mismatch(self.aspects.get(candidates[index][0]), aspect))
+        path, _ = candidates.pop(best)
+        self.ready.extendleft(reversed(candidates))
+        self.playing[path] = slot_index
+        return path
+
+    def release(self, slot_index, path):
+        """
+        Give back a video once a slot stopped playing it.
+
+        Args:
+            slot_index (int): The index of the slot.
+            path (str): The video path.
+        """
+        if self.playing.get(path) != slot_index:
+            return
+        del self.playing[path]
+        generation = self.paths.get(path)
+        if generation is not None:
+            self.cooling.append((time.monotonic() + self.interval, path, generation))
+
+class LoopDispatcher:
+    """
+    Hand out videos from fixed per-slot plans, for single-loop mode.
+
+    Each slot loops over its own plan, built by planner.plan_single_loop(), so
+    the whole set is shown once per loop and the slots finish their loops at
+    nearly the same time. Plans are disjoint, a video never plays on two slots.
+    Same interface as Dispatcher.
+    """
+
+    def __init__(self, plans, loads=None):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            plans (list of lists): The video paths of each slot, in playing order.
+            loads (list of float, optional): The loop duration of each slot, to place new videos.
+        """
+        self.plans = [list(plan) for plan in plans]
+        self.loads = list(loads) if loads is not None else [float(len(plan)) for plan in self.plans]
+        self.positions = [0] * len(self.plans)
+        self.paths = {path: index for index, plan in enumerate(self.plans) for path in plan}
+
+    def __len__(self):
+        """
+        The number of videos in the plans.
+        """
+        return len(self.paths)
+
+    def __contains__(self, path):
+        return path in self.paths
+
+    def add(self, video_paths):
+        """
+        Add videos at the end of the shortest loops.
+
+        Their durations are not known yet, each one is counted as the average
+        video duration of the slot it is given to.
+
+        Args:
+            video_paths (list of str): The video paths, already known ones are ignored.
+
+        Returns:
+            list of str: The videos actually added.
+        """
+        new_paths = [path for path in dict.fromkeys(video_paths) if path not in self.paths]
+        if not self.plans:
+            return []
+        for path in new_paths:
+            index = min(range(len(self.plans)), key=lambda index: self.loads[index])
+            plan = self.plans[index]
+            self.loads[index] += self.loads[index] / len(plan) if plan else 1
+            plan.append(path)
+            self.paths[path] = index
+        return new_paths
+
+    def remove(self, video_paths):
+        """
+        Remove videos from the plans, their entries are dropped when they are reached.
+
+        Args:
+            video_paths (collection of str): The video paths.
+
+        Returns:
+            set of str: The videos actually removed.
+        """
+        removed = {path for path in video_paths if path in self.paths}
+        for path in removed:
+            del self.paths[path]
+        return removed
+
+    def set_aspect(self, path, width, height):
+        """
+        Nothing to do, the plans are fixed.
+        """
+
+    def acquire(self, slot_index, aspect=None):
+        """
+        Take the next video of a slot plan, in a loop.
+
+        Args:
+            slot_index (int): The index of the slot asking for a video.
+            aspect (float, optional): Ignored, the plans are fixed.
+
+        Returns:
+            str: The video path, or None if the slot plan is empty.
+        """
+        if slot_index >= len(self.plans):
+            return None
+        plan = self.plans[slot_index]
+        while plan:
+            position = self.positions[slot_index] % len(plan)
+            path = plan[position]
+            if self.paths.get(path) != slot_index:
+                del plan[position]
+                continue
+            self.positions[slot_index] = position + 1
+            return path
+        return None
+
+    def release(self, slot_index, path):
+        """
+        Nothing to do, the video stays in its slot plan.
+        """
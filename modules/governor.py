@@ -0,0 +1,175 @@
+# modules/governor.py - Adaptive quality governor, trading slot quality for smooth playback under load.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+import os
+from PyQt5 import QtCore
+
+import modules.config as config
+import modules.utils as utils   # all functions accessible with utils.function()
+from modules.utils import *     # main functions accessible as function() for ease of use, e.g. log(), error(), exit_with_error()
+
+# Quality levels, from the best to the cheapest
+LEVELS = ['auto', 'medium', 'low', 'low-fps', 'proxy', 'paused']
+
+LOSS_HIGH = 0.05        # Lost frame ratio of a slot above which the wall is overloaded
+LOSS_LOW = 0.01         # Lost frame ratio of every slot below which there is headroom
+LOAD_HIGH = 1.0         # System load per core above which the wall is overloaded
+LOAD_LOW = 0.7          # System load per core below which there is headroom
+DOWN_INTERVALS = 2      # Overloaded statistics intervals in a row before stepping a slot down
+UP_INTERVALS = 6        # Intervals with headroom in a row before stepping a slot back up
+REDUCED_FPS = 12        # Frame rate of the low-fps level
+
+def system_load():
+    """
+    Get the system load per core.
+
+    Returns:
+        float: The 1 minute load average divided by the number of cores, or None if not available.
+    """
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        # Not available on Windows
+        return None
+
+class Governor(QtCore.QObject):
+    """
+    Step slots down to cheaper playback when frames are lost, and back up when there is headroom.
+
+    The governor watches the per-slot lost frame ratios reported by Metrics and
+    the system load. When the wall is overloaded, the slot losing the most
+    frames goes one level down: forced medium then low decoder profile, reduced
+    frame rate, proxy (with --proxy), and as a last resort paused. Once every
+    slot plays smoothly again for a while, the most degraded slot goes one level
+    back up. One slot changes at a time, so the effect of each decision can be
+    measured before the next one. Every decision is logged.
+    """
+
+    def __init__(self, wall, metrics, parent=None):
+        """
+        Initialize the governor.
+
+        Args:
+            wall (Wall): The wall whose players are governed.
+            metrics (Metrics): The statistics of the players.
+            parent (QObject, optional): The parent object.
+        """
+        super(Governor, self).__init__(parent)
+        self.wall = wall
+        self.levels = {}    # slot index => index in LEVELS, only for degraded slots
+        self.history = []   # slot indexes, in the order they were stepped down
+        self.pressure = 0
+        self.headroom = 0
+        self.available_levels = [level for level in LEVELS if level != 'proxy' or getattr(wall, 'proxy', None) is not None]
+        metrics.updated.connect(self.on_stats)
+        log(f"Quality governor enabled, levels: {', '.join(self.available_levels)}")
+
+    def player(self, slot_index):
+        """
+        Get the player of a slot.
+        """
+        for player in self.wall.players:
+            if player.slot_index == slot_index:
+                return player
+        return None
+
+    def on_stats(self, deltas):
+        """
+        Decide whether a slot must change level, after each statistics poll.
+
+        Args:
+            deltas (dict): The per-slot frame counts of the last interval, see Metrics.updated.
+        """
+        losses = {}
+        for slot_index, delta in deltas.items():
+            shown = delta['displayed'] + delta['lost']
+            if shown:
+                losses[slot_index] = delta['lost'] / shown
+        load = system_load()
+        worst = max(losses.values(), default=0)
+
+        if worst > LOSS_HIGH or (load is not None and load > LOAD_HIGH):
+            self.headroom = 0
+            self.pressure += 1
+            if self.pressure >= DOWN_INTERVALS:
+                self.pressure = 0
+                self.step_down(losses, deltas, load)
+        elif worst < LOSS_LOW and (load is None or load < LOAD_LOW):
+            self.pressure = 0
+            self.headroom += 1
+            if self.headroom >= UP_INTERVALS and self.history:
+                self.headroom = 0
+                self.step_up(load)
+        else:
+            self.pressure = 0
+            self.headroom = 0
+
+    def step_down(self, losses, deltas, load):
+        """
+        Move the slot losing the most frames one level down.
+        Without frame loss (high system load only), the slot decoding the most frames is chosen.
+        """
+        last = len(self.available_levels) - 1
+        candidates = [slot_index for slot_index in deltas if self.levels.get(slot_index, 0) < last]
+        if not candidates:
+            log('warning', f"Governor: wall overloaded (load {self.format_load(load)}), all slots already at the lowest level")
+            return
+        if any(losses.get(slot_index) for slot_index in candidates):
+            slot_index = max(candidates, key=lambda slot_index: losses.get(slot_index, 0))
+        else:
+            slot_index = max(candidates, key=lambda slot_index: deltas[slot_index]['decoded'])
+        level = self.levels.get(slot_index, 0) + 1
+        reason = f"lost {losses.get(slot_index, 0) * 100:.1f}% frames, load {self.format_load(load)}"
+        if self.apply(slot_index, level, reason):
+            self.history.append(slot_index)
+
+    def step_up(self, load):
+        """
+        Move the most recently degraded slot one level back up.
+        """
+        slot_index = self.history.pop()
+        level = self.levels.get(slot_index, 0) - 1
+        if not self.apply(slot_index, level, f"headroom, load {self.format_load(load)}"):
+            # The slot is gone, e.g. with its screen
+            self.levels.pop(slot_index, None)
+
+    def apply(self, slot_index, level, reason):
+        """
+        Apply a quality level to a slot.
+
+        Args:
+            slot_index (int): The slot index.
+            level (int): The index of the level in available_levels.
+            reason (str): Why the level changes, for the logs.
+
+        Returns:
+            bool: True if the level was applied, False if the slot has no player.
+        """
+        player = self.player(slot_index)
+        if player is None:
+            return False
+        previous = self.available_levels[self.levels.get(slot_index, 0)]
+        name = self.available_levels[level]
+        if level:
+            self.levels[slot_index] = level
+        else:
+            self.levels.pop(slot_index, None)
+        log('warning', f"Governor: slot {slot_index} {previous} -> {name} ({reason})")
+
+        if name == 'paused':
+            player.suspend()
+            return True
+        if previous == 'paused':
+            player.resume()
+
+        level_index = LEVELS.index(name)
+        player.profile_override = None if name == 'auto' else ('medium' if name == 'medium' else 'low')
+        player.extra_options = [':video-filter=fps', f':fps-fps={REDUCED_FPS}'] if level_index >= LEVELS.index('low-fps') else []
+        player.force_proxy = level_index >= LEVELS.index('proxy')
+        player.reload()
+        return True
+
+    def format_load(self, load):
+        return 'n/a' if load is None else f"{load:.2f}"
@@ -0,0 +1,211 @@
+# modules/metrics.py - Playback statistics of the players, logged and exported in Prometheus format.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from PyQt5 import QtCore
+from PyQt5.QtCore import pyqtSignal
+import vlc
+
+import modules.config as config
+import modules.utils as utils   # all functions accessible with utils.function()
+from modules.utils import *     # main functions accessible as function() for ease of use, e.g. log(), error(), exit_with_error()
+
+# Cumulative libvlc counters, summed over the videos played by a slot: (stats field, metric name, help)
+COUNTERS = [
+    ('decoded_video', 'decoded_frames_total', 'Video frames decoded'),
+    ('displayed_pictures', 'displayed_frames_total', 'Video frames displayed'),
+    ('lost_pictures', 'lost_frames_total', 'Video frames lost (decoded too late or dropped)'),
+    ('read_bytes', 'read_bytes_total', 'Bytes read from the files'),
+    ('demux_corrupted', 'demux_corrupted_total', 'Corrupted packets found by the demuxer'),
+]
+
+# Instant libvlc values: (stats field, metric name, help, factor)
+GAUGES = [
+    # libvlc reports bitrates in bytes per microsecond
+    ('demux_bitrate', 'demux_bitrate_bytes', 'Demux bitrate in bytes per second', 1000000),
+    ('input_bitrate', 'input_bitrate_bytes', 'Input bitrate in bytes per second', 1000000),
+]
+
+class Metrics(QtCore.QObject):
+    """
+    Poll the libvlc statistics of every player with a single timer.
+
+    libvlc counters restart with each video, they are accumulated per slot so
+    the exported counters only grow. Values are aggregated per slot and per
+    screen, logged as one summary line and, if a port is configured, served in
+    Prometheus text format on localhost.
+
+    Attributes:
+        updated (pyqtSignal): Emitted after each poll with the per-slot values of the last interval,
+            {slot_index: {'decoded': int, 'displayed': int, 'lost': int, 'interval': float}}.
+        slots (dict): The cumulated values of each slot.
+    """
+
+    updated = pyqtSignal(dict)
+
+    def __init__(self, wall, interval=None, port=None, parent=None):
+        """
+        Initialize the metrics and start polling.
+
+        Args:
+            wall (Wall): The wall whose players are polled.
+            interval (float, optional): Seconds between two polls, defaults to config.stats_interval.
+            port (int, optional): The localhost HTTP port of the metrics endpoint, defaults to config.metrics_port.
+        """
+        super(Metrics, self).__init__(parent)
+        self.wall = wall
+        self.interval = interval or config.stats_interval or 5
+        self.port = port or config.metrics_port
+        self.stats = vlc.MediaStats()   # Reused for every poll
+        self.previous = {}              # slot index => (player, media path, last raw values)
+        self.slots = {}                 # slot index => cumulated values
+        self.text = ''
+        self.server = None
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.poll)
+        self.timer.start(int(self.interval * 1000))
+
+        if self.port:
+            self.start_server()
+
+    def read_stats(self, player):
+        """
+        Read the libvlc statistics of the current video of a player.
+
+        Args:
+            player (VideoPlayer): The player.
+
+        Returns:
+            dict: The raw values, or None if no statistics are available.
+        """
+        if not player.players or player.video_path is None:
+            return None
+        media = player.player.get_media()
+        if media is None or not media.get_stats(self.stats):
+            return None
+        return {field: getattr(self.stats, field) for field, _, _ in COUNTERS} | \
+            {field: getattr(self.stats, field) for field, _, _, _ in GAUGES}
+
+    def poll(self):
+        """
+        Read the statistics of all the players, update the counters and the exported text.
+        """
+        deltas = {}
+        for player in self.wall.players:
+            slot_index = player.slot_index
+            values = self.read_stats(player)
+            if values is None:
+                continue
+            key = (player.active, player.video_path)
+            previous = self.previous.get(slot_index)
+            slot = self.slots.setdefault(slot_index, {field: 0 for field, _, _ in COUNTERS})
+
+            delta = {}
+            for field, _, _ in COUNTERS:
+                if previous is not None and previous[0] == key:
+                    # Same video, counters only grow
+                    delta[field] = max(0, values[field] - previous[1][field])
+                else:
+                    delta[field] = values[field]
+                slot[field] += delta[field]
+            for field, _, _, factor in GAUGES:
+                slot[field] = values[field] * factor
+            self.previous[slot_index] = (key, values)
+            deltas[slot_index] = {
+                'decoded': delta['decoded_video'],
+                'displayed': delta['displayed_pictures'],
+                'lost': delta['lost_pictures'],
+                'interval': self.interval,
+            }
+
+        self.text = self.render()
+        if deltas:
+            decoded = sum(delta['decoded'] for delta in deltas.values())
+            displayed = sum(delta['displayed'] for delta in deltas.values())
+            lost = sum(delta['lost'] for delta in deltas.values())
+            worst = max(deltas, key=lambda slot_index: deltas[slot_index]['lost'])
+            log(f"Stats over {self.interval}s: {len(deltas)} slot(s), {decoded} decoded, {displayed} displayed, {lost} lost frames"
+                + (f", worst slot {worst} with {deltas[worst]['lost']} lost" if lost else ""))
+        self.updated.emit(deltas)
+
+    def screen_of(self, slot_index):
+        """
+        Get the screen index of a slot.
+        """
+        slots = self.wall.slots
+        return slots[slot_index][0] if slot_index < len(slots) else 0
+
+    def slot_label(self, slot_index):
+        """
+        Get the Prometheus labels of a slot.
+        """
+        return f'slot="{slot_index}",screen="{self.screen_of(slot_index)}"'
+
+    def render(self):
+        """
+        Render the metrics in Prometheus text format.
+
+        Returns:
+            str: The metrics.
+        """
+        screens = {}
+        for slot_index, slot in self.slots.items():
+            screen = screens.setdefault(self.screen_of(slot_index), {})
+            for field, value in slot.items():
+                screen[field] = screen.get(field, 0) + value
+
+        lines = []
+        for scope, values, label in (('slot', self.slots, self.slot_label),
+                                     ('screen', screens, lambda index: f'screen="{index}"')):
+            for field, name, description in COUNTERS:
+                lines.append(f"# HELP walloli_{scope}_{name} {description}, per {scope}.")
+                lines.append(f"# TYPE walloli_{scope}_{name} counter")
+                for index in sorted(values):
+                    lines.append(f"walloli_{scope}_{name}{{{label(index)}}} {values[index].get(field, 0)}")
+            for field, name, description, _ in GAUGES:
+                lines.append(f"# HELP walloli_{scope}_{name} {description}, per {scope}.")
+                lines.append(f"# TYPE walloli_{scope}_{name} gauge")
+                for index in sorted(values):
+                    lines.append(f"walloli_{scope}_{name}{{{label(index)}}} {values[index].get(field, 0):.0f}")
+
+        # Restarts of stalled slots by the watchdog
+        lines.append("# HELP walloli_slot_recoveries_total Restarts of the slot after its playback stalled.")
+        lines.append("# TYPE walloli_slot_recoveries_total counter")
+        for player in self.wall.players:
+            lines.append(f"walloli_slot_recoveries_total{{{self.slot_label(player.slot_index)}}} {player.recoveries}")
+        return '\n'.join(lines) + '\n'
+
+    def start_server(self):
+        """
+        Serve the metrics on localhost, in a background thread.
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = metrics.text.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Keep the console for the application logs
+                pass
+
+        try:
+            self.server = ThreadingHTTPServer(('127.0.0.1', self.port), Handler)
+        except OSError as e:
+            log('error', f"Cannot serve metrics on port {self.port}: {e}")
+            return
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name='metrics', daemon=True).start()
+        log(f"Metrics served on http://127.0.0.1:{self.port}/metrics")
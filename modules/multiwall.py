@@ -0,0 +1,374 @@
+# modules/multiwall.py - Multi-process wall, one worker process per screen under a supervisor.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+import os
+import sys
+import time
+import heapq
+import random
+import multiprocessing
+from collections import deque
+from PyQt5 import QtWidgets, QtCore
+
+import modules.config as config
+import modules.utils as utils   # all functions accessible with utils.function()
+from modules.utils import *     # main functions accessible as function() for ease of use, e.g. log(), error(), exit_with_error()
+
+MONITOR_INTERVAL = 500  # Milliseconds between two checks of the workers by the supervisor
+POLL_INTERVAL = 100     # Milliseconds between two checks of the supervisor messages by a worker
+STATUS_INTERVAL = 5000  # Milliseconds between two status reports of a worker
+RESTART_DELAY = 2       # Seconds before restarting a crashed worker
+RESTART_WINDOW = 60     # A worker crashing MAX_RESTARTS times within this number of seconds is not restarted
+MAX_RESTARTS = 5
+
+def run_worker(index, screen, slots, playlist, plans, values, connection):
+    """
+    Worker process entry point, run the wall of a single screen.
+
+    Args:
+        index (int): The worker index, the index of its screen on the wall.
+        screen (tuple): The screen (resolution, x, y).
+        slots (list of tuples): The slots of the screen, with screen index 0.
+        playlist (list of str): The videos handed out to this worker.
+        plans (list of lists): The fixed per-slot plans in single-loop mode, None otherwise.
+        values (dict): The configuration exported by the supervisor.
+        connection (multiprocessing.connection.Connection): The pipe to the supervisor.
+    """
+    config.apply_config(values)
+    if config.log_file:
+        # One log file per worker, a rotating file cannot be shared between processes
+        root, extension = os.path.splitext(config.log_file)
+        config.log_file = f"{root}-screen{index}{extension}"
+    utils.setup_logging()
+
+    # Imported here, the supervisor process does not need the players
+    from modules.wall import Wall
+    from modules.probe import Prober
+    from modules.dispatcher import LoopDispatcher
+
+    app = QtWidgets.QApplication(sys.argv[:1])
+    app.setApplicationName(config.app_name)
+    log(f"Worker {index} started for screen {screen}")
+
+    prober = None if config.no_probe else Prober(config.probe_workers)
+    dispatcher = LoopDispatcher(plans) if plans is not None else None
+    wall = Wall([screen], slots, playlist, prober=prober, dispatcher=dispatcher)
+    link = WorkerLink(index, wall, connection)
+    link.send('ready', len(wall.slots))
+    sys.exit(app.exec_())
+
+class WorkerLink(QtCore.QObject):
+    """
+    The worker end of the pipe: receive the supervisor commands and report the wall status.
+    """
+
+    def __init__(self, index, wall, connection, parent=None):
+        """
+        Initialize the link and start its timers.
+
+        Args:
+            index (int): The worker index.
+            wall (Wall): The wall of the worker.
+            connection (multiprocessing.connection.Connection): The pipe to the supervisor.
+            parent (QObject, optional): The parent object.
+        """
+        super(WorkerLink, self).__init__(parent)
+        self.index = index
+        self.wall = wall
+        self.connection = connection
+
+        self.poll_timer = QtCore.QTimer(self)
+        self.poll_timer.timeout.connect(self.receive)
+        self.poll_timer.start(POLL_INTERVAL)
+        self.status_timer = QtCore.QTimer(self)
+        self.status_timer.timeout.connect(self.send_status)
+        self.status_timer.start(STATUS_INTERVAL)
+
+    def send(self, kind, payload=None):
+        """
+        Send a message to the supervisor.
+
+        Args:
+            kind (str): The message type.
+            payload: The message content, picklable.
+        """
+        try:
+            self.connection.send((kind, payload))
+        except (OSError, ValueError):
+            # The supervisor is gone
+            QtWidgets.QApplication.quit()
+
+    def receive(self):
+        """
+        Process the pending commands of the supervisor.
+        """
+        try:
+            while self.connection.poll():
+                kind, payload = self.connection.recv()
+                if kind == 'add':
+                    self.wall.add_videos(payload)
+                elif kind == 'remove':
+                    self.wall.remove_videos(payload)
+                elif kind == 'quit':
+                    QtWidgets.QApplication.quit()
+                    return
+        except (EOFError, OSError):
+            log(f"Worker {self.index} lost its supervisor, exiting")
+            QtWidgets.QApplication.quit()
+
+    def send_status(self):
+        """
+        Report the state of the wall to the supervisor.
+        """
+        players = self.wall.players
+        self.send('status', {
+            'players': len(players),
+            'playing': sum(1 for player in players if player.video_path is not None),
+            'started': len(self.wall.started_slots),
+            'videos': len(self.wall.dispatcher),
+            'recoveries': sum(player.recoveries for player in players),
+            'rss': utils.get_rss(),
+        })
+
+class Worker:
+    """
+    A worker process of the supervisor, and what it needs to be restarted.
+    """
+
+    def __init__(self, index, screen, slots, plans=None):
+        self.index = index
+        self.screen = screen
+        self.slots = slots
+        self.plans = plans
+        self.playlist = []
+        self.process = None
+        self.connection = None
+        self.status = None
+        self.restarts = deque()
+        self.restart_at = None
+        self.finished = False
+
+class Supervisor(QtCore.QObject):
+    """
+    Run the wall in one worker process per screen.
+
+    Each worker owns the windows and players of its screen, so the players of
+    different screens do not share a GIL, and a libvlc crash only takes down
+    one screen. The supervisor splits the videos between the workers, forwards
+    the videos added or removed while playing, collects their status over a
+    pipe and restarts the workers that crashed.
+    Same add_videos() and remove_videos() interface as Wall.
+    """
+
+    def __init__(self, screens, slots, video_paths, plans=None, parent=None):
+        """
+        Initialize the supervisor.
+
+        Args:
+            screens (list of tuples): List of screen resolutions and positions.
+            slots (list of tuples): List of slots, (screen_index, slot_x, slot_y, slot_width, slot_height).
+            video_paths (list of str): List of video paths to play.
+            plans (list of lists, optional): The fixed per-slot plans in single-loop mode.
+            parent (QObject, optional): The parent object.
+        """
+        super(Supervisor, self).__init__(parent)
+        self.context = multiprocessing.get_context('spawn')
+        self.known_paths = set(video_paths)
+        self.workers = []
+        slot_index = 0
+        for screen_index, screen in enumerate(screens):
+            screen_slots = []
+            screen_plans = [] if plans is not None else None
+            for slot in slots:
+                if slot[0] != screen_index:
+                    continue
+                screen_slots.append((0,) + tuple(slot[1:]))
+                if plans is not None:
+                    screen_plans.append(plans[slot_index] if slot_index < len(plans) else [])
+                slot_index += 1
+            worker = Worker(screen_index, screen, screen_slots, screen_plans)
+            if plans is not None:
+                # Single loop, each worker plays the videos planned for its slots
+                worker.playlist = [path for plan in screen_plans for path in plan]
+            self.workers.append(worker)
+        if plans is None:
+            self.distribute(list(video_paths))
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.monitor)
+
+    def distribute(self, video_paths):
+        """
+        Give videos to the workers, proportionally to their number of slots.
+
+        Args:
+            video_paths (list of str): The video paths.
+
+        Returns:
+            dict: The videos given to each worker, by worker index.
+        """
+        additions = {}
+        workers = [worker for worker in self.workers if worker.slots]
+        if not workers:
+            return additions
+        random.shuffle(video_paths)
+        heap = [(len(worker.playlist) / len(worker.slots), worker.index) for worker in workers]
+        heapq.heapify(heap)
+        for path in video_paths:
+            _, index = heapq.heappop(heap)
+            worker = self.workers[index]
+            worker.playlist.append(path)
+            additions.setdefault(index, []).append(path)
+            heapq.heappush(heap, (len(worker.playlist) / len(worker.slots), index))
+        return additions
+
+    def start(self):
+        """
+        Start the workers and monitor them.
+        """
+        for worker in self.workers:
+            if worker.slots:
+                self.spawn(worker)
+            else:
+                worker.finished = True
+        QtWidgets.QApplication.instance().aboutToQuit.connect(self.stop)
+        self.timer.start(MONITOR_INTERVAL)
+
+    def spawn(self, worker):
+        """
+        Start the process of a worker.
+
+        Args:
+            worker (Worker): The worker.
+        """
+        connection, child_connection = self.context.Pipe()
+        worker.process = self.context.Process(
+            target=run_worker, name=f'wall-screen-{worker.index}', daemon=True,
+            args=(worker.index, worker.screen, worker.slots, worker.playlist, worker.plans, config.export_config(), child_connection))
+        worker.process.start()
+        child_connection.close()
+        worker.connection = connection
+        worker.restart_at = None
+        log(f"Started worker {worker.index} (pid {worker.process.pid}) for screen {worker.screen}, {len(worker.slots)} slot(s)")
+
+    def monitor(self):
+        """
+        Collect the workers messages, restart the crashed ones.
+        """
+        now = time.monotonic()
+        for worker in self.workers:
+            if worker.finished:
+                continue
+            if worker.process is None:
+                if worker.restart_at is not None and now >= worker.restart_at:
+                    self.spawn(worker)
+                continue
+            self.receive(worker)
+            if worker.process.is_alive():
+                continue
+
+            exitcode = worker.process.exitcode
+            worker.process = None
+            worker.connection.close()
+            worker.connection = None
+            if exitcode == 0:
+                log(f"Worker {worker.index} exited")
+                worker.finished = True
+                continue
+
+            while worker.restarts and now - worker.restarts[0] > RESTART_WINDOW:
+                worker.restarts.popleft()
+            if len(worker.restarts) >= MAX_RESTARTS:
+                log('error', f"Worker {worker.index} crashed {MAX_RESTARTS} times in {RESTART_WINDOW}s, giving up on screen {worker.screen}")
+                worker.finished = True
+                continue
+            worker.restarts.append(now)
+            worker.restart_at = now + RESTART_DELAY
+            log('warning', f"Worker {worker.index} crashed with exit code {exitcode}, restarting in {RESTART_DELAY}s")
+
+        if all(worker.finished for worker in self.workers):
+            log("All workers exited")
+            QtWidgets.QApplication.quit()
+
+    def receive(self, worker):
+        """
+        Process the pending messages of a worker.
+
+        Args:
+            worker (Worker): The worker.
+        """
+        try:
+            while worker.connection.poll():
+                kind, payload = worker.connection.recv()
+                if kind == 'ready':
+                    log(f"Worker {worker.index} ready with {payload} slot(s)")
+                elif kind == 'status':
+                    worker.status = payload
+                    log(f"Worker {worker.index} status: {payload['playing']}/{payload['players']} playing, "
+                        f"{payload['videos']} video(s), RSS {utils.format_bytes(payload['rss'])}")
+        except (EOFError, OSError):
+            # The worker died, handled by monitor()
+            pass
+
+    def send(self, worker, kind, payload=None):
+        """
+        Send a message to a running worker.
+
+        Args:
+            worker (Worker): The worker.
+            kind (str): The message type.
+            payload: The message content, picklable.
+        """
+        if worker.connection is None:
+            return
+        try:
+            worker.connection.send((kind, payload))
+        except (OSError, ValueError):
+            pass
+
+    def add_videos(self, video_paths):
+        """
+        Give new videos to the workers.
+
+        Args:
+            video_paths (list of str): List of video paths to add.
+        """
+        new_paths = [path for path in dict.fromkeys(video_paths) if path not in self.known_paths]
+        if not new_paths:
+            return
+        self.known_paths.update(new_paths)
+        for index, paths in self.distribute(new_paths).items():
+            self.send(self.workers[index], 'add', paths)
+        log(f"Added {len(new_paths)} video(s) to the wall")
+
+    def remove_videos(self, video_paths):
+        """
+        Drop deleted videos from the workers.
+
+        Args:
+            video_paths (list of str): List of video paths to remove.
+        """
+        removed = set(video_paths) & self.known_paths
+        if not removed:
+            return
+        self.known_paths -= removed
+        for worker in self.workers:
+            if any(path in removed for path in worker.playlist):
+                worker.playlist = [path for path in worker.playlist if path not in removed]
+                self.send(worker, 'remove', list(removed))
+        log(f"Removed {len(removed)} video(s) from the wall")
+
+    def stop(self):
+        """
+        Ask the workers to quit, and terminate the ones that do not.
+        """
+        self.timer.stop()
+        for worker in self.workers:
+            self.send(worker, 'quit')
+        for worker in self.workers:
+            if worker.process is not None:
+                worker.process.join(2)
+                if worker.process.is_alive():
+                    worker.process.terminate()
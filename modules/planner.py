@@ -0,0 +1,77 @@
+# modules/planner.py - Duration-balanced playlists for single-loop mode.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+import heapq
+import statistics
+
+import modules.config as config
+import modules.utils as utils   # all functions accessible with utils.function()
+from modules.utils import *     # main functions accessible as function() for ease of use, e.g. log(), error(), exit_with_error()
+
+DEFAULT_DURATION = 60   # Seconds assumed for a video when no duration is known at all
+PROBE_TIMEOUT = 30      # Maximum seconds spent probing durations before planning
+
+def get_durations(video_paths, prober=None):
+    """
+    Get the duration of each video, probing them if needed.
+
+    Unknown durations are replaced by the median of the known ones.
+
+    Args:
+        video_paths (list of str): The video paths.
+        prober (Prober, optional): The media prober, durations are all unknown without it.
+
+    Returns:
+        dict: The duration in seconds of each video path.
+    """
+    known = {}
+    if prober is not None:
+        prober.wait(video_paths, PROBE_TIMEOUT)
+        for path in video_paths:
+            info = prober.get(path)
+            if info is not None and info.duration:
+                known[path] = info.duration
+
+    default = statistics.median(known.values()) if known else DEFAULT_DURATION
+    if len(known) < len(video_paths):
+        log(f"Duration unknown for {len(video_paths) - len(known)} video(s), assuming {default:.1f}s")
+    return {path: known.get(path, default) for path in video_paths}
+
+def plan_single_loop(video_paths, slot_count, durations):
+    """
+    Partition the videos between the slots, so that all the slots finish their loop at nearly the same time.
+
+    Longest processing time first: the videos are taken from the longest to the
+    shortest, each one is given to the slot with the shortest total duration so
+    far. The makespan (the longest loop) is at most 4/3 of the optimal one.
+
+    Args:
+        video_paths (list of str): The videos to play, each one exactly once per loop.
+        slot_count (int): The number of slots.
+        durations (dict): The duration in seconds of each video path.
+
+    Returns:
+        tuple: (plans, loads), the list of video paths and the loop duration of each slot.
+    """
+    plans = [[] for _ in range(slot_count)]
+    loads = [0.0] * slot_count
+    if not slot_count:
+        return plans, loads
+
+    heap = [(0.0, index) for index in range(slot_count)]
+    for path in sorted(video_paths, key=lambda path: durations[path], reverse=True):
+        load, index = heapq.heappop(heap)
+        plans[index].append(path)
+        load += durations[path]
+        loads[index] = load
+        heapq.heappush(heap, (load, index))
+
+    makespan = max(loads)
+    average = sum(loads) / slot_count
+    lower_bound = max(average, max(durations[path] for path in video_paths)) if video_paths else 0
+    log(f"Single loop plan: {len(video_paths)} video(s) on {slot_count} slot(s), "
+        f"makespan {makespan:.1f}s (lower bound {lower_bound:.1f}s), "
+        f"imbalance {makespan - min(loads):.1f}s ({(makespan / average - 1) * 100 if average else 0:.1f}% above average)")
+    return plans, loads
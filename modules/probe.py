@@ -0,0 +1,346 @@
+# modules/probe.py - Background media probing with a persistent metadata cache.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+import os
+import json
+import time
+import queue
+import shutil
+import threading
+import subprocess
+from collections import namedtuple
+from PyQt5 import QtCore
+from PyQt5.QtCore import pyqtSignal
+import vlc
+
+import modules.config as config
+import modules.utils as utils   # all functions accessible with utils.function()
+from modules.utils import *     # main functions accessible as function() for ease of use, e.g. log(), error(), exit_with_error()
+from modules import library
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    codec TEXT,
+    rotation INTEGER NOT NULL,
+    bitrate INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+PRIORITY_HIGH = 0   # Videos about to be played
+PRIORITY_LOW = 1    # Background probing of the library
+
+PARSE_TIMEOUT = 5000    # Milliseconds allowed to libvlc to parse a file
+
+# libvlc orientations needing a rotation to be displayed upright
+VLC_ROTATIONS = {
+    vlc.VideoOrient.bottom_right.value: 180,
+    vlc.VideoOrient.left_bottom.value: 270,
+    vlc.VideoOrient.right_top.value: 90,
+}
+
+class MediaInfo(namedtuple('MediaInfo', ['width', 'height', 'duration', 'codec', 'rotation', 'bitrate'])):
+    """
+    Probed video metadata.
+
+    Attributes:
+        width (int): The coded frame width in pixels.
+        height (int): The coded frame height in pixels.
+        duration (float): The duration in seconds, 0 if unknown.
+        codec (str): The video codec name.
+        rotation (int): The rotation to apply for display, in degrees (0, 90, 180 or 270).
+        bitrate (int): The overall bitrate in bits per second, 0 if unknown.
+    """
+
+    __slots__ = ()
+
+    @property
+    def display_size(self):
+        """
+        Get the frame size as displayed, after rotation.
+
+        Returns:
+            tuple: (width, height) in pixels.
+        """
+        if self.rotation in (90, 270):
+            return self.height, self.width
+        return self.width, self.height
+
+    @property
+    def aspect(self):
+        """
+        Get the displayed aspect ratio (width / height), or 0 if unknown.
+        """
+        width, height = self.display_size
+        return width / height if height else 0
+
+def probe_ffprobe(path):
+    """
+    Probe a video with ffprobe.
+
+    Args:
+        path (str): The video path.
+
+    Returns:
+        MediaInfo: The metadata, or None if the file could not be probed.
+    """
+    command = [
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0',
+        '-show_entries', 'stream=width,height,codec_name:stream_tags=rotate:stream_side_data=rotation:format=duration,bit_rate',
+        '-of', 'json', path,
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=PARSE_TIMEOUT / 1000)
+        data = json.loads(result.stdout or '{}')
+    except (subprocess.SubprocessError, ValueError) as e:
+        log(f"ffprobe failed on {path}: {e}")
+        return None
+
+    streams = data.get('streams') or []
+    if not streams:
+        return None
+    stream = streams[0]
+    rotation = int(float(stream.get('tags', {}).get('rotate', 0)))
+    for side_data in stream.get('side_data_list', []):
+        if 'rotation' in side_data:
+            # Display matrix rotation is counter-clockwise
+            rotation = -int(float(side_data['rotation']))
+    form = data.get('format', {})
+    return MediaInfo(
+        width=int(stream.get('width') or 0),
+        height=int(stream.get('height') or 0),
+        duration=float(form.get('duration') or 0),
+        codec=stream.get('codec_name'),
+        rotation=rotation % 360,
+        bitrate=int(form.get('bit_rate') or 0),
+    )
+
+def probe_vlc(instance, path):
+    """
+    Probe a video with libvlc media parsing.
+
+    Args:
+        instance (vlc.Instance): The libvlc instance to use.
+        path (str): The video path.
+
+    Returns:
+        MediaInfo: The metadata, or None if the file could not be probed.
+    """
+    media = instance.media_new(path)
+    parsed = threading.Event()
+    media.event_manager().event_attach(vlc.EventType.MediaParsedChanged, lambda event: parsed.set())
+    media.parse_with_options(vlc.MediaParseFlag.local, PARSE_TIMEOUT)
+    parsed.wait(PARSE_TIMEOUT / 1000 + 1)
+    if media.get_parsed_status() != vlc.MediaParsedStatus.done:
+        media.release()
+        return None
+
+    info = None
+    for track in media.tracks_get() or []:
+        if track.type != vlc.TrackType.video:
+            continue
+        video = track.video.contents
+        info = MediaInfo(
+            width=video.width,
+            height=video.height,
+            duration=max(0, media.get_duration()) / 1000,
+            codec=vlc.libvlc_media_get_codec_description(track.type, track.codec) or str(track.codec),
+            rotation=VLC_ROTATIONS.get(getattr(video.orientation, 'value', video.orientation), 0),
+            bitrate=track.bitrate,
+        )
+        break
+    media.release()
+    return info
+
+class MediaCache:
+    """
+    A persistent cache of probed metadata, keyed by path, size and modification time.
+    """
+
+    def __init__(self, path=None):
+        """
+        Open the cache, stored in the library index database.
+
+        Args:
+            path (str, optional): The database path.
+        """
+        self.connection = library.open_database(path)
+        self.connection.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def get(self, path, stat=None):
+        """
+        Get the cached metadata of a video, if the file did not change since it was probed.
+
+        Args:
+            path (str): The video path.
+            stat (os.stat_result, optional): The file stat, if already known.
+
+        Returns:
+            MediaInfo: The cached metadata, or None.
+        """
+        try:
+            stat = stat or os.stat(path)
+        except OSError:
+            return None
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT width, height, duration, codec, rotation, bitrate FROM media WHERE path = ? AND size = ? AND mtime = ?',
+                (path, stat.st_size, stat.st_mtime)).fetchone()
+        return MediaInfo(*row) if row else None
+
+    def put(self, path, stat, info):
+        """
+        Store the metadata of a video.
+
+        Args:
+            path (str): The video path.
+            stat (os.stat_result): The file stat at probing time.
+            info (MediaInfo): The metadata.
+        """
+        with self.lock, self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                    (path, stat.st_size, stat.st_mtime, *info))
+
+class Prober(QtCore.QObject):
+    """
+    A pool of worker threads probing videos in the background.
+
+    Probing uses ffprobe when available and libvlc media parsing otherwise.
+    Results are kept in memory, stored in the persistent cache and announced
+    with the probed signal.
+
+    Attributes:
+        probed (pyqtSignal): Emitted in the main thread with (path, MediaInfo) for each probed video.
+    """
+
+    probed = pyqtSignal(str, object)
+
+    def __init__(self, workers=2, parent=None):
+        """
+        Initialize the prober and start its workers.
+
+        Args:
+            workers (int): The number of worker threads.
+            parent (QObject, optional): The parent object.
+        """
+        super(Prober, self).__init__(parent)
+        self.cache = MediaCache()
+        self.info = {}
+        self.failed = set()
+        self.queued = set()
+        self.queue = queue.PriorityQueue()
+        self.counter = 0
+        self.lock = threading.Lock()
+        self.use_ffprobe = shutil.which('ffprobe') is not None
+        self.vlc_instance = None
+        log(f"Probing videos with {'ffprobe' if self.use_ffprobe else 'libvlc'}, {workers} worker(s)")
+
+        for index in range(max(1, workers)):
+            threading.Thread(target=self.run, name=f'prober-{index}', daemon=True).start()
+
+    def get(self, path):
+        """
+        Get the metadata of a video, without waiting for it to be probed.
+
+        Args:
+            path (str): The video path.
+
+        Returns:
+            MediaInfo: The metadata, or None if not probed yet.
+        """
+        return self.info.get(path)
+
+    def wait(self, paths, timeout):
+        """
+        Probe videos and wait until they are all probed, or the timeout expires.
+
+        Args:
+            paths (list of str): The video paths.
+            timeout (float): The maximum number of seconds to wait.
+
+        Returns:
+            int: The number of videos probed successfully.
+        """
+        self.request(paths, PRIORITY_HIGH)
+        deadline = time.monotonic() + timeout
+        pending = [path for path in paths if path not in self.info]
+        while pending and time.monotonic() < deadline:
+            time.sleep(0.05)
+            pending = [path for path in pending if path not in self.info and path not in self.failed]
+        if pending:
+            log(f"{len(pending)} video(s) not probed after {timeout}s")
+        return sum(1 for path in paths if path in self.info)
+
+    def request(self, paths, priority=PRIORITY_LOW):
+        """
+        Queue videos for probing.
+
+        Args:
+            paths (list of str): The video paths.
+            priority (int): PRIORITY_HIGH for videos about to be played, PRIORITY_LOW otherwise.
+        """
+        with self.lock:
+            for path in paths:
+                if path in self.info or (path in self.queued and priority == PRIORITY_LOW):
+                    continue
+                self.queued.add(path)
+                # The counter keeps the requests order within a priority
+                self.counter += 1
+                self.queue.put((priority, self.counter, path))
+
+    def probe(self, path):
+        """
+        Probe a single video.
+
+        Args:
+            path (str): The video path.
+
+        Returns:
+            MediaInfo: The metadata, or None if the file could not be probed.
+        """
+        if self.use_ffprobe:
+            return probe_ffprobe(path)
+        if self.vlc_instance is None:
+            with self.lock:
+                if self.vlc_instance is None:
+                    self.vlc_instance = vlc.Instance('--quiet', '--no-video', '--no-audio')
+        return probe_vlc(self.vlc_instance, path)
+
+    def run(self):
+        """
+        Worker thread loop.
+        """
+        while True:
+            _, _, path = self.queue.get()
+            if path in self.info:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self.failed.add(path)
+                continue
+
+            start = time.monotonic()
+            info = self.cache.get(path, stat)
+            if info is None:
+                try:
+                    info = self.probe(path)
+                except Exception as e:
+                    log(f"Error probing {path}: {e}")
+                    info = None
+                if info is None:
+                    self.failed.add(path)
+                    continue
+                self.cache.put(path, stat, info)
+                log(f"Probed {path} in {time.monotonic() - start:.3f}s: {info}")
+
+            self.info[path] = info
+            self.probed.emit(path, info)
@@ -0,0 +1,142 @@
+# modules/profiles.py - Decoder profiles adapted to the slot size and the source resolution.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+import os
+
+import modules.config as config
+import modules.utils as utils   # all functions accessible with utils.function()
+from modules.utils import *     # main functions accessible as function() for ease of use, e.g. log(), error(), exit_with_error()
+
+# Profiles from the most expensive to the cheapest
+PROFILE_NAMES = ['full', 'medium', 'low']
+
+# libvlc media options of each profile
+PROFILE_OPTIONS = {
+    # Full quality, VLC defaults
+    'full': [],
+    # Skip the loop filter on non-reference frames, allow speed tricks not compliant with the standard
+    'medium': [
+        ':avcodec-skiploopfilter=1',
+        ':avcodec-fast',
+    ],
+    # Skip the loop filter on all frames, skip decoding of non-reference frames, fast bilinear scaling
+    'low': [
+        ':avcodec-skiploopfilter=4',
+        ':avcodec-skip-frame=1',
+        ':avcodec-fast',
+        ':avcodec-hurry-up',
+        ':swscale-mode=0',
+    ],
+}
+
+# Default decoder threads of each profile, 0 lets VLC decide
+PROFILE_THREADS = {
+    'full': 0,
+    'medium': 2,
+    'low': 1,
+}
+
+# Slot pixels relative to source pixels, below which a cheaper profile is used
+MEDIUM_RATIO = 0.6
+LOW_RATIO = 0.15
+
+# Slot pixels used when the source resolution is unknown
+MEDIUM_PIXELS = 1280 * 720
+LOW_PIXELS = 640 * 360
+
+def select_profile(slot_width, slot_height, source_width=0, source_height=0):
+    """
+    Select the decoder profile for a video shown in a slot.
+
+    The fewer source pixels end up on screen, the less decoding quality matters.
+
+    Args:
+        slot_width (int): The slot width in pixels.
+        slot_height (int): The slot height in pixels.
+        source_width (int): The source video width, 0 if unknown.
+        source_height (int): The source video height, 0 if unknown.
+
+    Returns:
+        str: The profile name, one of PROFILE_NAMES.
+    """
+    forced = getattr(config, 'decoder_profile', None)
+    if forced and forced != 'auto':
+        return forced
+
+    slot_pixels = slot_width * slot_height
+    if source_width and source_height:
+        ratio = slot_pixels / (source_width * source_height)
+        if ratio <= LOW_RATIO:
+            return 'low'
+        if ratio <= MEDIUM_RATIO:
+            return 'medium'
+        return 'full'
+
+    if slot_pixels <= LOW_PIXELS:
+        return 'low'
+    if slot_pixels <= MEDIUM_PIXELS:
+        return 'medium'
+    return 'full'
+
+def media_options(profile, threads=None):
+    """
+    Get the libvlc media options of a decoder profile.
+
+    Args:
+        profile (str): The profile name.
+        threads (int, optional): The decoder threads allocated to the slot. The
+            profile default is used if None, and caps the allocation otherwise.
+
+    Returns:
+        list of str: The media options, to pass to Media.add_options().
+    """
+    options = list(PROFILE_OPTIONS[profile])
+    default = PROFILE_THREADS[profile]
+    if threads is None:
+        threads = default
+    elif default:
+        threads = min(threads, default)
+    if threads:
+        options.append(f':avcodec-threads={threads}')
+    return options
+
+def allocate_decoder_threads(slots, budget=None):
+    """
+    Share a wall-wide decoder thread budget between the slots, based on their pixel area.
+
+    Without a budget, every player lets libvlc pick a thread count from the
+    number of cores, and a wall of many players ends up with far more decoder
+    threads than cores. Each slot gets at least one thread, the remaining ones
+    are distributed proportionally to the slot areas (largest remainders first).
+
+    Args:
+        slots (list of tuples): The slots, as returned by get_slots(): (screen_index, x, y, width, height).
+        budget (int, optional): The total number of decoder threads, defaults to
+            config.decoder_threads or the number of CPU cores.
+
+    Returns:
+        list of int: The number of decoder threads of each slot.
+    """
+    if not slots:
+        return []
+    budget = budget or getattr(config, 'decoder_threads', None) or os.cpu_count() or 1
+    allocation = [1] * len(slots)
+    spare = budget - len(slots)
+    if spare <= 0:
+        log(f"Decoder thread budget {budget} is lower than the {len(slots)} slots, one thread per slot")
+        return allocation
+
+    areas = [slot[3] * slot[4] for slot in slots]
+    total_area = sum(areas) or 1
+    shares = [spare * area / total_area for area in areas]
+    for index, share in enumerate(shares):
+        allocation[index] += int(share)
+    leftover = budget - sum(allocation)
+    by_remainder = sorted(range(len(slots)), key=lambda index: shares[index] - int(shares[index]), reverse=True)
+    for index in by_remainder[:leftover]:
+        allocation[index] += 1
+
+    log(f"Decoder thread budget {budget} for {len(slots)} slots: {allocation}")
+    return allocation
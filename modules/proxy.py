@@ -0,0 +1,248 @@
+# modules/proxy.py - Cache of low-resolution proxies for heavy videos, transcoded with ffmpeg.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+import os
+import time
+import shutil
+import hashlib
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import modules.config as config
+import modules.utils as utils   # all functions accessible with utils.function()
+from modules.utils import *     # main functions accessible as function() for ease of use, e.g. log(), error(), exit_with_error()
+
+# Proxy heights, a proxy is shared by all the slots up to its height
+PROXY_HEIGHTS = (360, 540, 720, 1080)
+
+def get_proxy_dir():
+    """
+    Get the proxy cache directory, creating it if needed.
+
+    Returns:
+        str: The path to the proxies directory in the user cache directory.
+    """
+    proxy_dir = os.path.join(utils.get_cache_dir(), 'proxies')
+    os.makedirs(proxy_dir, exist_ok=True)
+    return proxy_dir
+
+def proxy_height(slot_height):
+    """
+    Get the proxy height used for a slot.
+
+    Args:
+        slot_height (int): The slot height in pixels.
+
+    Returns:
+        int: The smallest proxy height covering the slot, or None if the slot is taller than all proxies.
+    """
+    for height in PROXY_HEIGHTS:
+        if height >= slot_height:
+            return height
+    return None
+
+class ProxyCache:
+    """
+    Slot-sized H.264 proxies of the videos too heavy to decode in a small slot.
+
+    Sources above the configured bitrate or height are transcoded in the
+    background, each transcode being a local ffmpeg process. A proxy is only
+    used once complete; until then, and for files that cannot be transcoded,
+    the source is played. The cache directory is kept under its size limit by
+    evicting the least recently used proxies.
+    """
+
+    def __init__(self, directory=None, max_size=None, workers=None):
+        """
+        Initialize the cache.
+
+        Args:
+            directory (str, optional): The cache directory, defaults to get_proxy_dir().
+            max_size (int, optional): The maximum cache size in bytes, defaults to config.proxy_cache_size (in GB).
+            workers (int, optional): The number of concurrent ffmpeg processes, defaults to config.proxy_workers.
+        """
+        self.directory = directory or get_proxy_dir()
+        self.max_size = max_size or int((config.proxy_cache_size or 10) * 1024 ** 3)
+        self.max_bitrate = (config.proxy_bitrate or 0) * 1000000
+        self.max_height = config.proxy_height or 0
+        self.pending = set()
+        self.failed = set()
+        self.lock = threading.Lock()
+        self.evict_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers or config.proxy_workers or 1), thread_name_prefix='proxy')
+        # Run the transcodes with a lower priority than the players
+        self.nice = ['nice', '-n', '10'] if shutil.which('nice') else []
+        log(f"Proxy cache in {self.directory}, limit {utils.format_bytes(self.max_size)}")
+
+    def proxy_path(self, path, height):
+        """
+        Get the proxy file path of a source video, for a proxy height.
+
+        The source size and modification time are part of the name, so a
+        modified source never uses an outdated proxy.
+
+        Args:
+            path (str): The source video path.
+            height (int): The proxy height.
+
+        Returns:
+            str: The proxy file path, or None if the source does not exist.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = hashlib.blake2b(f"{path}\0{stat.st_size}\0{stat.st_mtime}".encode('utf-8', 'surrogateescape'), digest_size=16).hexdigest()
+        return os.path.join(self.directory, f"{key}-{height}p.mp4")
+
+    def needs_proxy(self, info, slot_height, force=False):
+        """
+        Check if a video is heavy enough to be played from a proxy in a slot.
+
+        Args:
+            info (MediaInfo): The probed video metadata.
+            slot_height (int): The slot height in pixels.
+            force (bool): Ignore the bitrate and height thresholds, any source taller than the proxy needs one.
+
+        Returns:
+            int: The proxy height, or None if the source should be played.
+        """
+        if info is None:
+            return None
+        height = proxy_height(slot_height)
+        source_height = info.display_size[1]
+        if height is None or source_height <= height:
+            return None
+        if force:
+            return height
+        if (self.max_bitrate and info.bitrate > self.max_bitrate) or (self.max_height and source_height > self.max_height):
+            return height
+        return None
+
+    def get(self, path, slot_height):
+        """
+        Get the proxy of a video if one is ready, marking it as recently used.
+
+        Any proxy at least as tall as the slot is used.
+
+        Args:
+            path (str): The source video path.
+            slot_height (int): The slot height in pixels.
+
+        Returns:
+            str: The proxy file path, or None if there is none.
+        """
+        height = proxy_height(slot_height)
+        if height is None:
+            return None
+        for candidate in PROXY_HEIGHTS[PROXY_HEIGHTS.index(height):]:
+            proxy = self.proxy_path(path, candidate)
+            if proxy is not None and os.path.exists(proxy):
+                try:
+                    os.utime(proxy)
+                except OSError:
+                    pass
+                return proxy
+        return None
+
+    def request(self, path, info, slot_height, force=False):
+        """
+        Transcode a proxy in the background, if the video needs one and has none yet.
+
+        Args:
+            path (str): The source video path.
+            info (MediaInfo): The probed video metadata.
+            slot_height (int): The slot height in pixels.
+            force (bool): Ignore the bitrate and height thresholds.
+        """
+        height = self.needs_proxy(info, slot_height, force)
+        if height is None or self.get(path, slot_height) is not None:
+            return
+        proxy = self.proxy_path(path, height)
+        with self.lock:
+            if proxy is None or proxy in self.pending or proxy in self.failed:
+                return
+            self.pending.add(proxy)
+        log(f"Queued {height}p proxy for {path}")
+        self.executor.submit(self.transcode, path, proxy, height)
+
+    def transcode(self, path, proxy, height):
+        """
+        Transcode a proxy with ffmpeg, in a worker thread.
+
+        Args:
+            path (str): The source video path.
+            proxy (str): The proxy file path.
+            height (int): The proxy height.
+        """
+        temporary = proxy + '.part'
+        command = self.nice + [
+            'ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error', '-y',
+            '-i', path,
+            '-map', '0:v:0', '-map', '0:a:0?',
+            '-vf', f"scale=-2:{height}",
+            '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '23', '-pix_fmt', 'yuv420p',
+            '-c:a', 'aac', '-b:a', '128k',
+            '-movflags', '+faststart', '-f', 'mp4',
+            temporary,
+        ]
+        start = time.monotonic()
+        try:
+            result = subprocess.run(command, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit code {result.returncode}")
+            os.replace(temporary, proxy)
+            log(f"Transcoded {height}p proxy for {path} in {time.monotonic() - start:.1f}s")
+        except Exception as e:
+            log(f"Error transcoding proxy for {path}: {e}")
+            with self.lock:
+                self.failed.add(proxy)
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+        finally:
+            with self.lock:
+                self.pending.discard(proxy)
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used proxies until the cache fits its size limit.
+
+        Called from the transcoding threads. The directory is listed and the
+        files removed without holding self.lock, which get() and request()
+        take from the Qt thread, evictions only exclude each other.
+        """
+        with self.evict_lock:
+            entries = []
+            total = 0
+            with os.scandir(self.directory) as iterator:
+                for entry in iterator:
+                    if not entry.name.endswith('.mp4'):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+            entries.sort()
+            for _, size, proxy in entries:
+                if total <= self.max_size:
+                    break
+                try:
+                    os.remove(proxy)
+                    total -= size
+                    log(f"Evicted proxy {proxy}")
+                except OSError:
+                    pass
+
+    def shutdown(self):
+        """
+        Stop the transcoding workers, without waiting for the running transcodes.
+        """
+        self.executor.shutdown(wait=False)
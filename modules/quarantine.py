@@ -0,0 +1,112 @@
+# modules/quarantine.py - Persistent list of video files that failed to open or decode.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+import os
+import time
+
+import modules.config as config
+import modules.utils as utils   # all functions accessible with utils.function()
+from modules.utils import *     # main functions accessible as function() for ease of use, e.g. log(), error(), exit_with_error()
+from modules import library
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quarantine (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    failures INTEGER NOT NULL,
+    retry_after REAL NOT NULL,
+    reason TEXT
+);
+"""
+
+RETRY_DELAY = 3600              # Seconds before retrying a file after its first failure
+MAX_RETRY_DELAY = 7 * 86400     # The delay doubles after each failure, up to this value
+
+class Quarantine:
+    """
+    Files that failed to open or decode, never handed to libvlc again until their retry time.
+
+    The list is persisted in the library database, so known-bad files stay
+    quarantined across runs. A file is released early if its size or
+    modification time changed, e.g. when a partial download completes.
+    Lookups are served from memory and only used from the main thread.
+    """
+
+    def __init__(self, path=None):
+        """
+        Open the quarantine list.
+
+        Args:
+            path (str, optional): The database path.
+        """
+        self.connection = library.open_database(path)
+        self.connection.executescript(SCHEMA)
+        self.entries = {}   # path => (size, mtime, failures, retry_after)
+        for path, size, mtime, failures, retry_after in self.connection.execute(
+                'SELECT path, size, mtime, failures, retry_after FROM quarantine'):
+            self.entries[path] = (size, mtime, failures, retry_after)
+        if self.entries:
+            log(f"{len(self.entries)} file(s) in quarantine")
+
+    def is_quarantined(self, path, stat=None):
+        """
+        Check if a file must be skipped.
+
+        Args:
+            path (str): The video path.
+            stat (os.stat_result, optional): The file stat, if already known.
+
+        Returns:
+            bool: True if the file is quarantined and did not change since it failed.
+        """
+        entry = self.entries.get(path)
+        if entry is None:
+            return False
+        size, mtime, failures, retry_after = entry
+        if time.time() >= retry_after:
+            return False
+        try:
+            stat = stat or os.stat(path)
+        except OSError:
+            return True
+        return stat.st_size == size and stat.st_mtime == mtime
+
+    def add(self, path, reason):
+        """
+        Quarantine a file after a failure.
+
+        Args:
+            path (str): The video path.
+            reason (str): A short description of the failure.
+        """
+        try:
+            stat = os.stat(path)
+            size, mtime = stat.st_size, stat.st_mtime
+        except OSError:
+            size, mtime = 0, 0
+        failures = 1
+        entry = self.entries.get(path)
+        if entry is not None and entry[0] == size and entry[1] == mtime:
+            failures = entry[2] + 1
+        retry_after = time.time() + min(RETRY_DELAY * 2 ** (failures - 1), MAX_RETRY_DELAY)
+        self.entries[path] = (size, mtime, failures, retry_after)
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO quarantine VALUES (?, ?, ?, ?, ?, ?)',
+                                    (path, size, mtime, failures, retry_after, reason))
+        log(f"Quarantined {path} ({reason}), failure {failures}, retry in {(retry_after - time.time()) / 3600:.1f}h")
+
+    def release(self, path):
+        """
+        Remove a file from the quarantine, after it played successfully.
+
+        Args:
+            path (str): The video path.
+        """
+        if self.entries.pop(path, None) is None:
+            return
+        with self.connection:
+            self.connection.execute('DELETE FROM quarantine WHERE path = ?', (path,))
+        log(f"Released {path} from quarantine")
@@ -0,0 +1,111 @@
+# modules/screenmonitor.py - Follow the screens plugged, unplugged or reconfigured while the wall is playing.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+from PyQt5 import QtCore, QtGui
+
+import modules.config as config
+import modules.utils as utils   # all functions accessible with utils.function()
+from modules.utils import *     # main functions accessible as function() for ease of use, e.g. log(), error(), exit_with_error()
+from modules.slots import screen_geometry, list_screens
+
+SETTLE_DELAY = 1000     # Milliseconds without screen change before the wall is updated
+
+class ScreenMonitor(QtCore.QObject):
+    """
+    Keep the wall in sync with the screens reported by Qt.
+
+    Plugging a monitor or changing its resolution sends bursts of signals, the
+    changes are collected until the screens settle, then only the affected
+    screens of the wall are rebuilt, removed or added. The players of the
+    other screens keep playing.
+    """
+
+    def __init__(self, wall, parent=None):
+        """
+        Match the wall screens with the Qt screens and start following them.
+
+        Args:
+            wall (Wall): The wall, built on get_screens().
+            parent (QObject, optional): The parent object.
+        """
+        super(ScreenMonitor, self).__init__(parent)
+        self.wall = wall
+        self.tracked = {}   # QScreen => wall screen index
+        self.changed = set()
+        self.removed = set()
+        self.added = []
+
+        for screen in list_screens():
+            geometry = screen_geometry(screen)
+            if geometry in wall.screens:
+                self.track(screen, wall.screens.index(geometry))
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.apply)
+
+        application = QtGui.QGuiApplication.instance()
+        application.screenAdded.connect(self.on_screen_added)
+        application.screenRemoved.connect(self.on_screen_removed)
+
+    def track(self, screen, screen_index):
+        """
+        Follow the geometry changes of a screen shown by the wall.
+
+        Args:
+            screen (QScreen): The screen.
+            screen_index (int): Its index in the wall screens.
+        """
+        self.tracked[screen] = screen_index
+        screen.geometryChanged.connect(lambda geometry, screen=screen: self.on_geometry_changed(screen))
+
+    def on_screen_added(self, screen):
+        """
+        Handle a screen plugged, shown by the wall unless a single screen was requested.
+        """
+        log(f"Screen plugged: {screen.name()} {screen_geometry(screen)}")
+        if config.screen is not None:
+            return
+        self.added.append(screen)
+        self.timer.start(SETTLE_DELAY)
+
+    def on_screen_removed(self, screen):
+        """
+        Handle a screen unplugged. The QScreen is deleted soon after, only its index is kept.
+        """
+        log(f"Screen unplugged: {screen.name()}")
+        if screen in self.added:
+            self.added.remove(screen)
+        screen_index = self.tracked.pop(screen, None)
+        if screen_index is not None:
+            self.changed.discard(screen_index)
+            self.removed.add(screen_index)
+        self.timer.start(SETTLE_DELAY)
+
+    def on_geometry_changed(self, screen):
+        """
+        Handle a screen whose resolution or position changed.
+        """
+        screen_index = self.tracked.get(screen)
+        if screen_index is None:
+            return
+        self.changed.add(screen_index)
+        self.timer.start(SETTLE_DELAY)
+
+    def apply(self):
+        """
+        Update the wall once the screens settled.
+        """
+        for screen_index in sorted(self.removed):
+            self.wall.remove_screen(screen_index)
+        for screen, screen_index in self.tracked.items():
+            geometry = screen_geometry(screen)
+            if screen_index in self.changed and geometry != self.wall.screens[screen_index]:
+                self.wall.rebuild_screen(screen_index, geometry)
+        for screen in self.added:
+            self.track(screen, self.wall.add_screen(screen_geometry(screen)))
+        self.removed.clear()
+        self.changed.clear()
+        self.added = []
@@ -3,18 +3,47 @@
 # Calculate the slots needed based on the number of screens and videos.
 # """
 
-import os
-import re
-import subprocess
+import random
+import statistics
 from math import ceil, sqrt
+from PyQt5 import QtGui
 
 import modules.config as config
 import modules.utils as utils   # all functions accessible with utils.function()
 from modules.utils import *     # main functions accessible as function() for ease of use, e.g. log(), error(), exit_with_error()
+from modules.probe import MediaCache
+
+PORTRAIT_ASPECT = 0.8       # Videos with a lower width / height ratio are portrait
+LANDSCAPE_ASPECT = 1.25     # Videos with a higher width / height ratio are landscape
+MIN_PORTRAIT_SHARE = 0.1    # Minimum share of portrait videos in the library to get portrait tiles
+HISTOGRAM_SAMPLE = 500      # Number of videos looked up in the metadata cache for the aspect histogram
+
+def screen_geometry(screen):
+    """
+    Get the geometry of a screen in the format used by the wall.
+
+    Args:
+        screen (QScreen): The screen.
+
+    Returns:
+        tuple: (resolution, x, y), e.g. ("1920x1080", 0, 0).
+    """
+    geometry = screen.geometry()
+    return (f"{geometry.width()}x{geometry.height()}", geometry.x(), geometry.y())
+
+def list_screens():
+    """
+    Get the screens known to Qt, sorted by position. The QApplication must exist.
+
+    Returns:
+        list of QScreen: The screens.
+    """
+    screens = QtGui.QGuiApplication.screens()
+    return sorted(screens, key=lambda screen: (screen.geometry().x(), screen.geometry().y()))
 
 def get_screens(screen_number=None):
     """
-    Get the available screens and their resolutions.
+    Get the available screens and their resolutions, from Qt.
     
     Args:
         screen_number (int, optional): The screen number to return, user-friendly (starting from 1). If None, all screens are returned.
@@ -25,36 +54,8 @@ def get_screens(screen_number=None):
     Raises:
         SystemExit: If the provided screen_number is invalid.
     """
-    screens = []
-
-    if config.is_mac:
-        # macOS
-
-        result = subprocess.run(['displayplacer', 'list'], capture_output=True, text=True)
-        for line in result.stdout.splitlines():
-            if 'Resolution:' in line:
-                res = line.split(': ')[1]
-            if 'Origin' in line:
-                origin = line.split(': ')[1].replace('(', '').replace(')', '').split(' ')[0]
-                x, y = origin.split(',')
-                screens.append((res, int(x), int(y)))
-    elif config.is_linux:
-        result = subprocess.run(['xrandr', '--query'], capture_output=True, text=True)
-        for line in result.stdout.splitlines():
-            if ' connected' in line:
-                parts = line.split()
-                res = parts[2]
-                x, y = map(int, res.split('+')[1:])
-                screens.append((res.split('+')[0], x, y))
-    elif config.is_windows:
-        # Windows
-        result = subprocess.run(['wmic', 'path', 'Win32_VideoController', 'get', 'VideoModeDescription'], capture_output=True, text=True)
-        for line in result.stdout.splitlines():
-            if 'x' in line:
-                res = line.strip()
-                screens.append((res, 0, 0))
-    
-    screens.sort(key=lambda screen: (screen[1], screen[2]))
+    screens = [screen_geometry(screen) for screen in list_screens()]
+
     if screen_number is not None:
         if 1 <= screen_number <= len(screens):
             screens = [screens[screen_number - 1]]
@@ -63,6 +64,108 @@ def get_screens(screen_number=None):
 
     return screens
 
+def scale_slots(slots, old_screen, new_screen):
+    """
+    Fit the slots of a screen to a new geometry, keeping their layout.
+
+    Args:
+        slots (list of tuples): The slots of the screen, (screen_index, x, y, width, height).
+        old_screen (tuple): The screen the slots were computed for, (resolution, x, y).
+        new_screen (tuple): The new screen geometry, (resolution, x, y).
+
+    Returns:
+        list of tuples: The slots on the new geometry, same order and screen index.
+    """
+    old_resolution, old_x, old_y = old_screen
+    new_resolution, new_x, new_y = new_screen
+    old_width, old_height = map(int, old_resolution.split('x'))
+    new_width, new_height = map(int, new_resolution.split('x'))
+    scaled = []
+    for screen_index, x, y, width, height in slots:
+        # Scale the edges rather than the sizes, so adjacent slots stay adjacent
+        left = round((x - old_x) * new_width / old_width)
+        top = round((y - old_y) * new_height / old_height)
+        right = round((x - old_x + width) * new_width / old_width)
+        bottom = round((y - old_y + height) * new_height / old_height)
+        scaled.append((screen_index, new_x + left, new_y + top, right - left, bottom - top))
+    return scaled
+
+def get_portrait_share(video_paths):
+    """
+    Estimate the share of portrait videos in the library, from the metadata
+    cache filled by the previous runs. Videos never probed are not counted.
+
+    Args:
+        video_paths (list of str): The video paths.
+
+    Returns:
+        tuple: (share, aspect), the share of portrait videos among the probed ones
+            and their median width / height ratio, (0, None) without portrait video.
+    """
+    cache = MediaCache()
+    aspects = []
+    for path in random.sample(video_paths, min(HISTOGRAM_SAMPLE, len(video_paths))):
+        info = cache.get(path)
+        if info is None:
+            continue
+        width, height = info.display_size
+        if width and height:
+            aspects.append(width / height)
+    portrait = [aspect for aspect in aspects if aspect < PORTRAIT_ASPECT]
+    landscape = [aspect for aspect in aspects if aspect > LANDSCAPE_ASPECT]
+    log(f"Aspect histogram of {len(aspects)} probed video(s): {len(portrait)} portrait, "
+        f"{len(aspects) - len(portrait) - len(landscape)} square, {len(landscape)} landscape")
+    if not portrait:
+        return 0, None
+    return len(portrait) / len(aspects), statistics.median(portrait)
+
+def get_grid(slots_per_screen):
+    """
+    Get the grid of a screen for a number of slots.
+
+    Args:
+        slots_per_screen (int): The minimum number of slots per screen.
+
+    Returns:
+        tuple: (rows, cols).
+    """
+    if config.bestfit:
+        best_fit = None
+        min_diff = float('inf')
+        for rows in range(1, slots_per_screen + 1):
+            cols = ceil(slots_per_screen / rows)
+            diff = abs(rows - cols)
+            if diff < min_diff:
+                min_diff = diff
+                best_fit = (rows, cols)
+        return best_fit
+    optimized_slots_per_screen = ceil(sqrt(slots_per_screen)) ** 2
+    slots_per_side = ceil(sqrt(optimized_slots_per_screen))
+    return (slots_per_side, slots_per_side)
+
+def required_players(screens):
+    """
+    Get the number of players the requested layout needs, regardless of the videos found.
+
+    Args:
+        screens (list of tuples): A list of screen resolutions and positions.
+
+    Returns:
+        int: The number of distinct videos needed to fill the slots, or None in
+            single-loop mode, where the whole list is needed.
+    """
+    if config.singleloop:
+        return None
+    if config.total_number:
+        required = config.total_number
+    elif config.number:
+        required = len(screens) * config.number
+    else:
+        required = len(screens)
+    if config.max:
+        required = min(required, config.max)
+    return required
+
 def get_slots(video_paths, screens):
     """
     Calculate the slots needed based on the number of screens and videos.
@@ -82,8 +185,13 @@ def get_slots(video_paths, screens):
 
     if config.singleloop:
         log(f"Single loop: {config.singleloop}")
-        # single loop shows a player for each video in the list
+        # single loop shows every video once per loop, on a player for each
+        # video unless a number of players is requested
         min_players = len(video_paths)
+        if config.total_number:
+            min_players = min(config.total_number, min_players)
+        elif config.number:
+            min_players = min(len(screens) * config.number, min_players)
     elif config.total_number:
         config.total_number = min(config.total_number, videos_count)
         log(f"Requested total number of players: {config.total_number}")
@@ -100,29 +208,37 @@ def get_slots(video_paths, screens):
         # set total players to minimum value between config.max, config.number and len(video_paths)
         min_players = min(config.max, config.number if config.number else min_players, len(video_paths))
 
-        # TODO: shuffle if needed, then truncate the list
+        # The video list is already picked randomly and truncated at discovery (see main.py)
         # video_paths = video_paths[:config.max]
     else:
         config.max = config.number if config.number else min_players
     
     # Calculate actual best fit for slots. Divide each screen into slots by x,y
     min_slots_per_screen = ceil(min_players / len(screens))
-    optimized_slots_per_screen = ceil(sqrt(min_slots_per_screen)) ** 2
+    slots_grid = get_grid(min_slots_per_screen)
+
+    # Mixed tiles: portrait tiles spanning several rows, for the share of portrait videos.
+    # The grid gets the extra cells the portrait tiles take, so the number of players is kept
+    portrait_tiles = 0
+    portrait_rows = 1
+    if config.mixed_tiles and min_slots_per_screen >= 2:
+        share, portrait_aspect = get_portrait_share(video_paths)
+        if share >= MIN_PORTRAIT_SHARE:
+            screen_width, screen_height = map(int, screens[0][0].split('x'))
+            portrait_tiles = round(share * min_slots_per_screen)
+            for _ in range(2):
+                rows, cols = slots_grid
+                cell_aspect = (screen_width / cols) / (screen_height / rows)
+                portrait_rows = min(rows, max(2, round(cell_aspect / portrait_aspect)))
+                if portrait_rows < 2:
+                    portrait_tiles = 0
+                    break
+                slots_grid = get_grid(min_slots_per_screen + portrait_tiles * (portrait_rows - 1))
+            rows, cols = slots_grid
+            portrait_tiles = min(portrait_tiles, cols * (rows // portrait_rows)) if portrait_rows >= 2 else 0
+            log(f"Mixed tiles: {share:.0%} portrait videos (median aspect {portrait_aspect:.2f}), "
+                f"{portrait_tiles} portrait tile(s) of {portrait_rows} rows per screen")
 
-    best_fit = None
-    if config.bestfit:
-        min_diff = float('inf')
-        for rows in range(1, min_slots_per_screen + 1):
-            cols = ceil(min_slots_per_screen / rows)
-            diff = abs(rows - cols)
-            if diff < min_diff:
-                min_diff = diff
-                best_fit = (rows, cols)
-        slots_grid = best_fit
-    else:
-        slots_per_side = ceil(sqrt(optimized_slots_per_screen))
-        slots_grid = (slots_per_side, slots_per_side)
-    
     slots_per_screen = slots_grid[0] * slots_grid[1]
     log(f"Slots per screen: {slots_per_screen}")
 
@@ -144,13 +260,13 @@ def get_slots(video_paths, screens):
     for screen in screens:
         ignore_slots = set()  # Initialiser pour chaque écran
         res, x, y = screen
-        log("Screen resolution " + res + " at position " + str((x, y)))
+        log("Screen resolution %s at position %s", res, (x, y))
         width, height = map(int, res.split('x'))
         rows, cols = slots_grid
-        log(f"  Rows: {rows}, Cols: {cols}")
+        log("  Rows: %s, Cols: %s", rows, cols)
         slot_default_width = width // cols
         slot_default_height = height // rows
-        log(f"  Slots dimensions: {slot_default_width}x{slot_default_height}")
+        log("  Slots dimensions: %sx%s", slot_default_width, slot_default_height)
 
         # Calculer les empty_slots pour cet écran
         if config.total_number:
@@ -158,15 +274,30 @@ def get_slots(video_paths, screens):
         elif config.number:  # if number is set, manage per screen to distribute evenly
             empty_slots_screen = slots_per_screen - min(config.number, videos_count)
         else:
-            empty_slots_screen = 0  # Par défaut 0 slot vide
+            # One player per screen by default, or the share of the videos in single-loop mode.
+            # The cells left over by the grid are merged, including the ones taken by portrait tiles
+            empty_slots_screen = slots_per_screen - min_slots_per_screen
+
+        log("  Empty slots for this screen: %s", empty_slots_screen)
 
-        log(f"  Empty slots for this screen: {empty_slots_screen}")
+        # Portrait tiles in the rightmost columns, each one takes the empty slots below its top cell
+        portrait_tops = set()
+        portrait_cells = set()
+        for col in range(cols - 1, -1, -1):
+            for top in range(0, rows - portrait_rows + 1, portrait_rows):
+                if len(portrait_tops) >= portrait_tiles or empty_slots_screen < portrait_rows - 1:
+                    break
+                portrait_tops.add((top, col))
+                portrait_cells.update((row, col) for row in range(top, top + portrait_rows))
+                ignore_slots.update((row, col) for row in range(top + 1, top + portrait_rows))
+                empty_slots_screen -= portrait_rows - 1
+                empty_slots = max(empty_slots - (portrait_rows - 1), 0)
 
         for row in range(rows):
             for col in range(cols):
-                log("Checking slot " + str((row, col)))
+                log('debug', "Checking slot %s", (row, col))
                 if (row, col) in ignore_slots:
-                    log("slot " + str((row, col)) + " is in ignore list, skipping")
+                    log('debug', "slot %s is in ignore list, skipping", (row, col))
                     continue
 
                 slot_x = x + col * slot_default_width
@@ -174,14 +305,17 @@ def get_slots(video_paths, screens):
                 current_slot_height = slot_default_height
                 current_slot_width = slot_default_width
 
-                if empty_slots_screen >= 1 and row < rows - 1:
-                    log(f"slot {row},{col}: {empty_slots_screen} empty slots left and a slot is available below")
+                if (row, col) in portrait_tops:
+                    current_slot_height *= portrait_rows
+                    log('debug', "slot %s,%s: portrait tile over %s rows", row, col, portrait_rows)
+                elif empty_slots_screen >= 1 and row < rows - 1 and (row + 1, col) not in portrait_cells:
+                    log('debug', "slot %s,%s: %s empty slots left and a slot is available below", row, col, empty_slots_screen)
                     ignore_slots.add((row + 1, col))
                     current_slot_height *= 2
                     empty_slots_screen -= 1
                     empty_slots = max(empty_slots - 1, 0)
-                    if empty_slots_screen >= 2 and col < cols - 1:
-                        log(f"{empty_slots_screen} empty slots left and two slots are available aside")
+                    if empty_slots_screen >= 2 and col < cols - 1 and (row, col + 1) not in portrait_cells and (row + 1, col + 1) not in portrait_cells:
+                        log('debug', "%s empty slots left and two slots are available aside", empty_slots_screen)
                         ignore_slots.add((row, col + 1))
                         ignore_slots.add((row + 1, col + 1))
                         current_slot_width *= 2
@@ -191,9 +325,9 @@ def get_slots(video_paths, screens):
                 # Assigner le slot
                 slots.append((screen_index, slot_x, slot_y, current_slot_width, current_slot_height))
 
-                log(f"  Slot {slot_index} {current_slot_width}x{current_slot_height} at ({slot_x}, {slot_y})")
+                log("  Slot %s %sx%s at (%s, %s)", slot_index, current_slot_width, current_slot_height, slot_x, slot_y)
                 slot_index += 1
         screen_index +=1
 
-    log("Slots: " + str(slots))
+    log("Slots: %s", slots)
     return slots
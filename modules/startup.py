@@ -0,0 +1,140 @@
+# modules/startup.py - Start-up scheduler, bringing the wall slots up in waves.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+import time
+from collections import deque
+from PyQt5 import QtCore
+from PyQt5.QtCore import pyqtSignal
+
+import modules.config as config
+import modules.utils as utils   # all functions accessible with utils.function()
+from modules.utils import *     # main functions accessible as function() for ease of use, e.g. log(), error(), exit_with_error()
+
+TICK_INTERVAL = 10      # Milliseconds between two waves, leaves the event loop free in between
+OPEN_TIMEOUT = 10       # Seconds after which a slot still opening its first video no longer counts against the cap
+
+class StartupScheduler(QtCore.QObject):
+    """
+    Create and start the players of the wall progressively, once its windows are shown.
+
+    Building every player at once freezes the interface until the last one is
+    ready and makes all the slots open their files at the same instant. The
+    scheduler creates players from the event loop instead, as many as fit in
+    the time budget of each tick, and never has more than the concurrency cap
+    of slots opening their first video at the same time. A slot stops counting
+    against the cap when its first frame is displayed, or after OPEN_TIMEOUT.
+
+    Attributes:
+        finished (pyqtSignal): Emitted when all the players are created.
+    """
+
+    finished = pyqtSignal()
+
+    def __init__(self, wall, slots, concurrency=None, budget=None, parent=None):
+        """
+        Initialize the scheduler and start the first wave from the event loop.
+
+        Args:
+            wall (Wall): The wall, creating the players with create_player().
+            slots (list): The pending slots, in start order, as accepted by wall.create_player().
+            concurrency (int, optional): Maximum number of slots opening their first video at once,
+                0 for no limit, defaults to config.startup_concurrency.
+            budget (float, optional): Milliseconds spent creating players per tick, defaults to config.startup_budget.
+            parent (QObject, optional): The parent object.
+        """
+        super(StartupScheduler, self).__init__(parent)
+        self.wall = wall
+        self.pending = deque(slots)
+        self.total = len(self.pending)
+        self.concurrency = concurrency if concurrency is not None else config.startup_concurrency
+        self.budget = (budget or config.startup_budget or 20) / 1000
+        self.opening = {}   # slot index => time it was started
+        self.start = time.monotonic()
+        self.ticks = 0
+        self.longest_tick = 0
+        self.done = not self.pending
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.tick)
+        if not self.done:
+            self.timer.start(TICK_INTERVAL)
+
+    def add(self, slots):
+        """
+        Schedule more slots, e.g. for a screen plugged while playing.
+
+        Args:
+            slots (list): The pending slots, as accepted by wall.create_player().
+        """
+        if not slots:
+            return
+        if self.done:
+            # New start-up phase
+            self.done = False
+            self.start = time.monotonic()
+            self.total = 0
+            self.ticks = 0
+            self.longest_tick = 0
+        self.pending.extend(slots)
+        self.total += len(slots)
+        if not self.timer.isActive():
+            self.timer.start(TICK_INTERVAL)
+
+    def discard(self, screen_index):
+        """
+        Forget the pending slots of a screen, e.g. when it is unplugged.
+
+        Args:
+            screen_index (int): The screen index.
+        """
+        pending = deque(slot for slot in self.pending if slot[1] != screen_index)
+        self.total -= len(self.pending) - len(pending)
+        self.pending = pending
+
+    def started(self, slot_index):
+        """
+        Free the place of a slot in the concurrency cap, when its first frame is displayed.
+
+        Args:
+            slot_index (int): The slot index.
+        """
+        self.opening.pop(slot_index, None)
+
+    def tick(self):
+        """
+        Create and start the next players, within the time budget and the concurrency cap.
+        """
+        now = time.monotonic()
+        deadline = now + self.budget
+        for slot_index, since in list(self.opening.items()):
+            if now - since > OPEN_TIMEOUT:
+                log(f"Slot {slot_index} still opening after {OPEN_TIMEOUT}s, starting the next slots anyway")
+                del self.opening[slot_index]
+
+        created = 0
+        while self.pending and time.monotonic() < deadline:
+            if self.concurrency and len(self.opening) >= self.concurrency:
+                break
+            slot = self.pending.popleft()
+            player = self.wall.create_player(*slot)
+            if player is None:
+                continue
+            self.opening[player.slot_index] = time.monotonic()
+            player.start()
+            created += 1
+
+        if created:
+            self.ticks += 1
+            elapsed = time.monotonic() - now
+            self.longest_tick = max(self.longest_tick, elapsed)
+            log(f"Start-up wave {self.ticks}: {created} player(s) in {elapsed * 1000:.1f}ms, "
+                f"{self.total - len(self.pending)}/{self.total} created, {len(self.opening)} opening")
+
+        if not self.pending:
+            self.timer.stop()
+            self.done = True
+            log(f"All {self.total} slots created in {time.monotonic() - self.start:.3f}s, {self.ticks} wave(s), "
+                f"longest {self.longest_tick * 1000:.1f}ms")
+            self.finished.emit()
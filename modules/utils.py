@@ -14,18 +14,70 @@ import os
 import subprocess
 import re
 import argparse
+import queue
+import atexit
 import threading
 import logging
+import logging.handlers
 
 import modules.config as config
 
 # Get the logger for the module
 logger = logging.getLogger(__name__)
 
+# Log levels accepted as first argument of log()
+LEVELS = {
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'warning': logging.WARNING,
+    'error': logging.ERROR,
+    'critical': logging.CRITICAL
+}
+
+# %-style placeholders, a % followed by a space or the end of the message is a literal one
+PLACEHOLDER = re.compile(r'%(\([^)]*\))?[-#0+]*(\d+|\*)?(\.(\d+|\*))?[diouxXeEfFgGcrsa%]')
+
+# Arguments kept as they are until the record is written, the other ones are converted to strings
+IMMUTABLE_ARGS = (str, int, float, bytes, tuple, frozenset, type(None))
+
+log_listener = None     # The background thread writing the log records
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue the log records as they are, they are formatted by the listener thread.
+
+    The standard QueueHandler formats the message in the calling thread, so it
+    can be pickled. The queue never leaves the process, the Qt thread and the
+    libvlc callback threads only pay for creating the record. The arguments
+    that could change before the record is written, e.g. lists or objects,
+    are converted to strings when the record is queued.
+    """
+
+    def prepare(self, record):
+        if isinstance(record.args, tuple) and not all(isinstance(arg, IMMUTABLE_ARGS) for arg in record.args):
+            record.args = tuple(arg if isinstance(arg, IMMUTABLE_ARGS) else str(arg) for arg in record.args)
+        return record
+
+def stop_logging():
+    """
+    Write the pending log records and stop the logging thread.
+    """
+    global log_listener
+    if log_listener is not None:
+        log_listener.stop()
+        log_listener = None
+
+# Flush the pending records on exit
+atexit.register(stop_logging)
+
 def setup_logging(log_level=logging.WARNING):
     """
     Configure logging for the application.
 
+    Records are written to the console, and to a rotating file if config.log_file
+    is set, by a background thread, so a slow terminal or disk never blocks
+    the interface or the players.
+
     Args:
         app (QApplication): The application object.
         log_level (int): The logging level to set.
@@ -33,6 +85,7 @@ def setup_logging(log_level=logging.WARNING):
     Returns:
         None
     """
+    global log_listener
     app_name = config.app_name
     if not app_name:
         app_name = os.path.basename(sys.argv[0])
@@ -50,44 +103,60 @@ def setup_logging(log_level=logging.WARNING):
 
     config.log_level = log_level
 
+    console = logging.StreamHandler(sys.stdout)        # Affiche les logs dans la console
+    console.setFormatter(logging.Formatter(f'{app_name} [%(levelname)s] %(name)s: %(message)s'))
+    handlers = [console]
+    log_file = getattr(config, 'log_file', None)
+    if log_file:
+        # Écrit les logs dans un fichier, avec rotation
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=int((config.log_max_size or 10) * 1024 * 1024), backupCount=config.log_backups or 0, encoding='utf-8')
+        file_handler.setFormatter(logging.Formatter(f'%(asctime)s {app_name} [%(levelname)s] %(name)s: %(message)s'))
+        handlers.append(file_handler)
+
+    stop_logging()
+    log_queue = queue.SimpleQueue()
+    log_listener = logging.handlers.QueueListener(log_queue, *handlers)
+    log_listener.start()
+
     logging.basicConfig(
         level=log_level,
-        format=f'{app_name} [%(levelname)s] %(name)s: %(message)s',
-        handlers=[
-            logging.StreamHandler(sys.stdout),        # Affiche les logs dans la console
-            # logging.FileHandler("app.log")            # Écrit les logs dans un fichier
-        ]
+        handlers=[DeferredQueueHandler(log_queue)],
+        force=True,
     )
 
 def log(message, *args):
     """
     Log a message with the appropriate log level if specified, otherwise use the 'info' level.
 
+    Nothing is formatted if the level is disabled. With %-style placeholders
+    in the message, the arguments are only merged by the logging thread, e.g.
+    log('debug', "Slot %s at %s", index, position), prefer it to f-strings
+    in frequent calls. Without placeholders, the arguments are appended to
+    the message, separated by spaces.
+
     Args:
         message (str): message to log. If the message is a key in the levels dictionary, it will be used as the log level.
-        *args: Additional message parts
+        *args: Additional message parts, or the %-style arguments of the message
 
     Returns:
         None
     """
-    levels = {
-        'debug': logging.DEBUG,
-        'info': logging.INFO,
-        'warning': logging.WARNING,
-        'error': logging.ERROR,
-        'critical': logging.CRITICAL
-    }
-    if message in levels:
-        level = message
+    if message in LEVELS:
+        level = LEVELS[message]
         if not args:
             return # Pas de message à logger
-        message = " ".join(str(arg) for arg in args).rstrip()
+        message, args = args[0], args[1:]
     else:
-        level = 'info'
-        if args:
-            message += " " + " ".join(str(arg) for arg in args).rstrip()
+        level = logging.INFO
 
-    logger.log(levels[level], message)
+    if not logger.isEnabledFor(level):
+        return
+    if args and not PLACEHOLDER.search(str(message)):
+        # Appended, the result is logged as is, a literal % in the message or the arguments is kept
+        message = f"{message} " + " ".join(str(arg) for arg in args).rstrip()
+        args = ()
+    logger.log(level, message, *args)
 
 def error(message, *args, error_code=1):
     """
@@ -162,43 +231,88 @@ def valid_volume(value):
         raise argparse.ArgumentTypeError(f"Volume must be between 0 and 200 (less than 100 recommended), received {ivalue}.")
     return ivalue
 
-def find_videos(directory, days=None):
+def find_videos(directories, days=None):
     """
-    Find video files in the specified directory.
+    Find video files in the specified directories.
+
+    The directories are walked natively and in parallel, see modules/scanner.py.
     
     Args:
-        directory (str): The directory to search for video files.
+        directories (str or list of str): The directory or directories to search for video files.
         days (int, optional): The number of days to look back for videos. If None, all videos are considered.
     
     Returns:
         list of str: A list of paths to found video files.
     """
-    log("Finding videos in directory " + os.path.abspath(directory))
+    from modules.scanner import find_videos as scan_videos
 
-    directory = os.path.abspath(directory)
+    if isinstance(directories, str):
+        directories = [directories]
 
-    # TODO: handle alternative to find for Windows
-    command = ['find', directory, '(', '-type', 'f', '-o', '-type', 'l', ')']
-    if days:
-        command.extend(['-mtime', f'-{days}'])
+    log("Finding videos in " + ", ".join(os.path.abspath(directory) for directory in directories))
 
-    log("Running command: " + ' '.join(command))
-    try:
-        result = subprocess.run(command, capture_output=True, text=True, check=True)
-    except subprocess.CalledProcessError as e:
-        exit_with_error(f"Error running find command: {e}")
+    return scan_videos(directories, days)
 
-    # log("Command output: " + result.stdout)
+def get_cache_dir():
+    """
+    Get the user cache directory of the application, creating it if needed.
+
+    Uses ~/Library/Caches on macOS, %LOCALAPPDATA% on Windows and $XDG_CACHE_HOME
+    (or ~/.cache) on Linux.
+
+    Returns:
+        str: The path to the cache directory.
+    """
+    if config.is_mac:
+        base = os.path.expanduser('~/Library/Caches')
+    elif config.is_windows:
+        base = os.getenv('LOCALAPPDATA') or os.path.expanduser('~\\AppData\\Local')
+    else:
+        base = os.getenv('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
 
-    files = result.stdout.splitlines()
+    cache_dir = os.path.join(base, 'walloli')
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
 
-    # Utiliser grep pour filtrer les fichiers vidéo et exclure ceux dont le nom commence par un point
-    video_extensions = re.compile(r'.*\.(avi|mp4|webm|m4v|mkv|wmv|mov|mpe?g)(\.part)?$', re.IGNORECASE)
-    videos = [file for file in files if video_extensions.match(os.path.basename(file)) and not os.path.basename(file).startswith('.')]
+def get_rss():
+    """
+    Get the resident memory size of the current process.
 
-    log(f"Found {len(videos)} video(s)")
+    Uses /proc on Linux. Elsewhere, falls back to the peak resident size
+    reported by getrusage, when available.
 
-    return videos
+    Returns:
+        int: The resident size in bytes, or None if it cannot be measured.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, in kilobytes elsewhere
+    return peak if config.is_mac else peak * 1024
+
+def format_bytes(size):
+    """
+    Format a size in bytes for humans.
+
+    Args:
+        size (int): The size in bytes, or None.
+
+    Returns:
+        str: The formatted size, e.g. "12.3 MB", or "?" if unknown.
+    """
+    if size is None:
+        return "?"
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{size} B"
+        size /= 1024
 
 def prevent_sleep():
     """
@@ -2,145 +2,657 @@
 
 import os
 import sys
-from itertools import cycle
+import time
+import threading
+from collections import deque
 from PyQt5 import QtWidgets, QtCore, QtGui
 from PyQt5.QtCore import pyqtSignal, QTimer
 import vlc
-import logging
 
 import modules.config as config
 import modules.utils as utils   # all functions accessible with utils.function()
 from modules.utils import *     # main functions accessible as function() for ease of use, e.g. log(), error(), exit_with_error()
+from modules import probe, profiles, vlcpool
+from modules.compositor import FrameBuffer
+
+MAX_SKIPS_PER_TICK = 16    # Videos checked per attempt before yielding to the event loop
+SKIP_RETRY_DELAY = 1000     # Milliseconds before trying again when no playable video was found
 
 class VideoPlayer(QtWidgets.QFrame):
     """
     A class to represent a video player widget using VLC.
 
+    Each player owns two VLC media players stacked in the same slot. While one
+    plays, the other one pre-rolls the next video given by the dispatcher and
+    waits, paused, under it. At the end of the video they are swapped, so the
+    next video starts without a black gap or a file opening delay.
+
     Attributes:
-        playlist: A cycle iterator for the video playlist.
+        dispatcher: The wall-wide dispatcher handing out the next videos.
+        slot_index: The index of the slot, identifying the player to the dispatcher.
         current_media: The current media being played.
         video_path: The path to the current video file.
+        next_path: The path to the pre-rolled video file, if any.
+        switch_latency: The duration in seconds of the last switch between two videos.
+        switch_latencies: The durations of the recent switches, for statistics.
     """
 
     # Define a signal for when the video has finished playing
     video_finished = pyqtSignal()
-
-    def __init__(self, playlist, parent=None, width=300, height=200, color=None):
+    # Define a signal for when a video output starts displaying frames
+    playback_started = pyqtSignal()
+    # Internal signals, to handle VLC events in the main thread
+    deck_playing = pyqtSignal(int)
+    deck_error = pyqtSignal(int)
+
+    def __init__(self, dispatcher, slot_index=0, parent=None, width=300, height=200, color=None, prober=None, instance=None,
+                 decoder_threads=None, quarantine=None, proxy=None, compositor=None):
         """
-        Initialize the video player with a playlist of video paths.
+        Initialize the video player with the dispatcher giving its videos.
 
         Args:
-            playlist: A list of video paths to play.
+            dispatcher: The Dispatcher handing out the videos to play.
+            slot_index: The index of the slot.
             parent: The parent widget for the video player.
             width: The width of the video player.
             height: The height of the video player.
             color: The background color of the video player.
+            prober: The media prober giving video dimensions before playback, if any.
+            instance: The shared libvlc instance to use, a new one is created if None.
+            decoder_threads: The decoder threads allocated to this player by the wall, if any.
+            quarantine: The list of files that failed to play, shared by the players, if any.
+            proxy: The proxy cache, to play low-resolution proxies of heavy videos, if any.
+            compositor: The CompositorSurface drawing this player, None to render in native windows.
         """
         super(VideoPlayer, self).__init__(parent)
-        self.playlist = cycle(playlist)  # Infinite cycle over the playlist
+        self.dispatcher = dispatcher
+        self.slot_index = slot_index
         self.current_media = None
-        self.video_path = None
+        self.prober = prober
+        self.preroll = not config.no_preroll
+        self.players = []
+        self.video_widgets = []
+        self.paths = []
+        self.active = 0
+        self.switch_started = None
+        self.switch_latency = None
+        self.switch_latencies = deque(maxlen=100)
+        self.slot_width = width
+        self.slot_height = height
+        self.decoder_threads = decoder_threads
+        self.quarantine = quarantine
+        self.proxy = proxy
+        self.compositor = compositor
+        self.frame_buffers = []
+        self.retry_pending = False
+        self.profile_override = None    # Decoder profile forced by the quality governor
+        self.extra_options = []         # Additional media options set by the quality governor
+        self.suspended = False          # Paused by the quality governor
+        self.force_proxy = False        # Play a proxy even below the proxy thresholds, set by the quality governor
+        self.recoveries = 0             # Number of times the watchdog restarted this player
 
-        self.setStyleSheet("background-color: black;")
         self.setGeometry(0, 0, width, height)  # Set size according to the slot
 
-        if color is not None:        
-            self.setStyleSheet(f"background-color: {color.name()}; border: solid 5px {color.name()};")
+        # With the compositor, the player is transparent and drawn by the surface under it
+        if compositor is None:
+            self.setStyleSheet("background-color: black;")
+            if color is not None:
+                self.setStyleSheet(f"background-color: {color.name()}; border: solid 5px {color.name()};")
         
         # Enable focus
         self.setFocusPolicy(QtCore.Qt.StrongFocus)
 
-        # Create a widget for video rendering
-        self.video_widget = QtWidgets.QFrame(self)
-        self.video_widget.setGeometry(0, 0, width, height)
-        self.video_widget.setStyleSheet("background-color: black;")
-
-        # VLC is very chatty, show output only in DEBUG mode
-        vlc_args = []
-        if config.log_level > logging.DEBUG:
-            vlc_args.append('--quiet')  # Suppress VLC messages
-
         try:
-            self.instance = vlc.Instance(*vlc_args)
-            self.player = self.instance.media_player_new()
+            self.instance = instance or vlc.Instance(*vlcpool.vlc_arguments())
         except Exception as e:
             log(f"Error initializing VLC: {e}")
             return
 
+        # One deck (widget and media player) for the current video, another one to pre-roll the next video
+        for index in range(2 if self.preroll else 1):
+            # Create a widget for video rendering
+            video_widget = QtWidgets.QFrame(self)
+            video_widget.setGeometry(0, 0, width, height)
+            if compositor is None:
+                video_widget.setStyleSheet("background-color: black;")
+
+            try:
+                player = self.create_media_player(index, video_widget)
+            except Exception as e:
+                log(f"Error initializing VLC: {e}")
+                return
+
+            self.players.append(player)
+            self.video_widgets.append(video_widget)
+            self.paths.append(None)
+
+        # Connect the video_finished signal to play_next_video slot
+        self.video_finished.connect(self.play_next_video)
+        self.deck_playing.connect(self.on_deck_playing)
+        self.deck_error.connect(self.on_deck_error)
+
+    def start(self):
+        """
+        Start the first video. Called by the wall start-up scheduler, so all
+        the slots do not open their files at once.
+        """
+        self.play_next_video()
+
+    def create_media_player(self, index, video_widget):
+        """
+        Create the VLC media player of a deck, rendering in its widget or its frame buffer.
+
+        Args:
+            index: The index of the deck.
+            video_widget: The widget of the deck.
+
+        Returns:
+            vlc.MediaPlayer: The media player.
+        """
+        player = self.instance.media_player_new()
+
         # Configure video output based on the operating system
-        if config.is_mac:
-            self.player.set_nsobject(int(self.video_widget.winId()))
+        if self.compositor is not None:
+            # Decode into memory, the compositor draws the frames
+            frame_buffer = FrameBuffer(player, self.slot_width, self.slot_height)
+            if index < len(self.frame_buffers):
+                self.frame_buffers[index] = frame_buffer
+            else:
+                self.frame_buffers.append(frame_buffer)
+        elif config.is_mac:
+            player.set_nsobject(int(video_widget.winId()))
         elif config.is_linux:
-            self.player.set_xwindow(self.video_widget.winId())
+            player.set_xwindow(video_widget.winId())
         elif config.is_windows:
-            self.player.set_hwnd(self.video_widget.winId())
-        
+            player.set_hwnd(video_widget.winId())
+
         # Connect the end of media event to the handler
-        events = self.player.event_manager()
-        events.event_attach(vlc.EventType.MediaPlayerEndReached, self.on_end_reached)
-        
+        events = player.event_manager()
+        events.event_attach(vlc.EventType.MediaPlayerEndReached, self.on_end_reached, index)
+
         # Connect the playing event to apply_panscan
-        events.event_attach(vlc.EventType.MediaPlayerPlaying, self.on_playing)
+        events.event_attach(vlc.EventType.MediaPlayerPlaying, self.on_playing, index)
 
-        # Connect the video_finished signal to play_next_video slot
-        self.video_finished.connect(self.play_next_video)
+        # Connect the video output event, sent when the first frame is about to be displayed
+        events.event_attach(vlc.EventType.MediaPlayerVout, self.on_vout, index)
+
+        # Connect the error event, sent when a file cannot be opened or decoded
+        events.event_attach(vlc.EventType.MediaPlayerEncounteredError, self.on_error, index)
 
         # Set the volume
-        self.player.audio_set_volume(config.volume)
+        player.audio_set_volume(config.volume)
+        return player
+
+    def dispose_deck(self, index):
+        """
+        Give the video of a deck back to the dispatcher and get rid of its VLC media player.
+
+        The media player is stopped and released in a background thread, as
+        stopping a player blocked on a hung file can take a long time. In
+        compositor mode, the frame buffer of the deck is kept until then, as
+        its callbacks are called by the player until it is released.
 
-        # Start the first video
+        Args:
+            index: The index of the deck.
+
+        Returns:
+            threading.Thread: The thread disposing of the media player.
+        """
+        old_player = self.players[index]
+        old_frame_buffer = self.frame_buffers[index] if index < len(self.frame_buffers) else None
+        if self.paths[index] is not None:
+            self.dispatcher.release(self.slot_index, self.paths[index])
+            self.paths[index] = None
+
+        events = old_player.event_manager()
+        for event_type in (vlc.EventType.MediaPlayerEndReached, vlc.EventType.MediaPlayerPlaying,
+                           vlc.EventType.MediaPlayerVout, vlc.EventType.MediaPlayerEncounteredError):
+            events.event_detach(event_type)
+
+        def dispose():
+            nonlocal old_frame_buffer
+            old_player.stop()
+            old_player.release()
+            old_frame_buffer = None
+
+        thread = threading.Thread(target=dispose, name='vlc-dispose', daemon=True)
+        thread.start()
+        return thread
+
+    def reset_deck(self, index):
+        """
+        Replace the VLC media player of a deck by a new one, e.g. when it is stuck.
+
+        Args:
+            index: The index of the deck.
+        """
+        self.dispose_deck(index)
+        self.players[index] = self.create_media_player(index, self.video_widgets[index])
+
+    def shutdown(self):
+        """
+        Stop the player for good, e.g. when its screen is unplugged. Its videos are
+        given back to the dispatcher, the widget can be deleted once the returned
+        threads are finished, the media players render into it until then.
+
+        Returns:
+            list of threading.Thread: The threads disposing of the media players.
+        """
+        threads = [self.dispose_deck(index) for index in range(len(self.players))]
+        self.players = []
+        self.frame_buffers = []
+        return threads
+
+    def recover(self, reason):
+        """
+        Tear down the slot media players and start again with the next video.
+        The current video is quarantined.
+
+        Args:
+            reason: Why the player is recovered, for the logs and the quarantine.
+        """
+        if not self.players:
+            return
+        path = self.video_path
+        self.recoveries += 1
+        log('warning', f"Recovering slot {self.slot_index} ({reason}), recovery {self.recoveries}, video {path}")
+        if path is not None and self.quarantine is not None:
+            self.quarantine.add(path, reason)
+        for index in range(len(self.players)):
+            self.reset_deck(index)
+        self.active = 0
+        self.switch_started = None
+        self.video_widget.raise_()
         self.play_next_video()
 
-    def on_playing(self, event):
+    @property
+    def player(self):
+        """
+        The VLC media player of the current video.
+        """
+        return self.players[self.active]
+
+    @property
+    def video_widget(self):
+        """
+        The widget rendering the current video.
+        """
+        return self.video_widgets[self.active]
+
+    @property
+    def video_path(self):
+        """
+        The path to the current video file.
+        """
+        return self.paths[self.active] if self.paths else None
+
+    @property
+    def frame_buffer(self):
+        """
+        The frame buffer of the current video, in compositor mode.
+        """
+        return self.frame_buffers[self.active] if self.frame_buffers else None
+
+    @property
+    def next_path(self):
         """
-        Handle the MediaPlayerPlaying event.
-        Apply panscan once the video starts playing.
+        The path to the pre-rolled video file, if any.
+        """
+        return self.paths[1 - self.active] if len(self.paths) > 1 else None
+
+    def on_playing(self, event, index):
+        """
+        Handle the MediaPlayerPlaying event, in a VLC thread.
+        Forward it to the main thread, where panscan is applied.
         
         Args:
             event: The event object.
+            index: The index of the deck sending the event.
         """
         # TODO: make sure there is actually a video playing, it seems to not always be the case
-        self.apply_panscan()
+        self.deck_playing.emit(index)
 
-    def play_next_video(self):
+    def on_deck_playing(self, index):
         """
-        Play the next video in the playlist.
+        Handle a deck starting to play, in the main thread.
+
+        For the current deck, measure the switch latency, apply panscan and start
+        pre-rolling the next video. For the standby deck, pause it on its first frames.
+
+        Args:
+            index: The index of the deck.
         """
-        try:
-            self.video_path = next(self.playlist)
-        except StopIteration:
-            log("Playlist is exhausted")
+        if self.paths[index] is None:
+            # Late event of a deck released since, or of a player shut down
+            return
+        if self.quarantine is not None:
+            self.quarantine.release(self.paths[index])
+
+        if index != self.active:
+            # Pre-rolled, keep it paused until the current video ends
+            self.players[index].set_pause(1)
+            self.apply_panscan(index)
+            log("Pre-rolled next video: %s", self.paths[index])
+            return
+
+        if self.switch_started is not None:
+            self.switch_latency = time.monotonic() - self.switch_started
+            self.switch_started = None
+            self.switch_latencies.append(self.switch_latency)
+            log("Switch latency: %.1fms", self.switch_latency * 1000)
+
+        self.apply_panscan(index)
+
+        if self.preroll and self.next_path is None:
+            self.preroll_next_video()
+
+    def on_vout(self, event, index):
+        """
+        Handle the MediaPlayerVout event.
+        Emit the playback_started signal when a video output is available.
+
+        Args:
+            event: The event object.
+            index: The index of the deck sending the event.
+        """
+        if index == self.active and event.u.new_count > 0:
+            self.playback_started.emit()
+
+    def on_error(self, event, index):
+        """
+        Handle the MediaPlayerEncounteredError event, in a VLC thread.
+        Forward it to the main thread.
+
+        Args:
+            event: The event object.
+            index: The index of the deck sending the event.
+        """
+        self.deck_error.emit(index)
+
+    def on_deck_error(self, index):
+        """
+        Handle a video that failed to open or decode, in the main thread.
+        Quarantine it and replace it with the next one.
+
+        Args:
+            index: The index of the deck.
+        """
+        path = self.paths[index]
+        if path is None:
             return
+        log("Error playing %s", path)
+        if self.quarantine is not None:
+            self.quarantine.add(path, "playback error")
+        self.release_deck(index)
+        if index == self.active:
+            self.play_next_video()
+        elif self.preroll:
+            self.preroll_next_video()
+
+    def next_video_path(self):
+        """
+        Take the next playable video from the dispatcher.
 
-        if not os.path.exists(self.video_path):
-            log(f"File not found, skipping {self.video_path}")
-            self.play_next_video()  # Skip to the next video
+        Missing and quarantined files are skipped and given back. At most
+        MAX_SKIPS_PER_TICK videos are checked, so a library full of broken
+        files never blocks the event loop.
+
+        Returns:
+            str: The path to the video file, or None if no file is available yet.
+        """
+        for _ in range(MAX_SKIPS_PER_TICK):
+            path = self.dispatcher.acquire(self.slot_index, self.slot_width / self.slot_height)
+            if path is None:
+                return None
+            try:
+                stat = os.stat(path)
+            except OSError:
+                log("File not found, skipping %s", path)
+                self.dispatcher.release(self.slot_index, path)
+                continue
+            if self.quarantine is not None and self.quarantine.is_quarantined(path, stat):
+                log("File in quarantine, skipping %s", path)
+                self.dispatcher.release(self.slot_index, path)
+                continue
+            return path
+        return None
+
+    def retry_later(self):
+        """
+        Try again to play a video after SKIP_RETRY_DELAY, from the event loop.
+        """
+        if self.retry_pending or not len(self.dispatcher):
             return
+        self.retry_pending = True
+
+        def retry():
+            self.retry_pending = False
+            if self.video_path is None:
+                self.play_next_video()
 
-        log(f"Playing next video: {self.video_path}")
+        QTimer.singleShot(SKIP_RETRY_DELAY, retry)
 
+    def load(self, index, path, muted=False, start_time=None):
+        """
+        Open a video on a deck and start playing it.
+
+        Args:
+            index: The index of the deck.
+            path: The path to the video file.
+            muted: Mute the audio, for pre-rolling.
+            start_time: The position to start from, in seconds.
+        """
+        player = self.players[index]
+        if self.paths[index] == path:
+            # Reopening the same video, keep it acquired
+            player.stop()
+        else:
+            self.release_deck(index)
+        self.paths[index] = path
+        source = self.proxy_source(path)
+        media = self.instance.media_new(source)
+        media.add_options(*self.decoder_options(path, proxied=source != path))
+        if self.extra_options:
+            media.add_options(*self.extra_options)
+        if start_time:
+            media.add_option(f":start-time={start_time:.3f}")
+        player.set_media(media)
+        player.video_set_key_input(True)
+        player.video_set_mouse_input(True)
+        player.audio_set_mute(muted)
+        player.audio_set_volume(config.volume)
+        player.play()
+
+        if self.prober is not None:
+            self.prober.request([path], probe.PRIORITY_HIGH)
+
+    def proxy_source(self, path):
+        """
+        Get the file to open for a video: its proxy if one is ready, the video itself otherwise.
+        A proxy is requested for heavy videos that have none yet, for the next time.
+
+        Args:
+            path: The path to the video file.
+
+        Returns:
+            str: The path to the file to open.
+        """
+        if self.proxy is None:
+            return path
+        proxy = self.proxy.get(path, self.slot_height)
+        if proxy is not None:
+            log("Playing proxy %s for %s", proxy, path)
+            return proxy
+        if self.prober is not None:
+            self.proxy.request(path, self.prober.get(path), self.slot_height, force=self.force_proxy)
+        return path
+
+    def decoder_options(self, path, proxied=False):
+        """
+        Get the decoder options for a video, based on the slot size and the probed source resolution.
+
+        Args:
+            path: The path to the video file.
+            proxied: The slot-sized proxy is played instead of the video.
+
+        Returns:
+            list of str: The libvlc media options.
+        """
+        source_width, source_height = 0, 0
+        info = self.prober.get(path) if self.prober is not None else None
+        if proxied:
+            source_width, source_height = self.slot_width, self.slot_height
+        elif info is not None:
+            source_width, source_height = info.display_size
+        profile = self.profile_override or profiles.select_profile(self.slot_width, self.slot_height, source_width, source_height)
+        options = profiles.media_options(profile, self.decoder_threads)
+        log("Decoder profile %s for %s (%sx%s in %sx%s): %s", profile, path, source_width, source_height, self.slot_width, self.slot_height, ' '.join(options))
+        return options
+
+    def release_deck(self, index):
+        """
+        Stop a deck and give its video back to the dispatcher.
+
+        Args:
+            index: The index of the deck.
+        """
+        self.players[index].stop()
+        if self.paths[index] is not None:
+            self.dispatcher.release(self.slot_index, self.paths[index])
+        self.paths[index] = None
+
+    def preroll_next_video(self):
+        """
+        Open the next video on the standby deck, muted, under the current one.
+        It is paused as soon as it starts playing.
+        """
+        if not self.players:
+            return
+        standby = 1 - self.active
+        path = self.next_video_path()
+        if path is None:
+            return
+        self.video_widgets[self.active].raise_()
         try:
-            self.player.stop()
-            media = self.instance.media_new(self.video_path)
-            self.player.set_media(media)
-            self.player.video_set_key_input(True)
-            self.player.video_set_mouse_input(True)
-            self.player.audio_set_volume(self.player.audio_get_volume())
+            self.load(standby, path, muted=True)
+        except Exception as e:
+            log(f"Error pre-rolling {path}: {e}")
+            if self.quarantine is not None:
+                self.quarantine.add(path, str(e))
+            self.release_deck(standby)
+
+    def play_next_video(self):
+        """
+        Play the next video, swapping to the pre-rolled one if available.
+        """
+        if not self.players:
+            return
+        self.switch_started = time.monotonic()
+
+        if self.next_path is not None:
+            # Swap decks, the next video is already opened and paused on its first frame
+            previous = self.active
+            self.active = 1 - previous
+            self.video_widget.raise_()
+            self.player.audio_set_mute(False)
             self.player.play()
-            log(f"Playing video: {self.video_path}")
+            self.release_deck(previous)
+            log("Playing next video: %s (pre-rolled)", self.video_path)
+            self.playback_started.emit()
+            return
+
+        # Give the finished video back first, it may be the only one available
+        self.release_deck(self.active)
+        path = self.next_video_path()
+        if path is None:
+            if len(self.dispatcher):
+                log("No playable video available for slot %s, retrying later", self.slot_index)
+            else:
+                log("No videos left to play")
+            self.retry_later()
+            return
+
+        log("Playing next video: %s", path)
+
+        try:
+            self.load(self.active, path)
+            log("Playing video: %s", path)
+        except Exception as e:
+            log(f"Error playing {path}: {e}")
+            if self.quarantine is not None:
+                self.quarantine.add(path, str(e))
+            self.release_deck(self.active)
+            # Skip to the next video from the event loop, never recursively
+            QTimer.singleShot(0, self.play_next_video)
+
+    def reload(self):
+        """
+        Reopen the current video at its current position, to apply new decoder options.
+        The pre-rolled video keeps its options until it is played.
+        """
+        path = self.video_path
+        if not self.players or path is None:
+            return
+        position = max(0, self.player.get_time()) / 1000
+        try:
+            self.load(self.active, path, start_time=position)
         except Exception as e:
-            log(f"Error playing {self.video_path}: {e}")
-            self.play_next_video()  # Skip to the next video in case of error
+            log(f"Error reloading {path}: {e}")
+
+    def suspend(self):
+        """
+        Pause the current video until resume() is called.
+        """
+        if not self.players or self.suspended:
+            return
+        self.suspended = True
+        self.player.set_pause(1)
+
+    def resume(self):
+        """
+        Resume the video paused by suspend().
+        """
+        if not self.players or not self.suspended:
+            return
+        self.suspended = False
+        self.player.set_pause(0)
 
-    def on_end_reached(self, event):
+    def refill(self):
+        """
+        Start playing or pre-rolling if the player was waiting for videos, e.g. after new videos were added.
+        """
+        if not self.players:
+            return
+        if self.video_path is None:
+            self.play_next_video()
+        elif self.preroll and self.next_path is None:
+            self.preroll_next_video()
+
+    def remove_videos(self, video_paths):
+        """
+        Forget removed videos. The current video keeps playing until its end,
+        a removed pre-rolled video is dropped and replaced.
+
+        Args:
+            video_paths: A collection of video paths.
+        """
+        removed = set(video_paths)
+        if self.next_path in removed:
+            self.release_deck(1 - self.active)
+            self.preroll_next_video()
+
+    def on_end_reached(self, event, index):
         """
         Handle the end of the video playback.
         Emit the video_finished signal to play the next video.
 
         Args:
             event: The event object.
+            index: The index of the deck sending the event.
         """
-        log(f"Video finished: {self.video_path}")
+        if index != self.active:
+            return
+        log("Video finished: %s", self.video_path)
         self.video_finished.emit()
     
     def mousePressEvent(self, event):
@@ -164,20 +676,23 @@ class VideoPlayer(QtWidgets.QFrame):
         if event.key() == QtCore.Qt.Key_Space:
             if self.player.is_playing():
                 self.player.pause()
-                log(f"Video paused {self.video_path}")
+                log("Video paused %s", self.video_path)
             else:
                 self.player.play()
-                log(f"Video resumed {self.video_path}")
+                log("Video resumed %s", self.video_path)
         elif event.key() == QtCore.Qt.Key_S:
             self.player.stop()
-            log(f"Video stopped {self.video_path}")
+            log("Video stopped %s", self.video_path)
         else:
             super(VideoPlayer, self).keyPressEvent(event)
 
-    def apply_panscan(self):
+    def apply_panscan(self, index=None):
         """
         Adjust the video scale based on the panscan value from config.
 
+        Args:
+            index: The index of the deck, the current one if None.
+
         Panscan Values:
             - 0 : Fit (scale video to fit the entire widget)
             - 1 : Fill (scale video to fill the widget, cropping excess)
@@ -186,22 +701,36 @@ class VideoPlayer(QtWidgets.QFrame):
         Returns:
             None
         """
+        if not self.players or self.compositor is not None:
+            # In compositor mode, panscan is applied when the frame buffer is set up
+            return
+        if index is None:
+            index = self.active
+        player = self.players[index]
+
         panscan = getattr(config, 'panscan', 0)
         panscan = max(0, min(1, panscan))  # Clamp between 0 and 1
 
-        video_width = self.player.video_get_width()
-        video_height = self.player.video_get_height()
+        video_width = player.video_get_width()
+        video_height = player.video_get_height()
+
+        if (video_width == 0 or video_height == 0) and self.prober is not None and self.paths[index]:
+            # VLC does not know the dimensions yet, use the probed ones
+            info = self.prober.get(self.paths[index])
+            if info is not None:
+                video_width, video_height = info.display_size
+                log("Using probed video dimensions: %sx%s", video_width, video_height)
 
         if video_width == 0 or video_height == 0:
             # TODO: not blocking but not supposed to happen: check why sometimes, the video dimensions are 0x0, it gets called again later with valid dimensions
-            log(f"Invalid video dimensions: {video_width}x{video_height}, skipping")
+            log("Invalid video dimensions: %sx%s, skipping", video_width, video_height)
             return  # Cannot proceed without video dimensions
 
-        log(f"Valid video dimensions: {video_width}x{video_height}, proceeding")
+        log("Valid video dimensions: %sx%s, proceeding", video_width, video_height)
 
         PAD_PIXELS = 2  # Extra pixels to avoid rounding issues
-        widget_width = self.video_widget.width() + PAD_PIXELS
-        widget_height = self.video_widget.height() + PAD_PIXELS
+        widget_width = self.video_widgets[index].width() + PAD_PIXELS
+        widget_height = self.video_widgets[index].height() + PAD_PIXELS
 
         # Calculate scale factors
         scale_fit = min(widget_width / video_width, widget_height / video_height)
@@ -217,9 +746,9 @@ class VideoPlayer(QtWidgets.QFrame):
             scale_factor = (scale_fill - scale_fit) * panscan + scale_fit
 
         # Appliquer le facteur d'échelle
-        self.player.video_set_scale(scale_factor)
+        player.video_set_scale(scale_factor)
 
-        log(f"Panscan applied: panscan={panscan}, scale_factor={scale_factor}")
+        log("Panscan applied: panscan=%s, scale_factor=%s", panscan, scale_factor)
 
     def resizeEvent(self, event):
         """
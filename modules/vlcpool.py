@@ -0,0 +1,72 @@
+# modules/vlcpool.py - Shared libvlc instances handed out to the video players.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+import logging
+import vlc
+
+import modules.config as config
+import modules.utils as utils   # all functions accessible with utils.function()
+from modules.utils import *     # main functions accessible as function() for ease of use, e.g. log(), error(), exit_with_error()
+
+def vlc_arguments():
+    """
+    Get the command-line arguments used to create libvlc instances.
+
+    Returns:
+        list of str: The libvlc arguments.
+    """
+    # VLC is very chatty, show output only in DEBUG mode
+    vlc_args = []
+    if config.log_level > logging.DEBUG:
+        vlc_args.append('--quiet')  # Suppress VLC messages
+    return vlc_args
+
+class InstancePool:
+    """
+    A small set of libvlc instances shared by all the video players.
+
+    Each libvlc instance loads its own module bank and starts its own threads,
+    so creating one per player is expensive. Players are spread over a few
+    shards instead, round-robin by slot index. With shards=0, each player gets
+    its own instance, as before.
+    """
+
+    def __init__(self, shards=1, arguments=None):
+        """
+        Initialize the pool. Instances are created on first use.
+
+        Args:
+            shards (int): The number of shared instances, 0 for one instance per player.
+            arguments (list of str, optional): Extra libvlc arguments, e.g. to select the video output.
+        """
+        self.shards = max(0, shards)
+        self.arguments = list(arguments or [])
+        self.instances = {}
+
+    def get(self, slot_index):
+        """
+        Get the libvlc instance for a slot.
+
+        Args:
+            slot_index (int): The slot index.
+
+        Returns:
+            vlc.Instance: The instance to create the slot media players and medias with.
+        """
+        key = slot_index % self.shards if self.shards else slot_index
+        instance = self.instances.get(key)
+        if instance is None:
+            instance = vlc.Instance(*(vlc_arguments() + self.arguments))
+            self.instances[key] = instance
+            log(f"Created libvlc instance {key}")
+        return instance
+
+    def release(self):
+        """
+        Release all the instances.
+        """
+        for instance in self.instances.values():
+            instance.release()
+        self.instances.clear()
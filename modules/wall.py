@@ -1,20 +1,33 @@
 # modules/wall.py - Module to build the wall and windows.
 
 import sys
-import random
+import time
+import shutil
 from PyQt5 import QtWidgets, QtCore, QtGui
 
 import modules.config as config
 import modules.utils as utils   # all functions accessible with utils.function()
 from modules.utils import *     # main functions accessible as function() for ease of use, e.g. log(), error(), exit_with_error()
 from modules.videoplayer import VideoPlayer
+from modules.vlcpool import InstancePool
+from modules import profiles
+from modules.quarantine import Quarantine
+from modules.dispatcher import Dispatcher
+from modules.proxy import ProxyCache
+from modules import compositor
+from modules.compositor import CompositorSurface
+from modules.watchdog import Watchdog
+from modules.startup import StartupScheduler
+from modules.slots import scale_slots
+
+DISPOSE_POLL_INTERVAL = 100     # Milliseconds between two checks of the media players disposed of before deleting a window
 
 class Wall:
     """
     A class to manage the video wall by creating and managing multiple WallWindow instances.
     """
 
-    def __init__(self, screens, slots, video_paths):
+    def __init__(self, screens, slots, video_paths, prober=None, instance_pool=None, dispatcher=None):
         """
         Initialize the Wall with the necessary parameters.
 
@@ -22,77 +35,324 @@ class Wall:
             screens (list of tuples): List of screen resolutions and positions. Each tuple contains (resolution, x, y).
             slots (list of tuples): List of slots with position and size for each player. Each tuple contains (screen_index, slot_x, slot_y, slot_width, slot_height).
             video_paths (list of str): List of video paths to play.
+            prober (Prober, optional): The media prober, probing the videos in the background.
+            instance_pool (InstancePool, optional): The shared libvlc instances, one is created if None.
+            dispatcher (Dispatcher, optional): Hands out the videos to the slots, a shuffling one is created if None.
         """
-        self.screens = screens
-        self.slots = slots
+        self.screens = list(screens)
+        self.slots = list(slots)
         self.video_paths = video_paths
         self.windows = []
+        self.screen_windows = {}        # screen index => window, for the connected screens
+        self.disconnected = {}          # screen index => last geometry, for the unplugged screens
+        self.players = []
+        self.dispatcher = dispatcher if dispatcher is not None else Dispatcher(video_paths)
+        self.start_time = config.start_time or time.monotonic()
+        self.started_slots = set()
+        self.first_frame_times = {}     # slot index => seconds from start_time to its first frame
+        self.prober = prober
+        self.instance_pool = instance_pool or InstancePool(config.vlc_instances)
+        self.quarantine = None if config.no_quarantine else Quarantine()
+        self.proxy = None
+        if config.proxy:
+            if shutil.which('ffmpeg'):
+                self.proxy = ProxyCache()
+            else:
+                log("ffmpeg not found, proxies disabled")
+        self.use_compositor = config.compositor and compositor.available()
+        if config.compositor and not self.use_compositor:
+            log("NumPy not found, compositor disabled")
+
+        # Show the windows first, then bring the slots up in waves from the event loop
+        self.build_start = time.monotonic()
+        self.rss_before = utils.get_rss()
+        self.allocate_decoder_threads()
+        self.startup = StartupScheduler(self, self.create_windows())
+        self.startup.finished.connect(self.on_startup_finished)
 
-        self.create_windows_and_players()
+        # Restart the slots whose playback is stalled
+        self.watchdog = None if config.no_watchdog else Watchdog(self)
 
-    def create_windows_and_players(self):
+    def create_windows(self):
         """
-        Create required windows and build the video players grid.
-        
+        Create and show the windows, and list the slots to start.
+        The players are created later by the start-up scheduler.
+
+        Returns:
+            list: The pending slots, as accepted by create_player().
+        """
+        start = time.monotonic()
+        pending = []
+
+        if self.prober is not None:
+            # Probe the whole list in the background, players ask for their next videos first
+            self.prober.probed.connect(self.on_probed)
+            self.prober.request(self.video_paths)
+
+        for screen_index in range(len(self.screens)):
+            pending.extend(self.create_screen(screen_index))
+
+        log(f"{len(self.windows)} window(s) shown in {time.monotonic() - start:.3f}s, {len(pending)} slot(s) to start")
+        return pending
+
+    def create_screen(self, screen_index):
+        """
+        Create and show the window of a screen.
+
+        Args:
+            screen_index (int): The index of the screen in self.screens.
+
+        Returns:
+            list: The pending slots of the screen, as accepted by create_player().
+        """
+        screen = self.screens[screen_index]
+        # Create a window for each screen
+        window = WallWindow()
+        window.setWindowTitle(config.app_name)  # Set the window title
+        res, x, y = screen
+        try:
+            width, height = map(int, res.split('x'))
+        except ValueError:
+            log(f"Invalid resolution for screen {screen_index}: {res}")
+            return []
+        window.setGeometry(x, y, width, height)
+        window.showFullScreen()  # Open in fullscreen by default
+        self.windows.append(window)
+        self.screen_windows[screen_index] = window
+
+        # A single surface for all the slots of the screen, under the players
+        surface = CompositorSurface(window, width, height) if self.use_compositor else None
+        if surface is not None:
+            surface.show()
+
+        # Build slots for current screen
+        pending = []
+        screen_slots = [(slot_index, slot) for slot_index, slot in enumerate(self.slots) if slot[0] == screen_index]
+        log(f"Screen {screen_index} slots: {[slot for _, slot in screen_slots]}")
+        for slot_index, slot in screen_slots:
+            _, slot_x, slot_y, slot_width, slot_height = slot
+            # Relative position within the window
+            pending.append((slot_index, screen_index, window, surface, slot_x - x, slot_y - y, slot_width, slot_height))
+        return pending
+
+    def close_screen(self, screen_index):
+        """
+        Stop the players and close the window of a screen.
+
+        Args:
+            screen_index (int): The index of the screen in self.screens.
+
+        Returns:
+            int: The number of players stopped.
+        """
+        self.startup.discard(screen_index)
+        removed = [player for player in self.players if self.slots[player.slot_index][0] == screen_index]
+        threads = []
+        for player in removed:
+            threads.extend(player.shutdown())
+            self.startup.started(player.slot_index)
+            self.players.remove(player)
+            self.started_slots.discard(player.slot_index)
+            self.first_frame_times.pop(player.slot_index, None)
+        window = self.screen_windows.pop(screen_index, None)
+        if window is not None:
+            self.windows.remove(window)
+            # Hidden rather than closed, closing the last window would quit the application
+            window.hide()
+            self.delete_when_disposed(window, threads)
+        return len(removed)
+
+    def delete_when_disposed(self, window, threads):
+        """
+        Delete a window once the media players rendering into it are disposed of.
+
+        Args:
+            window (QWidget): The window.
+            threads (list of threading.Thread): The threads disposing of its media players.
+        """
+        threads = [thread for thread in threads if thread.is_alive()]
+        if threads:
+            QtCore.QTimer.singleShot(DISPOSE_POLL_INTERVAL, lambda: self.delete_when_disposed(window, threads))
+        else:
+            window.deleteLater()
+
+    def remove_screen(self, screen_index):
+        """
+        Remove a screen from the wall, e.g. when it is unplugged. Its slots are
+        kept, to be rebuilt on the next screen added.
+
+        Args:
+            screen_index (int): The index of the screen in self.screens.
+        """
+        stopped = self.close_screen(screen_index)
+        self.disconnected[screen_index] = self.screens[screen_index]
+        self.screens[screen_index] = None
+        self.allocate_decoder_threads()
+        log(f"Screen {screen_index} removed, {stopped} player(s) stopped")
+
+    def rebuild_screen(self, screen_index, screen):
+        """
+        Rebuild a screen on a new geometry, its slots are scaled to it.
+        The players of the other screens are not touched.
+
+        Args:
+            screen_index (int): The index of the screen in self.screens.
+            screen (tuple): The new geometry, (resolution, x, y).
+        """
+        start = time.monotonic()
+        old_screen = self.screens[screen_index] or self.disconnected.pop(screen_index)
+        self.close_screen(screen_index)
+        slot_indices = [slot_index for slot_index, slot in enumerate(self.slots) if slot[0] == screen_index]
+        for slot_index, slot in zip(slot_indices, scale_slots([self.slots[index] for index in slot_indices], old_screen, screen)):
+            self.slots[slot_index] = slot
+        self.screens[screen_index] = screen
+        self.allocate_decoder_threads()
+        self.startup.add(self.create_screen(screen_index))
+        log(f"Screen {screen_index} rebuilt as {screen[0]} at ({screen[1]}, {screen[2]}) in {time.monotonic() - start:.3f}s")
+
+    def add_screen(self, screen):
+        """
+        Add a screen to the wall. The slots of the last removed screen are
+        restored on it, otherwise it gets the slot layout of a connected screen.
+
+        Args:
+            screen (tuple): The geometry of the new screen, (resolution, x, y).
+
+        Returns:
+            int: The index of the screen.
+        """
+        if self.disconnected:
+            # Most likely the same monitor plugged back
+            screen_index = list(self.disconnected)[-1]
+            self.rebuild_screen(screen_index, screen)
+            return screen_index
+
+        template = next((index for index, connected in enumerate(self.screens)
+                         if connected is not None and any(slot[0] == index for slot in self.slots)), None)
+        screen_index = len(self.screens)
+        self.screens.append(screen)
+        if template is not None:
+            template_slots = [(screen_index,) + tuple(slot[1:]) for slot in self.slots if slot[0] == template]
+            self.slots.extend(scale_slots(template_slots, self.screens[template], screen))
+        self.allocate_decoder_threads()
+        self.startup.add(self.create_screen(screen_index))
+        log(f"Screen {screen_index} added: {screen[0]} at ({screen[1]}, {screen[2]})")
+        return screen_index
+
+    def allocate_decoder_threads(self):
+        """
+        Share the decoder threads between the slots of the connected screens.
+        """
+        connected = [slot if self.screens[slot[0]] is not None else (slot[0], 0, 0, 0, 0) for slot in self.slots]
+        self.decoder_threads = profiles.allocate_decoder_threads(connected)
+
+    def create_player(self, slot_index, screen_index, window, surface, relative_x, relative_y, slot_width, slot_height):
+        """
+        Create the player of a slot, called by the start-up scheduler.
+
         Returns:
-            list of WallWindow: A list of created window instances.
-        """
-        total_slots = len(self.slots)
-        slot_index = 0
-
-        # Shuffle the video paths to distribute them randomly
-        random.shuffle(self.video_paths)
-
-        # Distribute the videos to the players without duplicates
-        players_playlists = [[] for _ in range(total_slots)]
-        for i, video in enumerate(self.video_paths):
-            players_playlists[i % total_slots].append(video)
-
-        for screen_index, screen in enumerate(self.screens):
-            # Create a window for each screen
-            window = WallWindow()
-            window.setWindowTitle(config.app_name)  # Set the window title
-            res, x, y = screen
-            try:
-                width, height = map(int, res.split('x'))
-            except ValueError:
-                log(f"Invalid resolution for screen {screen_index}: {res}")
-                continue
-            window.setGeometry(x, y, width, height)
-            window.showFullScreen()  # Open in fullscreen by default
-            self.windows.append(window)
-
-            # Build slots for current screen
-            screen_slots = [slot for slot in self.slots if slot[0] == screen_index]
-            log(f"Screen {screen_index} slots: {screen_slots}")
-            for slot in screen_slots:
-                _, slot_x, slot_y, slot_width, slot_height = slot
-
-                # Calculate the relative position within the window
-                relative_x = slot_x - x
-                relative_y = slot_y - y
-
-                # Assign a playlist to the player based on the slot index
-                if slot_index < total_slots:
-                    playlist = players_playlists[slot_index]
-                else:
-                    playlist = self.video_paths  # Fallback if insufficient
-
-                # Color for the player background
-                color = QtGui.QColor("black")
-
-                # Build and configure the player
-                log(f"Adding player {slot_index} on screen {screen_index} slot at ({relative_x}, {relative_y}) {slot_width}x{slot_height} with color {color.name()}")
-                try:
-                    player = VideoPlayer(playlist, window, slot_width, slot_height, color)
-                    player.setGeometry(relative_x, relative_y, slot_width, slot_height)
-                    player.show()
-                except Exception as e:
-                    log(f"Error creating VideoPlayer: {e}")
-
-                slot_index += 1
-
-        return self.windows
+            VideoPlayer: The player, not started yet, or None if it could not be created.
+        """
+        # Color for the player background
+        color = QtGui.QColor("black")
+
+        # Build and configure the player
+        log(f"Adding player {slot_index} on screen {screen_index} slot at ({relative_x}, {relative_y}) {slot_width}x{slot_height} with color {color.name()}")
+        try:
+            player = VideoPlayer(self.dispatcher, slot_index, window, slot_width, slot_height, color, prober=self.prober,
+                                 instance=self.instance_pool.get(slot_index),
+                                 decoder_threads=self.decoder_threads[slot_index] if slot_index < len(self.decoder_threads) else None,
+                                 quarantine=self.quarantine, proxy=self.proxy, compositor=surface)
+            player.setGeometry(relative_x, relative_y, slot_width, slot_height)
+            player.show()
+            if surface is not None:
+                surface.add_player(player)
+            player.playback_started.connect(lambda index=slot_index: self.on_playback_started(index))
+            self.players.append(player)
+        except Exception as e:
+            log(f"Error creating VideoPlayer: {e}")
+            return None
+        return player
+
+    def on_startup_finished(self):
+        """
+        Log the cost of the players, once they are all created.
+        """
+        if self.build_start is None:
+            # Screens rebuilt while playing
+            log(f"Wall updated: {len(self.players)} players, RSS {utils.format_bytes(utils.get_rss())}")
+            return
+        log(f"Wall created in {time.monotonic() - self.build_start:.3f}s: {len(self.players)} players, "
+            f"{len(self.instance_pool.instances)} libvlc instance(s), RSS {utils.format_bytes(self.rss_before)} -> {utils.format_bytes(utils.get_rss())}")
+        self.build_start = None
+
+    def add_videos(self, video_paths):
+        """
+        Add new videos to the dispatcher, they are shown next.
+
+        Args:
+            video_paths (list of str): List of video paths to add.
+        """
+        new_paths = self.dispatcher.add(video_paths)
+        if not new_paths:
+            return
+        self.video_paths.extend(new_paths)
+        for player in self.players:
+            player.refill()
+        if self.prober is not None:
+            self.prober.request(new_paths)
+        log(f"Added {len(new_paths)} video(s) to the wall")
+
+    def remove_videos(self, video_paths):
+        """
+        Drop deleted videos from the dispatcher.
+
+        Args:
+            video_paths (list of str): List of video paths to remove.
+        """
+        removed = self.dispatcher.remove(video_paths)
+        if not removed:
+            return
+        self.video_paths = [path for path in self.video_paths if path not in removed]
+        for player in self.players:
+            player.remove_videos(removed)
+        log(f"Removed {len(removed)} video(s) from the wall")
+
+    def on_probed(self, path, info):
+        """
+        Give the shape of a video whose dimensions were just probed to the dispatcher,
+        reapply panscan on the players showing it, and request a proxy if the video
+        is too heavy for their slot.
+
+        Args:
+            path (str): The probed video path.
+            info (MediaInfo): The probed metadata.
+        """
+        self.dispatcher.set_aspect(path, *info.display_size)
+        for player in self.players:
+            if player.video_path == path:
+                player.apply_panscan()
+            if self.proxy is not None and path in (player.video_path, player.next_path):
+                self.proxy.request(path, info, player.slot_height)
+
+    def on_playback_started(self, slot_index):
+        """
+        Log the time to first frame, for the whole wall and for each slot.
+
+        Args:
+            slot_index (int): The index of the slot whose player started displaying video.
+        """
+        self.startup.started(slot_index)
+        if slot_index in self.started_slots:
+            return
+        elapsed = time.monotonic() - self.start_time
+        if not self.started_slots:
+            log(f"Time to first frame: {elapsed:.3f}s")
+        self.started_slots.add(slot_index)
+        self.first_frame_times[slot_index] = elapsed
+        log(f"Slot {slot_index} first frame after {elapsed:.3f}s")
+        if self.startup.done and len(self.started_slots) == len(self.players):
+            log(f"All {len(self.players)} slots playing after {elapsed:.3f}s")
 
 class WallWindow(QtWidgets.QWidget):
     """
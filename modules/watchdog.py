@@ -0,0 +1,146 @@
+# modules/watchdog.py - Wall-wide watchdog, restarting the slots whose playback is stalled.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+import time
+from PyQt5 import QtCore
+import vlc
+
+import modules.config as config
+import modules.utils as utils   # all functions accessible with utils.function()
+from modules.utils import *     # main functions accessible as function() for ease of use, e.g. log(), error(), exit_with_error()
+
+CHECK_INTERVAL = 5000   # Milliseconds between two checks of the players
+
+# States of the current deck that should not last, the end or error event was missed
+DEAD_STATES = (vlc.State.Ended, vlc.State.Error, vlc.State.Stopped, vlc.State.NothingSpecial)
+
+# States of the standby deck while it opens its video, it should reach Playing (then Paused) quickly
+OPENING_STATES = (vlc.State.Opening, vlc.State.Buffering, vlc.State.NothingSpecial, vlc.State.Error)
+
+class Watchdog(QtCore.QObject):
+    """
+    Check the progress of every player with a single timer and restart the stalled slots.
+
+    Players only move to the next video on the end of media event, a decoder
+    stuck on a frame or a file hanging on a network share would freeze the
+    slot forever. Each check reads the state and the time of the current deck
+    of every player, both cheap libvlc calls. A slot is recovered when its
+    time did not advance for the stall timeout while it should be playing, or
+    when it stays in an ended or error state, and a pre-rolled video that never
+    opens is dropped. A recovery only rebuilds the media players of that slot,
+    the stalled video is quarantined and the recovery is counted in the
+    recoveries attribute of the player.
+    """
+
+    def __init__(self, wall, timeout=None, parent=None):
+        """
+        Initialize the watchdog and start checking.
+
+        Args:
+            wall (Wall): The wall whose players are checked.
+            timeout (float, optional): Seconds without progress before a slot is recovered, defaults to config.stall_timeout.
+            parent (QObject, optional): The parent object.
+        """
+        super(Watchdog, self).__init__(parent)
+        self.wall = wall
+        self.timeout = timeout or config.stall_timeout or 30
+        self.samples = {}           # slot index => (path, state, time, since)
+        self.standby_samples = {}   # slot index => (path, since)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.check)
+        self.timer.start(CHECK_INTERVAL)
+
+    def check(self):
+        """
+        Check all the players, recover the stalled ones.
+        """
+        now = time.monotonic()
+        for player in self.wall.players:
+            slot_index = player.slot_index
+            if not player.players or player.suspended or player.video_path is None:
+                # Not playing on purpose, or waiting for videos with its own retry timer
+                self.samples.pop(slot_index, None)
+                self.standby_samples.pop(slot_index, None)
+                continue
+
+            reason = self.check_current(player, now)
+            if reason is not None:
+                self.recover(player, reason)
+                continue
+            self.check_standby(player, now)
+
+    def check_current(self, player, now):
+        """
+        Check the progress of the current video of a player.
+
+        Args:
+            player (VideoPlayer): The player.
+            now (float): The time of the check.
+
+        Returns:
+            str: Why the player must be recovered, or None.
+        """
+        slot_index = player.slot_index
+        path = player.video_path
+        state = player.player.get_state()
+        position = player.player.get_time()
+        sample = self.samples.get(slot_index)
+        if sample is None or sample[0] != path or sample[1] != state or sample[2] != position:
+            self.samples[slot_index] = (path, state, position, now)
+            return None
+        if state == vlc.State.Paused:
+            # Paused by the user, not stalled
+            return None
+
+        elapsed = now - sample[3]
+        if state in DEAD_STATES:
+            # The end or error event should have switched to the next video long ago
+            if elapsed * 1000 >= CHECK_INTERVAL:
+                return f"stuck in {state} state"
+        elif elapsed >= self.timeout:
+            return f"no progress for {elapsed:.0f}s in {state} state"
+        return None
+
+    def check_standby(self, player, now):
+        """
+        Drop the pre-rolled video of a player if it does not open within the timeout.
+
+        Args:
+            player (VideoPlayer): The player.
+            now (float): The time of the check.
+        """
+        slot_index = player.slot_index
+        standby = 1 - player.active
+        path = player.next_path
+        if path is None or player.players[standby].get_state() not in OPENING_STATES:
+            self.standby_samples.pop(slot_index, None)
+            return
+        sample = self.standby_samples.get(slot_index)
+        if sample is None or sample[0] != path:
+            self.standby_samples[slot_index] = (path, now)
+            return
+        if now - sample[1] < self.timeout:
+            return
+
+        log('warning', f"Slot {slot_index} could not pre-roll {path} in {self.timeout:.0f}s, dropping it")
+        del self.standby_samples[slot_index]
+        if player.quarantine is not None:
+            player.quarantine.add(path, "pre-roll stalled")
+        player.reset_deck(standby)
+        player.preroll_next_video()
+
+    def recover(self, player, reason):
+        """
+        Restart a stalled slot, the other slots are not touched.
+
+        Args:
+            player (VideoPlayer): The player.
+            reason (str): Why the player is recovered.
+        """
+        slot_index = player.slot_index
+        self.samples.pop(slot_index, None)
+        self.standby_samples.pop(slot_index, None)
+        player.recover(reason)
@@ -0,0 +1,307 @@
+# modules/watcher.py - Watch the video directories and report added and removed videos.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+import os
+import time
+import errno
+import ctypes
+import ctypes.util
+import select
+import struct
+import threading
+from PyQt5 import QtCore
+from PyQt5.QtCore import pyqtSignal
+
+import modules.config as config
+import modules.utils as utils   # all functions accessible with utils.function()
+from modules.utils import *     # main functions accessible as function() for ease of use, e.g. log(), error(), exit_with_error()
+from modules import scanner
+
+# inotify constants, see inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+EVENT_HEADER = struct.Struct('iIII')
+
+FLUSH_DELAY = 1.0   # Seconds to batch events before reporting them
+
+class InotifyUnavailable(Exception):
+    """
+    Raised when inotify cannot be used and the watcher must poll instead.
+    """
+
+class VideoWatcher(QtCore.QObject):
+    """
+    Watch directories for video files being added or removed.
+
+    On Linux, inotify is used. Other platforms, or Linux when inotify is not
+    usable (e.g. watch limit reached), fall back to polling the directories.
+    Events are batched and reported through Qt signals in the main thread.
+
+    Attributes:
+        videos_added (pyqtSignal): Emitted with a list of new video paths.
+        videos_removed (pyqtSignal): Emitted with a list of deleted video paths.
+    """
+
+    videos_added = pyqtSignal(list)
+    videos_removed = pyqtSignal(list)
+
+    def __init__(self, directories, days=None, interval=60, parent=None):
+        """
+        Initialize the watcher.
+
+        Args:
+            directories (list of str): The directories to watch.
+            days (int, optional): Only report existing videos modified in the last days, as in discovery.
+            interval (int): Polling interval in seconds, when polling is used.
+            parent (QObject, optional): The parent object.
+        """
+        super(VideoWatcher, self).__init__(parent)
+        self.roots = [os.path.abspath(directory) for directory in directories]
+        self.days = days
+        self.interval = interval
+        self.known = set()
+        self.stopping = threading.Event()
+        self.thread = None
+        self.added = set()
+        self.removed = set()
+
+    def start(self):
+        """
+        Start watching in a background thread.
+        """
+        self.thread = threading.Thread(target=self.run, name='watcher', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop watching.
+        """
+        self.stopping.set()
+
+    def run(self):
+        """
+        Thread entry point, use inotify when available and poll otherwise.
+        """
+        if config.is_linux:
+            try:
+                self.run_inotify()
+                return
+            except InotifyUnavailable as e:
+                log(f"inotify not available ({e}), polling directories every {self.interval}s")
+        else:
+            log(f"Polling directories every {self.interval}s")
+        self.run_polling()
+
+    def snapshot(self):
+        """
+        Scan the watched directories.
+
+        Returns:
+            set of str: The video paths currently present.
+        """
+        return set(scanner.find_videos(self.roots, self.days))
+
+    def file_added(self, path):
+        """
+        Record a new video file, to be reported on the next flush.
+        """
+        if path in self.known or not scanner.is_video_name(os.path.basename(path)):
+            return
+        self.known.add(path)
+        self.removed.discard(path)
+        self.added.add(path)
+
+    def file_removed(self, path):
+        """
+        Record a deleted video file, to be reported on the next flush.
+        """
+        if path not in self.known:
+            return
+        self.known.discard(path)
+        self.added.discard(path)
+        self.removed.add(path)
+
+    def tree_removed(self, directory):
+        """
+        Record the deletion of all known videos below a directory.
+        """
+        prefix = directory + os.sep
+        for path in [path for path in self.known if path.startswith(prefix)]:
+            self.file_removed(path)
+
+    def flush(self):
+        """
+        Report the pending changes through the Qt signals.
+        """
+        if self.removed:
+            removed = sorted(self.removed)
+            self.removed.clear()
+            log(f"Watcher: {len(removed)} video(s) removed")
+            self.videos_removed.emit(removed)
+        if self.added:
+            added = sorted(self.added)
+            self.added.clear()
+            log(f"Watcher: {len(added)} video(s) added")
+            self.videos_added.emit(added)
+
+    def run_polling(self):
+        """
+        Poll the directories and report the differences between two scans.
+        """
+        if not self.known:
+            self.known = self.snapshot()
+        while not self.stopping.wait(self.interval):
+            current = self.snapshot()
+            for path in current - self.known:
+                self.file_added(path)
+            for path in self.known - current:
+                self.file_removed(path)
+            self.flush()
+
+    def run_inotify(self):
+        """
+        Watch every directory with inotify and report the events.
+
+        Raises:
+            InotifyUnavailable: If inotify cannot be initialized or a watch cannot be added.
+        """
+        libc_name = ctypes.util.find_library('c')
+        libc = ctypes.CDLL(libc_name, use_errno=True) if libc_name else None
+        if libc is None or not hasattr(libc, 'inotify_init1'):
+            raise InotifyUnavailable("no inotify in libc")
+
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise InotifyUnavailable(os.strerror(ctypes.get_errno()))
+
+        watches = {}    # watch descriptor => directory
+        cutoff = scanner.days_cutoff(self.days)
+
+        def add_watch(directory):
+            wd = libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                code = ctypes.get_errno()
+                if code == errno.ENOSPC:
+                    raise InotifyUnavailable("watch limit reached, see /proc/sys/fs/inotify/max_user_watches")
+                log(f"Cannot watch {directory}: {os.strerror(code)}")
+            return wd
+
+        def scan(directory):
+            # The watch is added before listing, so files created meanwhile are not missed
+            wd = add_watch(directory)
+            videos, subdirs = scanner.scan_directory(directory, cutoff)
+            return (directory, wd, videos), subdirs
+
+        def watch_tree(directory, initial=False):
+            for path, wd, videos in scanner.walk_parallel([directory], scan):
+                if wd >= 0:
+                    watches[wd] = path
+                for video in videos:
+                    if initial:
+                        self.known.add(video)
+                    else:
+                        self.file_added(video)
+
+        def unwatch_tree(directory):
+            prefix = directory + os.sep
+            for wd, path in list(watches.items()):
+                if path == directory or path.startswith(prefix):
+                    libc.inotify_rm_watch(fd, wd)
+                    watches.pop(wd, None)
+            self.tree_removed(directory)
+
+        watching = False    # Initial setup done, the known videos were all reported
+        try:
+            start = time.monotonic()
+            for root in self.roots:
+                watch_tree(root, initial=True)
+            watching = True
+            log(f"Watching {len(watches)} directories, {len(self.known)} video(s), setup in {time.monotonic() - start:.3f}s")
+
+            deadline = None
+            while not self.stopping.is_set():
+                timeout = 1.0 if deadline is None else max(0, deadline - time.monotonic())
+                readable, _, _ = select.select([fd], [], [], timeout)
+                if not readable:
+                    if deadline is not None and time.monotonic() >= deadline:
+                        self.flush()
+                        deadline = None
+                    continue
+
+                try:
+                    data = os.read(fd, 65536)
+                except BlockingIOError:
+                    continue
+
+                offset = 0
+                while offset < len(data):
+                    wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                    offset += EVENT_HEADER.size
+                    name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                    offset += length
+
+                    if mask & IN_Q_OVERFLOW:
+                        log("Watcher: event queue overflow, rescanning")
+                        current = self.snapshot()
+                        for path in current - self.known:
+                            self.file_added(path)
+                        for path in self.known - current:
+                            self.file_removed(path)
+                        continue
+
+                    directory = watches.get(wd)
+                    if directory is None:
+                        continue
+                    if mask & IN_IGNORED:
+                        watches.pop(wd, None)
+                        continue
+                    if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                        continue
+
+                    path = os.path.join(directory, name)
+                    if mask & IN_ISDIR:
+                        if mask & (IN_CREATE | IN_MOVED_TO):
+                            watch_tree(path)
+                        elif mask & (IN_DELETE | IN_MOVED_FROM):
+                            unwatch_tree(path)
+                    elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                        # Wait for the file to be complete before adding it
+                        self.file_added(path)
+                    elif mask & IN_CREATE and os.path.islink(path):
+                        # Symlinks are never written, add them on creation
+                        self.file_added(path)
+                    elif mask & (IN_DELETE | IN_MOVED_FROM):
+                        self.file_removed(path)
+
+                if deadline is None and (self.added or self.removed):
+                    deadline = time.monotonic() + FLUSH_DELAY
+                elif deadline is not None and time.monotonic() >= deadline:
+                    # Events keep coming, flush anyway
+                    self.flush()
+                    deadline = None
+        except InotifyUnavailable:
+            os.close(fd)
+            if watching:
+                # Polling goes on from the videos already reported
+                self.flush()
+            else:
+                self.known.clear()
+                self.added.clear()
+                self.removed.clear()
+            raise
+        os.close(fd)
@@ -0,0 +1,38 @@
+# tests/conftest.py - Shared fixtures, the modules are imported from the repository root.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+import os
+import sys
+
+import pytest
+
+# No display needed for the Qt parts used by the tests
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import modules.config as config
+import modules.utils as utils
+
+@pytest.fixture(autouse=True)
+def default_config():
+    """
+    Start each test with every option unset, as some functions update the configuration.
+    """
+    config.apply_config(dict.fromkeys(config.config_values))
+    config.app_name = "WallOli tests"
+    config.is_linux = sys.platform.startswith('linux')
+    config.is_mac = sys.platform == 'darwin'
+    config.is_windows = sys.platform.startswith('win')
+    yield config
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """
+    Keep the cache databases in a temporary directory.
+    """
+    path = tmp_path / 'cache'
+    monkeypatch.setattr(utils, 'get_cache_dir', lambda: str(path))
+    path.mkdir()
+    return path
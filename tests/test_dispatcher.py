@@ -0,0 +1,103 @@
+# tests/test_dispatcher.py - Wall-wide dispatcher handing out the next video to each slot.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+from modules.dispatcher import Dispatcher, LoopDispatcher, aspect_mismatch, UNKNOWN_MISMATCH
+
+LANDSCAPE = 16 / 9
+
+def videos(count):
+    return [f'video{index}.mp4' for index in range(count)]
+
+def ready_order(dispatcher):
+    return [path for path, _ in dispatcher.ready]
+
+def test_whole_library_before_a_repeat():
+    dispatcher = Dispatcher(videos(10), interval=0, window=1)
+    order = ready_order(dispatcher)
+    shown = []
+    for _ in range(11):
+        path = dispatcher.acquire(0)
+        shown.append(path)
+        dispatcher.release(0, path)
+    assert shown[:10] == order
+    assert shown[10] == order[0]
+
+def test_playing_video_never_handed_out_twice():
+    dispatcher = Dispatcher(videos(4), interval=0, window=1)
+    paths = [dispatcher.acquire(slot) for slot in range(4)]
+    assert sorted(paths) == videos(4)
+    assert dispatcher.acquire(4) is None
+
+def test_oldest_released_video_when_all_cooling():
+    dispatcher = Dispatcher(videos(3), interval=1000, window=1)
+    shown = []
+    for _ in range(3):
+        path = dispatcher.acquire(0)
+        shown.append(path)
+        dispatcher.release(0, path)
+    assert dispatcher.acquire(0) == shown[0]
+
+def test_added_videos_first():
+    dispatcher = Dispatcher(videos(3), interval=0, window=1)
+    assert dispatcher.add(['new.mp4', 'video0.mp4']) == ['new.mp4']
+    assert dispatcher.acquire(0) == 'new.mp4'
+
+def test_removed_videos_skipped():
+    dispatcher = Dispatcher(videos(3), interval=0, window=1)
+    order = ready_order(dispatcher)
+    assert dispatcher.remove([order[0], 'unknown.mp4']) == {order[0]}
+    assert dispatcher.acquire(0) == order[1]
+
+def test_best_fitting_video_in_the_window():
+    dispatcher = Dispatcher(videos(5), interval=0, window=3)
+    order = ready_order(dispatcher)
+    for path in order:
+        dispatcher.set_aspect(path, 1920, 1080)
+    dispatcher.set_aspect(order[2], 1080, 1920)
+    assert dispatcher.acquire(0, aspect=9 / 16) == order[2]
+    # The other candidates go back in front, in the same order
+    assert ready_order(dispatcher)[:2] == order[:2]
+    assert dispatcher.acquire(1, aspect=LANDSCAPE) == order[0]
+    assert dispatcher.acquire(2) == order[1]
+
+def test_oldest_video_when_none_fits_better():
+    dispatcher = Dispatcher(videos(5), interval=0, window=3)
+    order = ready_order(dispatcher)
+    for path in order:
+        dispatcher.set_aspect(path, 1920, 1080)
+    # Beyond the window, not considered
+    dispatcher.set_aspect(order[3], 1080, 1920)
+    assert dispatcher.acquire(0, aspect=9 / 16) == order[0]
+
+def test_unknown_aspect_between_fit_and_misfit():
+    dispatcher = Dispatcher(videos(4), interval=0, window=3)
+    order = ready_order(dispatcher)
+    dispatcher.set_aspect(order[0], 1080, 1920)
+    dispatcher.set_aspect(order[2], 1080, 1920)
+    # order[1] was never probed
+    assert dispatcher.acquire(0, aspect=LANDSCAPE) == order[1]
+
+def test_window_counts_live_videos_only():
+    dispatcher = Dispatcher(videos(5), interval=0, window=2)
+    order = ready_order(dispatcher)
+    for path in order:
+        dispatcher.set_aspect(path, 1920, 1080)
+    dispatcher.set_aspect(order[3], 1080, 1920)
+    dispatcher.remove(order[:2])
+    assert dispatcher.acquire(0, aspect=9 / 16) == order[3]
+    assert dispatcher.acquire(1) == order[2]
+
+def test_aspect_mismatch():
+    assert aspect_mismatch(LANDSCAPE, LANDSCAPE) == 0
+    assert aspect_mismatch(9 / 16, LANDSCAPE) == aspect_mismatch(LANDSCAPE, 9 / 16)
+    assert aspect_mismatch(None, LANDSCAPE) == UNKNOWN_MISMATCH
+    # Close aspects are equivalent, the shuffle order decides
+    assert aspect_mismatch(1.85, LANDSCAPE) == aspect_mismatch(LANDSCAPE, LANDSCAPE)
+    assert aspect_mismatch(4 / 3, LANDSCAPE) < UNKNOWN_MISMATCH < aspect_mismatch(9 / 16, LANDSCAPE)
+
+def test_loop_dispatcher_follows_the_plans():
+    dispatcher = LoopDispatcher([['a', 'b'], ['c']])
+    assert [dispatcher.acquire(0, aspect=LANDSCAPE) for _ in range(3)] == ['a', 'b', 'a']
+    assert dispatcher.acquire(1) == 'c'
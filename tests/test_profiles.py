@@ -0,0 +1,36 @@
+# tests/test_profiles.py - Decoder profiles and decoder thread allocation.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+import modules.config as config
+from modules.profiles import allocate_decoder_threads
+
+def slot(width, height):
+    return (0, 0, 0, width, height)
+
+def test_sums_to_the_budget():
+    slots = [slot(640, 360)] * 7 + [slot(1280, 720), slot(1920, 1080)]
+    for budget in range(len(slots), 40):
+        assert sum(allocate_decoder_threads(slots, budget)) == budget
+
+def test_proportional_to_the_area():
+    # 1 + 8 * 1/4 and 1 + 8 * 3/4, no remainder
+    assert allocate_decoder_threads([slot(960, 540), slot(960, 1620)], 10) == [3, 7]
+
+def test_largest_remainders_first():
+    # 4 spare threads, 4/3 each: equal remainders, the first slot gets the leftover one
+    assert allocate_decoder_threads([slot(100, 100)] * 3, 7) == [3, 2, 2]
+    # 5 spare threads: shares 0.5, 1.5 and 3, the leftover one goes to the first largest remainder
+    assert allocate_decoder_threads([slot(100, 10), slot(100, 30), slot(100, 60)], 8) == [2, 2, 4]
+
+def test_one_thread_per_slot_at_least():
+    assert allocate_decoder_threads([slot(1920, 1080), slot(10, 10)], 2) == [1, 1]
+    assert allocate_decoder_threads([slot(1920, 1080)] * 4, 2) == [1, 1, 1, 1]
+
+def test_budget_from_config():
+    config.decoder_threads = 6
+    assert sum(allocate_decoder_threads([slot(100, 100)] * 2)) == 6
+
+def test_no_slot():
+    assert allocate_decoder_threads([], 8) == []
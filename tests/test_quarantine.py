@@ -0,0 +1,80 @@
+# tests/test_quarantine.py - Persistent list of video files that failed to open or decode.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+import os
+import time
+
+import pytest
+
+from modules import quarantine as quarantine_module
+from modules.quarantine import Quarantine, RETRY_DELAY, MAX_RETRY_DELAY
+
+@pytest.fixture
+def database(tmp_path):
+    return str(tmp_path / 'quarantine.sqlite')
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / 'broken.mp4'
+    path.write_bytes(b'broken')
+    return str(path)
+
+def delay(quarantine, path):
+    return quarantine.entries[path][3] - time.time()
+
+def test_backoff_doubles(database, video):
+    quarantine = Quarantine(database)
+    quarantine.add(video, "cannot open")
+    assert quarantine.is_quarantined(video)
+    assert delay(quarantine, video) == pytest.approx(RETRY_DELAY, abs=5)
+    quarantine.add(video, "cannot open")
+    quarantine.add(video, "cannot open")
+    assert quarantine.entries[video][2] == 3
+    assert delay(quarantine, video) == pytest.approx(RETRY_DELAY * 4, abs=5)
+
+def test_backoff_capped(database, video):
+    quarantine = Quarantine(database)
+    for _ in range(20):
+        quarantine.add(video, "cannot open")
+    assert delay(quarantine, video) == pytest.approx(MAX_RETRY_DELAY, abs=5)
+
+def test_expiry(database, video, monkeypatch):
+    quarantine = Quarantine(database)
+    quarantine.add(video, "cannot open")
+    now = time.time()
+    monkeypatch.setattr(quarantine_module.time, 'time', lambda: now + RETRY_DELAY + 1)
+    assert not quarantine.is_quarantined(video)
+
+def test_released_when_the_file_changes(database, video):
+    quarantine = Quarantine(database)
+    quarantine.add(video, "cannot open")
+    quarantine.add(video, "cannot open")
+    with open(video, 'ab') as file:
+        file.write(b' now complete')
+    assert not quarantine.is_quarantined(video)
+    # A new failure of the changed file starts the backoff again
+    quarantine.add(video, "cannot decode")
+    assert quarantine.entries[video][2] == 1
+
+def test_released_when_the_mtime_changes(database, video):
+    quarantine = Quarantine(database)
+    quarantine.add(video, "cannot open")
+    stat = os.stat(video)
+    os.utime(video, (stat.st_atime, stat.st_mtime + 60))
+    assert not quarantine.is_quarantined(video)
+
+def test_missing_file_stays_quarantined(database, video):
+    quarantine = Quarantine(database)
+    quarantine.add(video, "cannot open")
+    os.unlink(video)
+    assert quarantine.is_quarantined(video)
+
+def test_persisted_and_released(database, video):
+    Quarantine(database).add(video, "cannot open")
+    quarantine = Quarantine(database)
+    assert quarantine.is_quarantined(video)
+    quarantine.release(video)
+    assert not quarantine.is_quarantined(video)
+    assert not Quarantine(database).is_quarantined(video)
@@ -0,0 +1,87 @@
+# tests/test_slots.py - Slot layout of the screens.
+
+# All code comments, user outputs and debugs must be in English. Do not remove this line.
+# Some commands are commented out for further development. Do not remove them.
+
+import modules.config as config
+import modules.slots as slots_module
+from modules.slots import get_slots, required_players, scale_slots
+
+SCREEN = ('1920x1080', 0, 0)
+TWO_SCREENS = [('1920x1080', 0, 0), ('1920x1080', 1920, 0)]
+
+def videos(count):
+    return [f'video{index}.mp4' for index in range(count)]
+
+def test_one_player_per_screen_by_default():
+    assert len(get_slots(videos(9), [SCREEN])) == 1
+    assert len(get_slots(videos(9), TWO_SCREENS)) == 2
+
+def test_number_per_screen():
+    config.number = 4
+    slots = get_slots(videos(9), TWO_SCREENS)
+    assert len(slots) == 8
+    assert [slot[0] for slot in slots].count(1) == 4
+
+def test_total_number():
+    config.total_number = 3
+    assert len(get_slots(videos(9), [SCREEN])) == 3
+
+def test_single_loop_player_per_video():
+    # -n used to default to 1, single-loop mode then got a single player per screen
+    config.singleloop = True
+    assert len(get_slots(videos(9), [SCREEN])) == 9
+
+def test_single_loop_merges_the_grid_cells_left():
+    config.singleloop = True
+    slots = get_slots(videos(5), [SCREEN])
+    assert len(slots) == 5
+    # The cells of the 3x3 grid are all covered
+    assert sum(width * height for _, _, _, width, height in slots) == 1920 * 1080
+
+def test_single_loop_limited_by_number():
+    config.singleloop = True
+    config.number = 2
+    assert len(get_slots(videos(9), [SCREEN])) == 2
+
+def test_single_loop_limited_by_total_number():
+    config.singleloop = True
+    config.total_number = 4
+    assert len(get_slots(videos(9), TWO_SCREENS)) == 4
+
+def test_fewer_videos_than_players():
+    config.number = 4
+    assert len(get_slots(videos(3), [SCREEN])) == 3
+
+def test_required_players():
+    assert required_players(TWO_SCREENS) == 2
+    config.number = 3
+    assert required_players(TWO_SCREENS) == 6
+    config.total_number = 5
+    assert required_players(TWO_SCREENS) == 5
+    config.singleloop = True
+    assert required_players(TWO_SCREENS) is None
+
+def test_scale_slots_keeps_the_layout():
+    slots = [(1, 1920, 0, 960, 540), (1, 2880, 0, 960, 540), (1, 1920, 540, 1920, 540)]
+    scaled = scale_slots(slots, ('1920x1080', 1920, 0), ('1280x1024', 0, 100))
+    assert scaled == [(1, 0, 100, 640, 512), (1, 640, 100, 640, 512), (1, 0, 612, 1280, 512)]
+
+def test_scale_slots_keeps_adjacent_slots_adjacent():
+    # Three columns of 640 pixels, to a width that is not a multiple of 3
+    slots = [(0, col * 640, 0, 640, 1080) for col in range(3)]
+    scaled = scale_slots(slots, SCREEN, ('1000x1080', 0, 0))
+    for left, right in zip(scaled, scaled[1:]):
+        assert left[1] + left[3] == right[1]
+    assert scaled[-1][1] + scaled[-1][3] == 1000
+
+def test_mixed_tiles_without_number(monkeypatch):
+    # -n used to default to 1, the mixed tiles were then never placed without it
+    monkeypatch.setattr(slots_module, 'get_portrait_share', lambda video_paths: (0.4, 9 / 16))
+    config.singleloop = True
+    config.mixed_tiles = True
+    slots = get_slots(videos(5), [SCREEN])
+    assert len(slots) == 5
+    portrait = [slot for slot in slots if slot[4] > slot[3]]
+    assert len(portrait) == 2
+    assert sum(width * height for _, _, _, width, height in slots) == 1920 * 1080